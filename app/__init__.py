@@ -74,4 +74,41 @@ def create_app(env: Optional[str] = None) -> Flask:
         seed_document_types()
         print("seed-document-types: done")
 
+    # CLI: rebuild KB bigram term index (回填历史切片)
+    from domain.kb.term_index import rebuild_index
+
+    @app.cli.command("kb-rebuild-terms")
+    def _kb_rebuild_terms_cmd():
+        written = rebuild_index()
+        print(f"kb-rebuild-terms: done, {written} term rows")
+
+    # CLI: rebuild KB document summaries (回填文档列表汇总)
+    from domain.kb.doc_summary import rebuild_summaries
+
+    @app.cli.command("kb-rebuild-summary")
+    def _kb_rebuild_summary_cmd():
+        n = rebuild_summaries()
+        print(f"kb-rebuild-summary: done, {n} documents")
+
+    # CLI: rebuild evidence search table (回填证照检索表)
+    from domain.index.search_table import rebuild_search_table
+
+    @app.cli.command("index-rebuild-search")
+    def _index_rebuild_search_cmd():
+        n = rebuild_search_table()
+        print(f"index-rebuild-search: done, {n} evidences")
+
+    # CLI: refresh evidence validity status (也可交给 cron 定时执行)
+    from domain.index.evidence_status import refresh_statuses
+
+    @app.cli.command("index-refresh-status")
+    def _index_refresh_status_cmd():
+        changed = refresh_statuses()
+        print(f"index-refresh-status: done, {changed}")
+
+    # 定时刷新证照有效期状态（EVIDENCE_STATUS_JOB_ENABLED=0 关闭，改用上面的命令走 cron）
+    from domain.index.evidence_status import start_status_job
+
+    start_status_job(app)
+
     return app
\ No newline at end of file
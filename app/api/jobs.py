@@ -1,4 +1,4 @@
-from flask import Blueprint, jsonify, request, send_file
+from flask import Blueprint, current_app, jsonify, request, send_file
 
 from app.services.job_service import create_job, get_job
 from app.worker.runner import runner
@@ -66,9 +66,13 @@ def download_artifact(job_id: str):
         return jsonify(error="not_found", message="artifact path not set"), 404
 
     # Resolve path under repo root safely
-    rel_path = rel_path.replace("\\", "/").lstrip("/")
+    # (ARTIFACT_STORAGE_DIR defaults to an absolute path, so artifact paths may be absolute)
+    rel_path = rel_path.replace("\\", "/")
     repo_root = Path(__file__).resolve().parents[2]  # .../<repo>
-    abs_path = (repo_root / Path(rel_path)).resolve()
+    if Path(rel_path).is_absolute():
+        abs_path = Path(rel_path).resolve()
+    else:
+        abs_path = (repo_root / Path(rel_path.lstrip("/"))).resolve()
 
     # Ensure file exists
     if not abs_path.exists() or not abs_path.is_file():
@@ -76,7 +80,10 @@ def download_artifact(job_id: str):
 
     # Ensure the requested file is exactly the job's artifact file (not arbitrary)
     # (already enforced by using job.artifact_*_path; additionally ensure it's under storage/artifacts/<job_id>/)
-    expected_dir = (repo_root / Path("storage/artifacts") / job_id).resolve()
+    artifacts_root = Path(current_app.config.get("ARTIFACT_STORAGE_DIR") or "storage/artifacts")
+    if not artifacts_root.is_absolute():
+        artifacts_root = repo_root / artifacts_root
+    expected_dir = (artifacts_root / job_id).resolve()
     if expected_dir not in abs_path.parents:
         return jsonify(error="forbidden", message="invalid artifact path"), 403
 
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify, request, current_app
 
-from domain.index.service import IndexSearchParams, search_index
+from domain.index.service import IndexSearchParams, index_facets, list_expiring, search_index
 
 bp = Blueprint("index_v1", __name__)
 
@@ -18,6 +18,8 @@ def index_search():
         page=(args.get("page") or "").strip() or "1",
         page_size=(args.get("page_size") or "").strip() or "20",
         sort=(args.get("sort") or "").strip() or "relevance_desc",
+        cursor=(args.get("cursor") or "").strip() or None,
+        count=(args.get("count") or "").strip().lower() or "exact",
     )
 
     try:
@@ -29,3 +31,48 @@ def index_search():
         # 开发模式下把真实错误带出来，方便定位 FULLTEXT / SQL 等问题
         msg = str(e) if current_app.debug else "index search failed"
         return jsonify(error="internal_error", message=msg), 500
+
+
+@bp.get("/api/v1/index/facets")
+def index_facets_api():
+    args = request.args
+
+    params = IndexSearchParams(
+        q=(args.get("q") or "").strip(),
+        scope=(args.get("scope") or "").strip().upper() or None,
+        owner_id=(args.get("owner_id") or "").strip() or None,
+        doc_type_code=(args.get("doc_type_code") or "").strip() or None,
+        valid_on=(args.get("valid_on") or "").strip() or None,
+        page="1",
+        page_size="1",
+        sort="created_at_desc",
+    )
+
+    try:
+        return jsonify(index_facets(params)), 200
+    except ValueError as e:
+        return jsonify(error="bad_request", message=str(e)), 400
+    except Exception as e:
+        msg = str(e) if current_app.debug else "index facets failed"
+        return jsonify(error="internal_error", message=msg), 500
+
+
+@bp.get("/api/v1/index/expiring")
+def index_expiring():
+    args = request.args
+
+    try:
+        result = list_expiring(
+            days=(args.get("days") or "").strip() or "30",
+            scope=(args.get("scope") or "").strip().upper() or None,
+            owner_id=(args.get("owner_id") or "").strip() or None,
+            doc_type_code=(args.get("doc_type_code") or "").strip() or None,
+            page=(args.get("page") or "").strip() or "1",
+            page_size=(args.get("page_size") or "").strip() or "20",
+        )
+        return jsonify(result), 200
+    except ValueError as e:
+        return jsonify(error="bad_request", message=str(e)), 400
+    except Exception as e:
+        msg = str(e) if current_app.debug else "index expiring failed"
+        return jsonify(error="internal_error", message=msg), 500
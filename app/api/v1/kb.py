@@ -1,8 +1,12 @@
 # app/api/v1/kb.py
 from flask import Blueprint, jsonify, request, send_file
 
-from domain.kb.ingest import KbIngestError, delete_doc, ingest_kb, list_docs
-from domain.kb.retriever import KbSearchError, search_blocks
+from app.services.job_service import create_job
+from app.worker.runner import runner
+from domain.kb.ingest import KbIngestError, delete_doc, list_docs, resolve_chunk_strategy
+from domain.kb import search_cache
+from domain.kb.batch_retriever import search_blocks_batch
+from domain.kb.retriever import SNIPPET_FIELDS, KbSearchError, get_block, search_blocks
 from domain.kb.export import export_search_to_docx
 
 bp = Blueprint("kb_v1", __name__)
@@ -10,14 +14,22 @@ bp = Blueprint("kb_v1", __name__)
 
 @bp.post("/api/v1/kb/ingest")
 def ingest_kb_api():
+    """
+    异步入库：立即返回 job_id，进度通过 GET /api/v1/jobs/<job_id> 轮询
+    （stage: PARSE / CHUNK / EMBED / WRITE / DONE）
+    可选 strategy: semantic / structure（默认取配置 KB_CHUNK_STRATEGY）
+    """
     data = request.get_json(silent=True) or {}
     file_id = data.get("file_id")
-    title = data.get("title")
+    tag = (data.get("tag") or "").strip() or "general"
 
     try:
-        result = ingest_kb(file_id=file_id, title=title)
-        return jsonify(result), 200
-    except KbIngestError as e:
+        strategy = resolve_chunk_strategy(data.get("strategy"))
+        # model_id 借用存储 "tag|strategy"
+        job_id = create_job(file_id=file_id, script_id="KB_INGEST", model_id=f"{tag}|{strategy}")
+        runner.start(job_id)
+        return jsonify(job_id=job_id, status="PENDING"), 202
+    except ValueError as e:
         return jsonify(error="bad_request", message=str(e)), 400
     except Exception:
         return jsonify(error="internal_error", message="kb ingest failed"), 500
@@ -25,12 +37,16 @@ def ingest_kb_api():
 
 @bp.get("/api/v1/kb/docs")
 def list_kb_docs_api():
+    """
+    文档列表（读 kb_documents 汇总），可选 ?tag= 过滤
+    """
     args = request.args
     page = args.get("page") or "1"
     page_size = args.get("page_size") or "20"
+    tag = (args.get("tag") or "").strip() or None
 
     try:
-        result = list_docs(page=int(page), page_size=int(page_size))
+        result = list_docs(page=int(page), page_size=int(page_size), tag=tag)
         return jsonify(result), 200
     except Exception:
         return jsonify(error="internal_error", message="kb docs list failed"), 500
@@ -56,6 +72,12 @@ def search_kb_blocks_api():
     title_keywords = data.get("title_keywords")
     page = data.get("page") or 1
     page_size = data.get("page_size") or 20
+    # 可选：cursor（上一页的 next_cursor，keyset 翻页）/ count（exact / capped / none）
+    cursor = data.get("cursor") or None
+    count = data.get("count") or "exact"
+    # 可选：fields 字段投影（默认只返回摘要 snippet + highlights，完整正文走 /api/v1/kb/blocks/<block_id>）
+    fields = data.get("fields") or list(SNIPPET_FIELDS)
+    snippet_chars = data.get("snippet_chars")
 
     try:
         try:
@@ -71,6 +93,10 @@ def search_kb_blocks_api():
             title_keywords=title_keywords,
             page=page_int,
             page_size=page_size_int,
+            cursor=cursor,
+            count=count,
+            fields=fields,
+            snippet_chars=snippet_chars,
         )
         return jsonify(result), 200
     except KbSearchError as e:
@@ -79,6 +105,50 @@ def search_kb_blocks_api():
         return jsonify(error="internal_error", message="kb search failed"), 500
 
 
+@bp.post("/api/v1/kb/search/batch")
+def search_kb_blocks_batch_api():
+    """
+    多 query 一次检索，results 与 queries 一一对应：[{query, total, items}]
+    可选 by_tag / top_k（每个 query 的条数，默认 3）/ order（recent / longest）/ fields / snippet_chars
+    """
+    data = request.get_json(silent=True) or {}
+    fields = data.get("fields") or list(SNIPPET_FIELDS)
+
+    try:
+        results = search_blocks_batch(
+            data.get("queries"),
+            by_tag=data.get("by_tag"),
+            top_k=data.get("top_k") or 3,
+            order=data.get("order") or "recent",
+            fields=fields,
+            snippet_chars=data.get("snippet_chars"),
+        )
+        return jsonify(results=results), 200
+    except KbSearchError as e:
+        return jsonify(error="bad_request", message=str(e)), 400
+    except Exception:
+        return jsonify(error="internal_error", message="kb batch search failed"), 500
+
+
+@bp.get("/api/v1/kb/blocks/<block_id>")
+def get_kb_block_api(block_id: str):
+    """
+    单个切片的完整内容
+    """
+    block = get_block(block_id)
+    if block is None:
+        return jsonify(error="not_found", message="block not found"), 404
+    return jsonify(block), 200
+
+
+@bp.get("/api/v1/kb/search/cache-stats")
+def kb_search_cache_stats_api():
+    """
+    检索缓存命中统计（当前进程）
+    """
+    return jsonify(search_cache.stats()), 200
+
+
 @bp.post("/api/v1/kb/export")
 def export_kb_api():
     """
@@ -1,7 +1,12 @@
 import logging
-from flask import Blueprint, request, jsonify, send_file
+from flask import Blueprint, request, jsonify
+
+from app.extensions import db
+from app.models import Job
+from app.services.job_service import create_job
+from app.worker.runner import runner
 # 【修改点1】这里把 ReviewIndexGenerator 改成了 BiddingDocumentGenerator
-from domain.review_index.generator import generate_review_index_docx, BiddingDocumentGenerator
+from domain.review_index.generator import BiddingDocumentGenerator
 
 bp = Blueprint("review_index", __name__, url_prefix="/api/v1/review-index")
 
@@ -12,10 +17,15 @@ logger = logging.getLogger(__name__)
 def preview_requirements():
     """
     预览解析出的评审要求 (Requirements)
-    前端调用: GET /api/v1/review-index/preview?job_id=...&limit=...
+    前端调用: GET /api/v1/review-index/preview?job_id=...&offset=...&limit=...
+    解析结果按 result.json 的路径 + mtime 缓存，翻页只序列化当前页
     """
     job_id = request.args.get("job_id")
-    limit = int(request.args.get("limit", 200))
+    try:
+        offset = max(int(request.args.get("offset", 0)), 0)
+        limit = max(int(request.args.get("limit", 200)), 0)
+    except (TypeError, ValueError):
+        return jsonify({"message": "offset and limit must be integers"}), 400
 
     if not job_id:
         return jsonify({"message": "job_id is required"}), 400
@@ -23,12 +33,12 @@ def preview_requirements():
     try:
         # 【修改点2】复用新的 Generator 类来加载数据
         generator = BiddingDocumentGenerator(job_id)
-        rows = generator.load_requirements()
+        preview_rows, total = generator.requirements_page(offset=offset, limit=limit)
 
-        # 截取前 N 条供预览
-        preview_rows = rows[:limit]
         return jsonify({
-            "total": len(rows),
+            "total": total,
+            "offset": offset,
+            "limit": limit,
             "items": preview_rows
         })
     except Exception as e:
@@ -39,41 +49,48 @@ def preview_requirements():
 @bp.post("/generate")
 def generate_docx():
     """
-    一键生成 Word 报告
+    一键生成 Word 报告（后台任务）
     前端调用: POST /api/v1/review-index/generate
     Body: { job_id, kb_tag, evidence_top_n, template_docx_path }
+    立即返回 202 { job_id, status }，进度通过 GET /api/v1/jobs/<job_id> 轮询
+    （stage: LOAD_REQUIREMENTS / RETRIEVE / RENDER / DONE），
+    完成后通过 GET /api/v1/jobs/<job_id>/artifact?type=docx 下载
     """
     data = request.get_json() or {}
 
     # 1. 提取参数
-    job_id = data.get("job_id")
+    source_job_id = (data.get("job_id") or "").strip()
     kb_tag = data.get("kb_tag")
-    evidence_top_n = int(data.get("evidence_top_n", 3))
     template_docx_path = data.get("template_docx_path")
 
-    # 兼容字段
-    xlsx_path = data.get("xlsx_path")
-
-    if not job_id:
+    if not source_job_id:
         return jsonify({"message": "job_id is required"}), 400
-
     try:
-        # 2. 调用核心生成函数
-        output_path = generate_review_index_docx(
-            job_id=job_id,
-            kb_tag=kb_tag,
-            evidence_top_n=evidence_top_n,
-            template_docx_path=template_docx_path,
-            xlsx_path=xlsx_path
-        )
+        evidence_top_n = int(data.get("evidence_top_n", 3))
+    except (TypeError, ValueError):
+        return jsonify({"message": "evidence_top_n must be an integer"}), 400
 
-        # 3. 返回文件流
-        return send_file(
-            output_path,
-            as_attachment=True,
-            download_name="投标响应文件.docx"  # 【修改点3】让下载下来的文件名更专业
+    source = db.session.get(Job, source_job_id)
+    if source is None:
+        return jsonify({"message": "job not found"}), 404
+
+    try:
+        # 2. 创建生成任务：model_id 借用存储来源任务 id
+        job_id = create_job(
+            file_id=source.file_id,
+            script_id="REVIEW_INDEX_GENERATE",
+            model_id=source.id,
+            params={
+                "kb_tag": kb_tag,
+                "evidence_top_n": evidence_top_n,
+                "template_docx_path": template_docx_path,
+            },
         )
+        runner.start(job_id)
+        return jsonify(job_id=job_id, status="PENDING"), 202
 
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         logger.exception("Generation failed")
         return jsonify({"message": f"Generate failed: {str(e)}"}), 500
\ No newline at end of file
@@ -37,6 +37,57 @@ class BaseConfig:
 
     CERTS_ALLOWED_EXTENSIONS = {"jpg", "jpeg", "png", "webp", "bmp"}
     CERTS_ENABLE_FULLTEXT = os.getenv("CERTS_ENABLE_FULLTEXT", "1") == "1"
+    # 证照检索 count=estimate 时最多统计的条数（超过返回 total_capped=true）
+    INDEX_SEARCH_COUNT_CAP = int(os.getenv("INDEX_SEARCH_COUNT_CAP", "1000"))
+    # 证照检索走 evidence_search 反范式表（FTS5 / ngram FULLTEXT）；关闭则用跨表 LIKE
+    INDEX_SEARCH_USE_TABLE = os.getenv("INDEX_SEARCH_USE_TABLE", "1") == "1"
+    # 证照分面计数缓存条数（0 = 关闭）；evidences 等写入提交后整体失效
+    INDEX_FACETS_CACHE_SIZE = int(os.getenv("INDEX_FACETS_CACHE_SIZE", "128"))
+    # 分面缓存条目存活秒数（0 = 不过期）；兜底其它进程的写入
+    INDEX_FACETS_CACHE_TTL_SECONDS = int(os.getenv("INDEX_FACETS_CACHE_TTL_SECONDS", "300"))
+    # 证照有效期状态：到期前多少天算 EXPIRING_SOON；进程内定时刷新间隔（秒，0 = 不刷新）
+    EVIDENCE_EXPIRING_SOON_DAYS = int(os.getenv("EVIDENCE_EXPIRING_SOON_DAYS", "30"))
+    EVIDENCE_STATUS_INTERVAL_SECONDS = int(os.getenv("EVIDENCE_STATUS_INTERVAL_SECONDS", "3600"))
+    # create_app 里是否启动进程内定时刷新；多 worker 部署可关掉，改用 cron 跑 `flask index-refresh-status`
+    EVIDENCE_STATUS_JOB_ENABLED = os.getenv("EVIDENCE_STATUS_JOB_ENABLED", "1") == "1"
+
+    # KB 入库批量写入：每批 executemany 行数 / 超大文档每多少行提交一次
+    KB_INGEST_BATCH_SIZE = int(os.getenv("KB_INGEST_BATCH_SIZE", "1000"))
+    KB_INGEST_COMMIT_ROWS = int(os.getenv("KB_INGEST_COMMIT_ROWS", "20000"))
+
+    # KB 切片策略：semantic（语义切分，需加载向量模型）/ structure（按标题编号结构切分，无模型）
+    KB_CHUNK_STRATEGY = os.getenv("KB_CHUNK_STRATEGY", "semantic")
+    KB_CHUNK_MIN_CHARS = int(os.getenv("KB_CHUNK_MIN_CHARS", "200"))
+    KB_CHUNK_MAX_CHARS = int(os.getenv("KB_CHUNK_MAX_CHARS", "1500"))
+
+    # KB 检索 count=capped 时最多统计的条数（超过则返回 total_capped=True）
+    KB_SEARCH_COUNT_CAP = int(os.getenv("KB_SEARCH_COUNT_CAP", "1000"))
+    # KB 检索结果摘要窗口长度（字符）
+    KB_SEARCH_SNIPPET_CHARS = int(os.getenv("KB_SEARCH_SNIPPET_CHARS", "160"))
+
+    # KB 检索结果缓存：进程内 LRU 条数（0 关闭）；可选磁盘共享层目录（多进程共用）
+    KB_SEARCH_CACHE_SIZE = int(os.getenv("KB_SEARCH_CACHE_SIZE", "256"))
+    KB_SEARCH_CACHE_DIR = os.getenv("KB_SEARCH_CACHE_DIR") or None
+    # 检索缓存条目存活秒数（0 = 不过期）；离线入库等其它进程写库只能靠它（或共用磁盘层）失效
+    KB_SEARCH_CACHE_TTL_SECONDS = int(os.getenv("KB_SEARCH_CACHE_TTL_SECONDS", "300"))
+    # 切片 docx 按需生成的磁盘缓存上限（MB，instance/kb_storage/block_cache，按 LRU 淘汰）
+    KB_BLOCK_DOCX_CACHE_MB = int(os.getenv("KB_BLOCK_DOCX_CACHE_MB", "512"))
+
+    # 标书生成：证据检索按多少个 query 一组批量查询 / 最多几组并发（1 = 串行）
+    REVIEW_INDEX_RETRIEVE_BATCH = int(os.getenv("REVIEW_INDEX_RETRIEVE_BATCH", "200"))
+    REVIEW_INDEX_RETRIEVE_CONCURRENCY = int(os.getenv("REVIEW_INDEX_RETRIEVE_CONCURRENCY", "4"))
+    # 标书生成 / 预览：解析后的招标需求缓存条数（按 result.json 路径 + mtime，0 关闭）
+    REVIEW_INDEX_REQUIREMENTS_CACHE_SIZE = int(os.getenv("REVIEW_INDEX_REQUIREMENTS_CACHE_SIZE", "32"))
+    # 需求表 xlsx / 评分模板 docx 的解析结果缓存条数（按路径 + mtime，0 关闭）
+    REVIEW_INDEX_PARSE_CACHE_SIZE = int(os.getenv("REVIEW_INDEX_PARSE_CACHE_SIZE", "16"))
+    # docx 渲染模板缓存条数（按路径 + mtime，解析一次、每次渲染复制副本；0 关闭）
+    DOCX_TEMPLATE_CACHE_SIZE = int(os.getenv("DOCX_TEMPLATE_CACHE_SIZE", "8"))
+    # 模板导出 Word：章节片段并发合并的进程数（默认 1 = 本进程串行，0 = CPU 核数）
+    WORD_EXPORT_WORKERS = int(os.getenv("WORD_EXPORT_WORKERS", "1"))
+    # 待合并章节数达到这个值才用子进程池（spawn，进程内复用一个池）
+    WORD_EXPORT_POOL_MIN_SECTIONS = int(os.getenv("WORD_EXPORT_POOL_MIN_SECTIONS", "4"))
+    # 章节片段缓存上限（MB，instance/kb_storage/exports/sections，按 LRU 淘汰，0 = 不限）
+    WORD_EXPORT_FRAGMENT_CACHE_MB = int(os.getenv("WORD_EXPORT_FRAGMENT_CACHE_MB", "512"))
 
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
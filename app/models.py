@@ -75,16 +75,58 @@ class KbBlock(db.Model):
     created_at = Column(DateTime, default=datetime.now)
 
 
+class KbBlockTerm(db.Model):
+    """
+    知识库切片的字符 bigram 倒排索引（入库时生成，检索时代替 LIKE 全表扫描）
+    """
+    __tablename__ = "kb_block_terms"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    term = Column(String(8), nullable=False)
+    block_id = Column(String(36), nullable=False)
+    file_id = Column(String(36), nullable=False)
+
+    __table_args__ = (
+        Index("idx_kb_block_terms_term_block", "term", "block_id"),
+        Index("idx_kb_block_terms_block", "block_id"),
+        Index("idx_kb_block_terms_file", "file_id"),
+    )
+
+
 class KbDocument(db.Model):
     """
-    (保留兼容)
+    知识库文档记录（每个入库文件一行，记录增量入库状态）
     """
     __tablename__ = "kb_documents"
     id = Column(String(36), primary_key=True)
     file_id = Column(String(36), nullable=False, index=True)
     title = Column(String(255), nullable=True)
+    # 最近一次入库时源文件的 sha256，用于增量入库时跳过未变化的文件
+    content_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=datetime.now)
 
+    # 文档汇总（入库 / 删除时维护，文档列表直接读取，不再对 kb_blocks 做 GROUP BY）
+    chunk_count = Column(Integer, nullable=False, default=0)
+    total_chars = Column(BigInteger, nullable=False, default=0)
+    last_ingest_at = Column(DateTime, nullable=True, index=True)
+
+
+class KbDocumentTag(db.Model):
+    """
+    知识库文档的标签集合（一个文件的切片可能带多个 tag），供文档列表按 tag 过滤
+    """
+    __tablename__ = "kb_document_tags"
+
+    file_id = Column(String(36), primary_key=True)
+    tag = Column(String(50), primary_key=True)
+    # 该文件带这个 tag 的切片汇总（按 tag 过滤文档列表时展示）
+    chunk_count = Column(Integer, nullable=False, default=0)
+    total_chars = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("idx_kb_document_tags_tag_file", "tag", "file_id"),
+    )
+
 
 # =========================================================
 # 3. 证书索引业务表 (保留原有业务模型)
@@ -160,7 +202,7 @@ class Evidence(db.Model):
     expires_at = Column(DateTime, nullable=True)
 
     status = Column(
-        Enum("VALID", "EXPIRED", "UNKNOWN", name="evidence_status_enum"),
+        Enum("VALID", "EXPIRED", "EXPIRING_SOON", "UNKNOWN", name="evidence_status_enum"),
         nullable=False,
         server_default="UNKNOWN",
     )
@@ -178,4 +220,23 @@ class Evidence(db.Model):
         Index("idx_cert_no", "cert_no"),
         Index("idx_expires_at", "expires_at"),
         Index("idx_issuer", "issuer"),
-    )
\ No newline at end of file
+        # 「某持有人某类证照中当前有效的」= 前缀等值 + status 范围，纯索引范围扫描
+        Index("idx_owner_doc_status", "scope", "owner_id", "document_type_id", "status", "expires_at"),
+    )
+
+
+class EvidenceSearch(db.Model):
+    """
+    证照检索用的反范式表：每条 evidence 一行，search_text = 证照类型名称/编码、证书编号、发证机关、标签、持有人名称
+    （已小写、换行分隔）。由 domain.index.search_table 在写入 evidences / 持有人 / 证照类型时同步。
+    全文索引：MySQL 用 ngram FULLTEXT；SQLite 另建 FTS5 虚表 evidence_search_fts（trigram）。
+    """
+    __tablename__ = "evidence_search"
+    evidence_id = Column(String(36), primary_key=True)
+    search_text = Column(Text, nullable=False, default="")
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        Index("ft_evidence_search_text", "search_text", mysql_prefix="FULLTEXT", mysql_with_parser="ngram")
+        .ddl_if(dialect="mysql"),
+    )
@@ -11,6 +11,9 @@ from sqlalchemy.exc import IntegrityError
 
 from app.extensions import db
 from app.models import Company, DocumentType, Evidence, Person, StoredFile
+# evidences 的写入在 flush 时同步到证照检索表 evidence_search
+from domain.index import search_table  # noqa: F401
+from domain.index.evidence_status import compute_status
 
 
 def _repo_root() -> Path:
@@ -230,7 +233,7 @@ def save_image(
         issuer=issuer,
         issued_at=issued_at,
         expires_at=expires_at,
-        status="UNKNOWN",
+        status=compute_status(expires_at),
         tags=tags,
     )
     db.session.add(ev)
@@ -1,5 +1,9 @@
+import json
 import uuid
-from typing import Dict, Optional
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from flask import current_app
 
 from app.extensions import db
 from app.models import File, Job
@@ -8,6 +12,9 @@ from app.services.prompt_registry import PromptRegistry
 
 ALLOWED_STATUS = {"PENDING", "RUNNING", "SUCCEEDED", "FAILED"}
 
+# 内置任务类型（不在 prompt 脚本注册表里）
+INTERNAL_SCRIPT_IDS = {"EXPORT_TEMPLATE_DOCX", "KB_INGEST", "REVIEW_INDEX_GENERATE"}
+
 
 def _clamp_progress(p: int) -> int:
     if p < 0:
@@ -17,7 +24,11 @@ def _clamp_progress(p: int) -> int:
     return int(p)
 
 
-def create_job(file_id: str, script_id: str, model_id: str) -> str:
+def create_job(file_id: str, script_id: str, model_id: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    params：model_id 放不下的任务参数，写到 artifacts/<job_id>/params.json（路径记在 artifact_json_path，
+    由 runner 读取，任务完成后 artifact_json_path 会换成结果文件）
+    """
     file_id = (file_id or "").strip()
     script_id = (script_id or "").strip()
     model_id = (model_id or "").strip()
@@ -34,7 +45,7 @@ def create_job(file_id: str, script_id: str, model_id: str) -> str:
     if f is None:
         raise ValueError("file_id not found")
 
-    if script_id != "EXPORT_TEMPLATE_DOCX":
+    if script_id not in INTERNAL_SCRIPT_IDS:
         # Ensure script exists in registry (by script_id only; version ignored in MVP)
         scripts = PromptRegistry.load_all()
         if not any(s.get("script_id") == script_id for s in scripts):
@@ -55,12 +66,25 @@ def create_job(file_id: str, script_id: str, model_id: str) -> str:
         artifact_docx_path=None,
         error_message=None,
     )
+    if params is not None:
+        job.artifact_json_path = _write_params(job_id, params)
     db.session.add(job)
     db.session.commit()
 
     return job_id
 
 
+def _write_params(job_id: str, params: Dict[str, Any]) -> str:
+    artifacts_dir = f"{current_app.config.get('ARTIFACT_STORAGE_DIR', 'storage/artifacts')}/{job_id}"
+    artifacts_dir = artifacts_dir.replace("\\", "/")
+    rel_path = f"{artifacts_dir}/params.json"
+    abs_path = Path(current_app.root_path).parent / Path(rel_path)
+    abs_path.parent.mkdir(parents=True, exist_ok=True)
+    with abs_path.open("w", encoding="utf-8") as fp:
+        json.dump(params, fp, ensure_ascii=False, indent=2)
+    return rel_path
+
+
 def get_job(job_id: str) -> Optional[Dict]:
     job_id = (job_id or "").strip()
     if not job_id:
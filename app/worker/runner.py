@@ -14,6 +14,8 @@ from app.worker.components.parser import Parser
 from app.worker.components.extractor import Extractor
 from domain.templates.registry import TemplateRegistry
 from domain.exports.word import export_by_template, WordExportError
+from domain.kb.ingest import KbIngestError, ingest_kb
+from domain.review_index.generator import generate_review_index_docx
 # 【关键新增】引入相似度计算引擎
 from domain.similarity.engine import SimilarityEngine
 
@@ -187,6 +189,75 @@ class InProcessRunner:
                 if f is None:
                     raise RuntimeError("file not found")
 
+                # =================================================================
+                # 知识库异步入库：model_id 借用存储 "tag|strategy"
+                # =================================================================
+                if job.script_id == "KB_INGEST":
+                    tag, _, strategy = (job.model_id or "").rpartition("|")
+                    if not tag:
+                        tag, strategy = strategy, None
+                    tag = tag.strip() or "general"
+
+                    def on_progress(stage: str, progress: int) -> None:
+                        advance(stage, progress, status="RUNNING")
+
+                    try:
+                        block_count = ingest_kb(job.file_id, tag=tag, progress=on_progress, strategy=strategy)
+                    except KbIngestError as exc:
+                        raise RuntimeError(str(exc)) from exc
+
+                    artifacts_dir = f"{current_app.config.get('ARTIFACT_STORAGE_DIR', 'storage/artifacts')}/{job_id}"
+                    artifacts_dir = artifacts_dir.replace("\\", "/")
+                    json_rel = f"{artifacts_dir}/kb_ingest.json"
+                    json_abs = self._abs_path_from_rel(json_rel)
+                    json_abs.parent.mkdir(parents=True, exist_ok=True)
+
+                    with json_abs.open("w", encoding="utf-8") as fp:
+                        json.dump({"file_id": job.file_id, "tag": tag, "strategy": strategy, "block_count": block_count}, fp, ensure_ascii=False, indent=2)
+
+                    self._set_job(
+                        job_id,
+                        status="SUCCEEDED",
+                        stage="DONE",
+                        progress=100,
+                        artifact_json_path=json_rel,
+                        error_message=None,
+                    )
+                    return
+
+                # =================================================================
+                # 投标文件生成：model_id 借用存储来源任务（解析出评审要求的 job），其余参数见 params.json
+                # =================================================================
+                if job.script_id == "REVIEW_INDEX_GENERATE":
+                    with self._abs_path_from_rel(job.artifact_json_path).open("r", encoding="utf-8") as fp:
+                        params = json.load(fp)
+
+                    def on_progress(stage: str, progress: int) -> None:
+                        advance(stage, progress, status="RUNNING")
+
+                    artifacts_dir = f"{current_app.config.get('ARTIFACT_STORAGE_DIR', 'storage/artifacts')}/{job_id}"
+                    artifacts_dir = artifacts_dir.replace("\\", "/")
+                    docx_rel = f"{artifacts_dir}/bidding_document.docx"
+
+                    generate_review_index_docx(
+                        job_id=job.model_id,
+                        kb_tag=params.get("kb_tag"),
+                        evidence_top_n=int(params.get("evidence_top_n") or 3),
+                        template_docx_path=params.get("template_docx_path"),
+                        output_path=str(self._abs_path_from_rel(docx_rel)),
+                        progress=on_progress,
+                    )
+
+                    self._set_job(
+                        job_id,
+                        status="SUCCEEDED",
+                        stage="DONE",
+                        progress=100,
+                        artifact_docx_path=docx_rel,
+                        error_message=None,
+                    )
+                    return
+
                 if job.script_id == "EXPORT_TEMPLATE_DOCX":
                     advance("EXPORT_DOCX", 40, status="RUNNING")
                     template_version = (job.model_id or "").strip()
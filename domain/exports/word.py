@@ -1,12 +1,35 @@
+import hashlib
 import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from flask import current_app
+from sqlalchemy import case, desc, func
 
-from domain.kb.retriever import search_blocks
+from app.extensions import db
+from app.models import File, KbBlock
+from domain.kb.block_docx_cache import BlockDocxCache, get_block_docx_cache
 from domain.templates.registry import TemplateRegistry
 
+logger = logging.getLogger(__name__)
+
+# 与 search_blocks 的默认 page_size 一致：未配置 top_k 时每个 tag 最多取这么多条
+DEFAULT_SECTION_PER_TAG = 20
+
+# 待合并的章节少于这个数时不值得起子进程，直接在本进程里合并
+DEFAULT_POOL_MIN_SECTIONS = 4
+
+# 章节片段缓存（instance/kb_storage/exports/sections）的默认上限（MB）
+DEFAULT_FRAGMENT_CACHE_MB = 512
+
 
 class WordExportError(ValueError):
     pass
@@ -46,6 +69,276 @@ def _append_text_fallback(doc, content_text: str) -> None:
             doc.add_paragraph(line)
 
 
+def pick_section_blocks(
+    tag_list: List[Optional[str]],
+    title_keywords: Optional[Iterable[str]],
+    top_k: Optional[int],
+) -> List[Dict[str, Any]]:
+    """
+    一个章节的全部 tag 合并成一条查询（不做 count）：
+    文件名命中 title_keywords 每个 +10 分，按 score、tag 在 by_tag 里的先后、入库时间、id 排序，
+    取 top_k 条；未配置 top_k 时每个 tag 最多 DEFAULT_SECTION_PER_TAG 条。
+    结果与逐个 tag 调 search_blocks 再按 score 合并一致。
+    """
+    terms = [kw.strip().lower() for kw in (title_keywords or []) if isinstance(kw, str) and kw.strip()]
+    score = sum(
+        case((func.lower(File.filename).like(f"%{term}%"), 10), else_=0) for term in terms
+    ) if terms else case((True, 0), else_=0)
+
+    tags = [t for t in tag_list if t]
+    q = db.session.query(
+        KbBlock.id.label("id"),
+        KbBlock.tag.label("tag"),
+        KbBlock.content_text.label("content_text"),
+        KbBlock.meta_json.label("meta_json"),
+        KbBlock.created_at.label("created_at"),
+        score.label("score"),
+    ).join(File, KbBlock.file_id == File.id)
+    order = [desc("score")]
+    if tags:
+        q = q.filter(KbBlock.tag.in_(tags))
+        if len(tags) > 1:
+            order.append(case({t: i for i, t in enumerate(tags)}, value=KbBlock.tag))
+    order += [desc(KbBlock.created_at), desc(KbBlock.id)]
+
+    top_k = top_k if isinstance(top_k, int) and top_k > 0 else None
+    if top_k or len(tags) <= 1:
+        rows = q.order_by(*order).limit(top_k or DEFAULT_SECTION_PER_TAG).all()
+    else:
+        # 每个 tag 各取前 DEFAULT_SECTION_PER_TAG 条（窗口函数），仍是一条 SQL
+        rn = func.row_number().over(
+            partition_by=KbBlock.tag,
+            order_by=[desc(score), desc(KbBlock.created_at), desc(KbBlock.id)],
+        )
+        ranked = q.add_columns(rn.label("rn")).subquery()
+        rows = (
+            db.session.query(ranked)
+            .filter(ranked.c.rn <= DEFAULT_SECTION_PER_TAG)
+            .order_by(
+                desc(ranked.c.score),
+                case({t: i for i, t in enumerate(tags)}, value=ranked.c.tag),
+                desc(ranked.c.created_at),
+                desc(ranked.c.id),
+            )
+            .all()
+        )
+
+    out: List[Dict[str, Any]] = []
+    for r in rows:
+        try:
+            meta = json.loads(r.meta_json) if r.meta_json else {}
+        except (TypeError, ValueError):
+            meta = {}
+        meta = meta if isinstance(meta, dict) else {}
+        out.append({
+            "block_id": r.id,
+            "score": int(r.score or 0),
+            "content_text": r.content_text,
+            "section_title": meta.get("section_title") or "",
+            "block_docx_path": meta.get("block_docx_path") or "",
+            "block_docx_lazy": meta.get("block_docx") == "lazy",
+        })
+    return out
+
+
+def _block_docx_path(
+    repo_root: Path,
+    block: Dict[str, Any],
+    block_cache: Optional[BlockDocxCache] = None,
+) -> Optional[Path]:
+    """
+    切片 docx：旧数据入库时已写好文件（meta.block_docx_path）；
+    新的离线入库切片（meta.block_docx = "lazy"）第一次用到时在缓存里生成；其余返回 None（走纯文本）
+    """
+    raw = (block.get("block_docx_path") or "").replace("\\", "/")
+    if raw:
+        path = Path(raw)
+        if not path.is_absolute():
+            path = repo_root / raw.lstrip("/")
+        path = path.resolve()
+        if path.exists():
+            return path
+    if block_cache is not None and block.get("block_docx_lazy"):
+        try:
+            return block_cache.get(block["block_id"], block.get("section_title") or "", block.get("content_text") or "")
+        except Exception as e:
+            logger.warning(f"failed to build block docx {block.get('block_id')}: {e}")
+    return None
+
+
+def _fragments_dir() -> Path:
+    return Path(current_app.instance_path) / "kb_storage" / "exports" / "sections"
+
+
+def get_section_fragment_cache() -> BlockDocxCache:
+    """
+    章节片段缓存：与切片 docx 缓存同样按 mtime LRU 淘汰，上限 WORD_EXPORT_FRAGMENT_CACHE_MB（0 = 不限）。
+    片段文件由 build_section_fragment 写入，每次导出后 trim()。
+    """
+    try:
+        max_mb = int(current_app.config.get("WORD_EXPORT_FRAGMENT_CACHE_MB", DEFAULT_FRAGMENT_CACHE_MB))
+    except (TypeError, ValueError):
+        max_mb = DEFAULT_FRAGMENT_CACHE_MB
+    return BlockDocxCache(str(_fragments_dir()), max(max_mb, 0) * 1024 * 1024)
+
+
+def section_fragment_key(blocks: List[Dict[str, Any]]) -> str:
+    # 按章节里的切片 id（保持排序后的先后）确定片段；切片 id 入库后不变，内容变化会换新 id
+    raw = "\n".join(b["block_id"] for b in blocks)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def build_section_fragment(
+    blocks: List[Dict[str, Any]],
+    repo_root: str,
+    fragment_path: str,
+    block_cache: Optional[BlockDocxCache] = None,
+) -> Dict[str, Any]:
+    """
+    合并一个章节的切片 docx，写到 fragment_path（已存在则直接复用）。
+    只做文件 IO，不访问数据库、不依赖 app context，可在子进程里执行（block_cache 随参数传入）。
+    返回 {"path", "block_cache": 本次的切片缓存用量}，子进程里的用量由主进程汇总。
+    """
+    from docx import Document
+    from docxcompose.composer import Composer
+
+    path = Path(fragment_path)
+    before = block_cache.usage() if block_cache is not None else None
+
+    def _result() -> Dict[str, Any]:
+        usage = block_cache.usage_since(before) if block_cache is not None else {}
+        return {"path": str(path), "block_cache": usage}
+
+    if path.exists():
+        return _result()
+
+    fragment = Document()
+    composer = Composer(fragment)
+    for block in blocks:
+        block_path = _block_docx_path(Path(repo_root), block, block_cache)
+        if block_path is not None and _merge_block_docx(composer, block_path):
+            continue
+        _append_text_fallback(fragment, block.get("content_text") or "")
+
+    # 先写临时文件再改名，并发导出不会读到写了一半的片段
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp")
+    composer.save(str(tmp))
+    os.replace(tmp, path)
+    return _result()
+
+
+def _export_config_int(name: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(name, default))
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+def _export_workers() -> int:
+    """WORD_EXPORT_WORKERS：默认 1（本进程串行）；0 = CPU 核数"""
+    workers = _export_config_int("WORD_EXPORT_WORKERS", 1)
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _pool_min_sections() -> int:
+    return max(_export_config_int("WORD_EXPORT_POOL_MIN_SECTIONS", DEFAULT_POOL_MIN_SECTIONS), 2)
+
+
+# 子进程池在进程内只建一次、之后复用（每次导出都新建会反复起进程）。
+# 用 spawn 而不是 fork：导出跑在 InProcessRunner 的线程里，多线程进程里 fork 会把别的线程持有的锁一起复制过去。
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor) -> None:
+    # 子进程意外退出后池子不可再用，丢掉，下次导出重建
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _pool_workers = 0
+    pool.shutdown(wait=False)
+
+
+def _run_in_pool(fn: Callable[..., Any], args_list: Sequence[Tuple[Any, ...]], workers: int) -> List[Any]:
+    """
+    子进程池里执行 fn(*args)，结果按 args_list 顺序返回（与完成先后无关）。
+    fn 和参数要能 pickle（spawn 子进程按模块路径导入 fn）；单个任务在子进程里失败时回到本进程重试一次。
+    """
+    if workers <= 1 or len(args_list) <= 1:
+        return [fn(*args) for args in args_list]
+
+    pool = _get_pool(workers)
+    try:
+        futures = [pool.submit(fn, *args) for args in args_list]
+    except (BrokenProcessPool, RuntimeError) as e:
+        logger.warning(f"section worker pool unavailable, running in process: {e}")
+        _discard_pool(pool)
+        return [fn(*args) for args in args_list]
+
+    results: List[Any] = [None] * len(args_list)
+    for i, future in enumerate(futures):
+        try:
+            results[i] = future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                _discard_pool(pool)
+            logger.warning(f"section worker failed, retrying in process: {e}")
+            results[i] = fn(*args_list[i])
+    return results
+
+
+def assemble_section_fragments(
+    sections_blocks: List[List[Dict[str, Any]]],
+    repo_root: Path,
+    workers: Optional[int] = None,
+) -> List[Path]:
+    """
+    每个章节合并成一个片段 docx（章节片段缓存，见 section_fragment_key）：
+    缓存里没有的片段合并一次（相同切片组合只合并一次），返回值与章节顺序一一对应。
+    待合并的章节不少于 WORD_EXPORT_POOL_MIN_SECTIONS 且 WORD_EXPORT_WORKERS > 1 时才放进子进程池并发合并。
+    """
+    fragment_cache = get_section_fragment_cache()
+    paths = [fragment_cache.path_for(section_fragment_key(blocks)) for blocks in sections_blocks]
+
+    pending: Dict[Path, List[Dict[str, Any]]] = {}
+    for path, blocks in zip(paths, sections_blocks):
+        if path in pending:
+            continue
+        try:
+            # 命中：刷新 mtime，LRU 淘汰时排在后面
+            os.utime(path)
+        except FileNotFoundError:
+            pending[path] = blocks
+
+    if pending:
+        block_cache = get_block_docx_cache()
+        # 每个任务带一份计数清零的缓存句柄（同一目录），用量随结果带回再汇总
+        args_list = [(blocks, str(repo_root), str(path), block_cache.detached()) for path, blocks in pending.items()]
+        if workers is None:
+            workers = _export_workers() if len(args_list) >= _pool_min_sections() else 1
+        results = _run_in_pool(build_section_fragment, args_list, workers)
+        for result in results:
+            block_cache.record(result.get("block_cache") or {})
+        logger.info(f"block docx cache usage: {block_cache.stats()}")
+        # 本次导出要用的片段不淘汰
+        fragment_cache.trim(keep=paths)
+    return paths
+
+
 def export_by_template(
     *,
     job_id: str,
@@ -82,10 +375,10 @@ def export_by_template(
 
     repo_root = _get_repo_root()
 
+    # 1. 逐章节取切片（每章节一条查询，都在主进程里完成）
+    picked: List[Tuple[str, List[Dict[str, Any]]]] = []
     for section in sections:
         title = (section.get("title") or "").strip() if isinstance(section, dict) else ""
-        if title:
-            output_doc.add_heading(title, level=1)
 
         pick = section.get("pick") if isinstance(section, dict) else {}
         pick = pick if isinstance(pick, dict) else {}
@@ -101,39 +394,30 @@ def export_by_template(
         if not tag_list:
             tag_list = [None]
 
-        merged: Dict[str, Dict[str, Any]] = {}
-        for tag in tag_list:
-            results = search_blocks(
-                query=None,
-                top_k=top_k,
-                by_tag=tag,
-                title_keywords=title_keywords if isinstance(title_keywords, list) else None,
-                page=1,
-                page_size=top_k or 20,
-            )
-            for item in results.get("items", []):
-                block_id = item.get("block_id")
-                if not block_id:
-                    continue
-                prev = merged.get(block_id)
-                if prev is None or int(item.get("score") or 0) > int(prev.get("score") or 0):
-                    merged[block_id] = item
-
-        sorted_items = sorted(
-            merged.values(), key=lambda x: int(x.get("score") or 0), reverse=True
+        sorted_items = pick_section_blocks(
+            tag_list,
+            title_keywords if isinstance(title_keywords, list) else None,
+            top_k,
         )
-        if isinstance(top_k, int) and top_k > 0:
-            sorted_items = sorted_items[:top_k]
 
         if not sorted_items:
             raise WordExportError(f"no blocks found for section: {title or 'untitled'}")
+        picked.append((title, sorted_items))
+
+    # 2. 各章节的片段并发合并，3. 再按模板顺序拼进输出文档
+    fragments: List[Optional[Path]] = [None] * len(picked)
+    if composer:
+        fragments = assemble_section_fragments([blocks for _, blocks in picked], repo_root)
+
+    for (title, sorted_items), fragment_path in zip(picked, fragments):
+        if title:
+            output_doc.add_heading(title, level=1)
+
+        if composer and fragment_path is not None:
+            if _merge_block_docx(composer, fragment_path):
+                continue
 
         for block in sorted_items:
-            rel_path = (block.get("content_docx_path") or "").replace("\\", "/").lstrip("/")
-            block_path = (repo_root / Path(rel_path)).resolve()
-            if composer and block_path.exists():
-                if _merge_block_docx(composer, block_path):
-                    continue
             _append_text_fallback(output_doc, block.get("content_text") or "")
 
     artifacts_dir = f"{current_app.config.get('ARTIFACT_STORAGE_DIR', 'storage/artifacts')}/{job_id}"
@@ -0,0 +1,190 @@
+# domain/index/evidence_status.py
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, event, inspect as sa_inspect, or_, update
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Evidence
+
+logger = logging.getLogger(__name__)
+
+# 证照有效期状态（evidences.status）按 expires_at 物化：
+#   EXPIRED       expires_at 早于今天
+#   EXPIRING_SOON 今天 ~ 今天 + EVIDENCE_EXPIRING_SOON_DAYS 天内到期
+#   VALID         更晚到期，或没有到期时间（长期有效）
+#   UNKNOWN       尚未计算（升级前的历史数据，首轮刷新后消失）
+# 经 ORM 写入时（flush 前）按 expires_at 当场计算；日期推移造成的变化由定时任务批量刷新。
+# 只经 ORM 写入时，状态只会比实际「更晚过期」（service 里 valid_on 检索靠这一点用 status 收窄）；
+# 绕过 ORM 改 expires_at（Core update()、原生 SQL、外部脚本）不会重算 status，
+# 在下一次 refresh_statuses() 之前状态可能偏向任一方向，这类写入之后要跑一次 `flask index-refresh-status`。
+
+STATUSES = ("VALID", "EXPIRED", "EXPIRING_SOON", "UNKNOWN")
+NOT_EXPIRED = ("VALID", "EXPIRING_SOON", "UNKNOWN")
+
+DEFAULT_EXPIRING_SOON_DAYS = 30
+DEFAULT_INTERVAL_SECONDS = 3600
+
+_EXT_KEY = "evidence_status_job"
+
+
+def _config_int(name: str, default: int) -> int:
+    try:
+        from flask import current_app
+
+        return max(int(current_app.config.get(name, default)), 0)
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+def expiring_soon_days() -> int:
+    return _config_int("EVIDENCE_EXPIRING_SOON_DAYS", DEFAULT_EXPIRING_SOON_DAYS)
+
+
+def day_start(d: date) -> datetime:
+    return datetime.combine(d, time.min)
+
+
+def _bounds(today: date, soon_days: int):
+    # [今天 0 点, 今天 + soon_days 天的次日 0 点)
+    start = day_start(today)
+    return start, start + timedelta(days=soon_days + 1)
+
+
+def compute_status(expires_at: Optional[datetime], today: Optional[date] = None, soon_days: Optional[int] = None) -> str:
+    if expires_at is None:
+        return "VALID"
+    start, soon_end = _bounds(today or date.today(), expiring_soon_days() if soon_days is None else soon_days)
+    if expires_at < start:
+        return "EXPIRED"
+    if expires_at < soon_end:
+        return "EXPIRING_SOON"
+    return "VALID"
+
+
+def status_expr(today: Optional[date] = None, soon_days: Optional[int] = None):
+    """与 compute_status 同一套边界的 SQL 表达式：按当天现算，不受 status 列刷新滞后的影响"""
+    start, soon_end = _bounds(today or date.today(), expiring_soon_days() if soon_days is None else soon_days)
+    return case(
+        (Evidence.expires_at.is_(None), "VALID"),
+        (Evidence.expires_at < start, "EXPIRED"),
+        (Evidence.expires_at < soon_end, "EXPIRING_SOON"),
+        else_="VALID",
+    )
+
+
+def refresh_statuses(today: Optional[date] = None) -> Dict[str, int]:
+    """
+    按今天重算全部证照的状态：三条集合 UPDATE，只改状态变化的行（expires_at 走 idx_expires_at）。
+    返回每种状态本次改写的行数。
+    """
+    start, soon_end = _bounds(today or date.today(), expiring_soon_days())
+    targets = {
+        "EXPIRED": Evidence.expires_at < start,
+        "EXPIRING_SOON": and_(Evidence.expires_at >= start, Evidence.expires_at < soon_end),
+        "VALID": or_(Evidence.expires_at.is_(None), Evidence.expires_at >= soon_end),
+    }
+    changed: Dict[str, int] = {}
+    for status, cond in targets.items():
+        # 不带 updated_at：状态随日期变化不算证照被修改
+        result = db.session.execute(
+            update(Evidence)
+            .where(cond, Evidence.status != status)
+            .values(status=status, updated_at=Evidence.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        changed[status] = int(result.rowcount or 0)
+    db.session.commit()
+    return changed
+
+
+@event.listens_for(Session, "before_flush")
+def _status_before_flush(session, flush_context, instances) -> None:
+    for obj in session.new:
+        if isinstance(obj, Evidence):
+            obj.status = compute_status(obj.expires_at)
+    for obj in session.dirty:
+        if isinstance(obj, Evidence) and sa_inspect(obj).attrs.expires_at.history.has_changes():
+            obj.status = compute_status(obj.expires_at)
+
+
+class EvidenceStatusJob:
+    """进程内定时任务：每 interval 秒调用一次 refresh_statuses()"""
+
+    def __init__(self, app, interval: int):
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_run: Optional[datetime] = None
+        self.last_changed: Dict[str, int] = {}
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="evidence-status", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_once(self) -> Dict[str, int]:
+        with self.app.app_context():
+            try:
+                self.last_changed = refresh_statuses()
+                self.last_run = datetime.now()
+                if any(self.last_changed.values()):
+                    logger.info(f"evidence status refreshed: {self.last_changed}")
+                return self.last_changed
+            finally:
+                db.session.remove()
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.warning(f"evidence status refresh failed: {e}")
+            self._stop.wait(self.interval)
+
+
+def _is_cli_command() -> bool:
+    # flask 子命令（db upgrade、index-refresh-status 等）执行完就退出，不需要定时任务；`flask run` 除外
+    try:
+        import click
+    except ImportError:
+        return False
+    ctx = click.get_current_context(silent=True)
+    return ctx is not None and ctx.info_name != "run"
+
+
+def start_status_job(app) -> Optional[EvidenceStatusJob]:
+    """
+    create_app 里调用：按 EVIDENCE_STATUS_INTERVAL_SECONDS 启动定时刷新。
+    不启动的情况：测试环境、EVIDENCE_STATUS_JOB_ENABLED 关闭、间隔为 0、flask 的其它子命令，
+    以及 debug reloader 的父进程（只监控文件，真正处理请求的是 WERKZEUG_RUN_MAIN=true 的子进程）。
+    """
+    if app.config.get("TESTING") or not app.config.get("EVIDENCE_STATUS_JOB_ENABLED", True):
+        return None
+    if app.debug and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        return None
+    if _is_cli_command():
+        return None
+    try:
+        interval = int(app.config.get("EVIDENCE_STATUS_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS))
+    except (TypeError, ValueError):
+        interval = DEFAULT_INTERVAL_SECONDS
+    if interval <= 0:
+        return None
+    job = app.extensions.get(_EXT_KEY)
+    if job is None:
+        job = app.extensions.setdefault(_EXT_KEY, EvidenceStatusJob(app, interval))
+    job.start()
+    return job
@@ -0,0 +1,75 @@
+# domain/index/facet_cache.py
+from __future__ import annotations
+
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models import Company, DocumentType, Evidence, Person
+from domain.kb.search_cache import SearchCache
+
+# 证照检索分面计数的缓存（进程内 LRU，复用 KB 检索缓存的 SearchCache）：
+#   flush 时发现 evidences / 证照类型 / 持有人有增删改就标记 session，事务提交成功后换代次，
+#   旧代次的条目不再命中。有效期分面依赖「今天」，日期也放进 key，跨天自然失效。
+#   换代次只在提交的进程里发生，其它进程（导入脚本、别的 worker）写库靠条目存活时间
+#   INDEX_FACETS_CACHE_TTL_SECONDS 兜底。
+
+DEFAULT_CACHE_SIZE = 128
+DEFAULT_TTL_SECONDS = 300
+
+_SESSION_FLAG = "index_facets_dirty"
+_EXT_KEY = "index_facets_cache"
+_WATCHED = (Evidence, DocumentType, Person, Company)
+
+
+def get_cache() -> Optional[SearchCache]:
+    """当前 app 的分面缓存；INDEX_FACETS_CACHE_SIZE=0 时返回 None（关闭缓存）"""
+    try:
+        from flask import current_app
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return None
+
+    cache = app.extensions.get(_EXT_KEY)
+    if cache is None:
+        size = int(app.config.get("INDEX_FACETS_CACHE_SIZE", DEFAULT_CACHE_SIZE) or 0)
+        if not size:
+            return None
+        ttl = app.config.get("INDEX_FACETS_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+        cache = app.extensions.setdefault(_EXT_KEY, SearchCache(maxsize=size, ttl=ttl))
+    return cache
+
+
+def cached(key: Tuple, compute: Callable[[], Any]) -> Any:
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    generation = cache.generation()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value, generation=generation)
+    return value
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_after_flush(session, flush_context) -> None:
+    for objs in (session.new, session.dirty, session.deleted):
+        if any(isinstance(obj, _WATCHED) for obj in objs):
+            session.info[_SESSION_FLAG] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session) -> None:
+    if not session.info.pop(_SESSION_FLAG, False):
+        return
+    cache = get_cache()
+    if cache is not None:
+        cache.bump_generation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
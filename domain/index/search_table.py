@@ -0,0 +1,212 @@
+# domain/index/search_table.py
+from __future__ import annotations
+
+import logging
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import and_, delete, event, insert, inspect as sa_inspect, literal_column, or_, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Company, DocumentType, Evidence, EvidenceSearch, Person
+
+logger = logging.getLogger(__name__)
+
+# 证照检索的反范式表 evidence_search：
+#   - 每条 evidence 一行，search_text 把证照类型名称/编码、证书编号、发证机关、标签、持有人名称
+#     小写后用换行拼在一起，检索时只需对这一列做一次 LIKE，不再跨 4 张表 OR 五个 LIKE
+#   - 同步：flush 时发现 evidences 新增/删除/检索字段变化，或持有人改名、证照类型改名/改编码，
+#     就在同一事务里重写受影响的行（cert_storage.save_image 与后续修改都走这里）；
+#     绕过 ORM 的批量写入用 `flask index-rebuild-search` 全量重建
+#   - 全文索引只用来缩小候选集，最终仍以 search_text LIKE 校验，结果与单纯 LIKE 一致：
+#       SQLite：FTS5 外部内容表 evidence_search_fts（trigram 分词，检索词 >= 3 个字符时可用）
+#       MySQL ：search_text 上的 ngram FULLTEXT（检索词含中文且 >= 2 个字符时可用）
+
+FTS_TABLE = "evidence_search_fts"
+
+_EVIDENCE_FIELDS = ("scope", "owner_id", "document_type_id", "cert_no", "issuer", "tags")
+_OWNER_FIELDS = ("name",)
+_DOC_TYPE_FIELDS = ("name", "code")
+
+_BATCH = 500
+
+# 外部内容 FTS5 表 + 触发器，evidence_search 的增删改自动反映到全文索引
+_SQLITE_FTS_DDL = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"search_text, content='evidence_search', content_rowid='rowid', tokenize='trigram')",
+    f"CREATE TRIGGER IF NOT EXISTS evidence_search_ai AFTER INSERT ON evidence_search BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.rowid, new.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS evidence_search_ad AFTER DELETE ON evidence_search BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); END",
+    f"CREATE TRIGGER IF NOT EXISTS evidence_search_au AFTER UPDATE ON evidence_search BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) VALUES ('delete', old.rowid, old.search_text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.rowid, new.search_text); END",
+    # 建表前已有数据时（迁移回填后）补齐索引
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+
+def create_sqlite_fts(conn) -> bool:
+    """建 FTS5 表与触发器；SQLite 未编译 FTS5 / trigram（< 3.34）时只记日志，检索退回 LIKE"""
+    try:
+        for stmt in _SQLITE_FTS_DDL:
+            conn.exec_driver_sql(stmt)
+        return True
+    except DBAPIError as e:
+        logger.warning(f"evidence_search: FTS5 unavailable, falling back to LIKE: {e}")
+        return False
+
+
+@event.listens_for(EvidenceSearch.__table__, "after_create")
+def _after_create(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        create_sqlite_fts(connection)
+
+
+@event.listens_for(EvidenceSearch.__table__, "before_drop")
+def _before_drop(target, connection, **kw) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def build_search_text(*parts: Optional[str]) -> str:
+    return "\n".join(p.strip().lower() for p in parts if p and p.strip())
+
+
+def _source_rows(conn, evidence_ids: List[str]):
+    return conn.execute(
+        select(
+            Evidence.id,
+            DocumentType.name,
+            DocumentType.code,
+            Evidence.cert_no,
+            Evidence.issuer,
+            Evidence.tags,
+            Person.name,
+            Company.name,
+        )
+        .select_from(Evidence)
+        .outerjoin(DocumentType, Evidence.document_type_id == DocumentType.id)
+        .outerjoin(Person, and_(Evidence.scope == "PERSON", Evidence.owner_id == Person.id))
+        .outerjoin(Company, and_(Evidence.scope == "COMPANY", Evidence.owner_id == Company.id))
+        .where(Evidence.id.in_(evidence_ids))
+    ).all()
+
+
+def sync_evidences(evidence_ids: Iterable[str], conn=None) -> int:
+    """
+    重写指定 evidence 的检索行（不提交事务）；evidence 已不存在的只删除。
+    conn 为空时使用 db.session。返回写入的行数。
+    """
+    conn = conn if conn is not None else db.session
+    ids = sorted(set(evidence_ids))
+    written = 0
+    for i in range(0, len(ids), _BATCH):
+        batch = ids[i:i + _BATCH]
+        conn.execute(delete(EvidenceSearch).where(EvidenceSearch.evidence_id.in_(batch)))
+        rows = [
+            {"evidence_id": r[0], "search_text": build_search_text(*r[1:])}
+            for r in _source_rows(conn, batch)
+        ]
+        if rows:
+            conn.execute(insert(EvidenceSearch), rows)
+            written += len(rows)
+    return written
+
+
+def rebuild_search_table() -> int:
+    """全量重建检索表，用于上线前回填历史证照"""
+    db.session.execute(delete(EvidenceSearch))
+    ids = [r[0] for r in db.session.query(Evidence.id).all()]
+    written = sync_evidences(ids)
+    db.session.commit()
+    return written
+
+
+def _changed(obj, fields: Tuple[str, ...]) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_after_flush(session, flush_context) -> None:
+    # after_flush 时 new / dirty / deleted 与属性历史仍是 flush 前的状态
+    evidence_ids: Set[str] = set()
+    removed: Set[str] = set()
+    owners: Set[Tuple[str, str]] = set()
+    doc_type_ids: Set[int] = set()
+
+    for obj in session.new:
+        if isinstance(obj, Evidence):
+            evidence_ids.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Evidence) and _changed(obj, _EVIDENCE_FIELDS):
+            evidence_ids.add(obj.id)
+        elif isinstance(obj, Person) and _changed(obj, _OWNER_FIELDS):
+            owners.add(("PERSON", obj.id))
+        elif isinstance(obj, Company) and _changed(obj, _OWNER_FIELDS):
+            owners.add(("COMPANY", obj.id))
+        elif isinstance(obj, DocumentType) and _changed(obj, _DOC_TYPE_FIELDS):
+            doc_type_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Evidence):
+            removed.add(obj.id)
+        elif isinstance(obj, Person):
+            owners.add(("PERSON", obj.id))
+        elif isinstance(obj, Company):
+            owners.add(("COMPANY", obj.id))
+
+    if not (evidence_ids or removed or owners or doc_type_ids):
+        return
+
+    conn = session.connection()
+    if owners or doc_type_ids:
+        conds = [and_(Evidence.scope == scope, Evidence.owner_id == owner_id) for scope, owner_id in owners]
+        if doc_type_ids:
+            conds.append(Evidence.document_type_id.in_(doc_type_ids))
+        evidence_ids.update(r[0] for r in conn.execute(select(Evidence.id).where(or_(*conds))))
+
+    evidence_ids -= removed
+    if removed:
+        conn.execute(delete(EvidenceSearch).where(EvidenceSearch.evidence_id.in_(sorted(removed))))
+    if evidence_ids:
+        sync_evidences(evidence_ids, conn)
+
+
+def _has_cjk(s: str) -> bool:
+    return any("\u4e00" <= ch <= "\u9fff" for ch in s)
+
+
+def _sqlite_fts_ready() -> bool:
+    row = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": FTS_TABLE}
+    ).first()
+    return row is not None
+
+
+def match_condition(q: str, use_fulltext: bool = True):
+    """
+    检索词 -> evidence_search 上的过滤条件（调用方需 join evidence_search）。
+    全文索引可用时先用它圈定候选，再用 LIKE 精确校验；否则只用 LIKE。
+    """
+    q_lower = (q or "").strip().lower()
+    cond = EvidenceSearch.search_text.contains(q_lower, autoescape=True)
+    if not use_fulltext:
+        return cond
+
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite" and len(q_lower) >= 3 and _sqlite_fts_ready():
+        phrase = '"' + q_lower.replace('"', '""') + '"'
+        candidates = (
+            text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_q")
+            .bindparams(fts_q=phrase)
+            .columns(literal_column("rowid"))
+        )
+        return and_(literal_column("evidence_search.rowid").in_(candidates), cond)
+    if dialect == "mysql" and len(q_lower) >= 2 and _has_cjk(q_lower) and '"' not in q_lower:
+        ft = text("MATCH(evidence_search.search_text) AGAINST (:ft_q IN BOOLEAN MODE)").bindparams(
+            ft_q='"' + q_lower + '"'
+        )
+        return and_(ft, cond)
+    return cond
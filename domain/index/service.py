@@ -1,18 +1,25 @@
+import base64
+import json
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 from flask import current_app
 from sqlalchemy import and_, asc, case, desc, func, literal_column, or_
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.extensions import db
-from app.models import Company, DocumentType, Evidence, Person, StoredFile
+from app.models import Company, DocumentType, Evidence, EvidenceSearch, Person, StoredFile
+from domain.index import evidence_status, facet_cache, search_table
 
 
 ALLOWED_SCOPES = {None, "PERSON", "COMPANY"}
 ALLOWED_SORTS = {"created_at_desc", "expires_at_asc", "relevance_desc"}
 
+# total 的统计方式：exact = 精确 count；estimate = 最多数到 INDEX_SEARCH_COUNT_CAP（超过时 total_capped=True）；none = 不统计
+COUNT_MODES = ("exact", "estimate", "none")
+DEFAULT_COUNT_CAP = 1000
+
 
 @dataclass
 class IndexSearchParams:
@@ -24,6 +31,8 @@ class IndexSearchParams:
     page: str
     page_size: str
     sort: str
+    cursor: Optional[str] = None  # 上一页返回的 next_cursor；传了就按 keyset 翻页，忽略 page
+    count: str = "exact"
 
 
 def _parse_int(raw: str, default: int, min_v: int, max_v: int) -> int:
@@ -47,12 +56,30 @@ def _parse_date_ymd(raw: Optional[str]) -> Optional[datetime]:
         raise ValueError("valid_on must be YYYY-MM-DD")
 
 
+def _fulltext_enabled() -> bool:
+    return bool(current_app.config.get("CERTS_ENABLE_FULLTEXT", True))
+
+
 def _use_fulltext() -> bool:
     try:
         dialect = db.engine.dialect.name
     except Exception:
         dialect = ""
-    return bool(current_app.config.get("CERTS_ENABLE_FULLTEXT", True)) and dialect == "mysql"
+    return _fulltext_enabled() and dialect == "mysql"
+
+
+# 关键词匹配方式：
+#   table    = evidence_search 反范式表（FTS5 / ngram FULLTEXT 圈候选 + 单列 LIKE 校验）
+#   fulltext = 旧的 MySQL FULLTEXT（evidences / document_types 上的 MATCH）
+#   like     = 跨表五个 LIKE
+def _search_modes() -> List[str]:
+    modes = []
+    if current_app.config.get("INDEX_SEARCH_USE_TABLE", True):
+        modes.append("table")
+    if _use_fulltext():
+        modes.append("fulltext")
+    modes.append("like")
+    return modes
 
 
 def _like_contains(col, q_lower: str):
@@ -80,54 +107,126 @@ def _build_fulltext_relevance(q: str, q_lower: str):
     return (dt_ft * 10 + ev_ft * 3 + dt_code_like + dt_name_like).label("relevance")
 
 
-def _apply_sort(query, sort: str, relevance_col):
-    if sort == "created_at_desc":
-        return query.order_by(desc(Evidence.created_at))
-    if sort == "expires_at_asc":
-        nulls_last = case((Evidence.expires_at.is_(None), 1), else_=0)
-        return query.order_by(asc(nulls_last), asc(Evidence.expires_at), desc(Evidence.created_at))
-    return query.order_by(desc(relevance_col), desc(Evidence.created_at))
+def _count_cap() -> int:
+    try:
+        return max(int(current_app.config.get("INDEX_SEARCH_COUNT_CAP", DEFAULT_COUNT_CAP)), 1)
+    except (RuntimeError, TypeError, ValueError):
+        return DEFAULT_COUNT_CAP
 
 
-def _build_query(params: IndexSearchParams, use_ft: bool):
-    scope = params.scope
-    sort = params.sort or "relevance_desc"
+# keyset 游标：[sort, 排序键...]，排序键与 _apply_sort 的 ORDER BY 一一对应（末尾补 id 保证唯一）
+#   created_at_desc: created_at, id
+#   expires_at_asc:  expires_at, created_at, id
+#   relevance_desc:  relevance, created_at, id
+def _encode_cursor(sort: str, keys: List[Any]) -> str:
+    payload = [sort] + [k.isoformat() if isinstance(k, datetime) else k for k in keys]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-    page = _parse_int(params.page, default=1, min_v=1, max_v=10**9)
-    page_size = _parse_int(params.page_size, default=20, min_v=1, max_v=100)
 
-    valid_on_dt = _parse_date_ymd(params.valid_on)
+# 各排序的游标键个数，以及其中哪些位置是 datetime（JSON 里存 ISO 字符串）
+_CURSOR_SHAPES = {
+    "created_at_desc": (2, (0,)),
+    "expires_at_asc": (3, (0, 1)),
+    "relevance_desc": (3, (1,)),
+}
 
-    q = (params.q or "").strip()
-    q_lower = q.lower()
 
-    query = (
-        db.session.query(
-            Evidence,
-            DocumentType,
-            StoredFile,
-            Person.name.label("person_name"),
-            Company.name.label("company_name"),
-        )
-        .join(DocumentType, Evidence.document_type_id == DocumentType.id)
-        .join(StoredFile, Evidence.file_id == StoredFile.id)
-        .outerjoin(Person, and_(Evidence.scope == "PERSON", Evidence.owner_id == Person.id))
-        .outerjoin(Company, and_(Evidence.scope == "COMPANY", Evidence.owner_id == Company.id))
-    )
+def _decode_cursor(cursor: str, sort: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw.decode("utf-8"))
+        size, date_pos = _CURSOR_SHAPES[sort]
+        if not isinstance(payload, list) or payload[0] != sort or len(payload) != size + 1:
+            raise ValueError("cursor does not match sort")
+        keys = payload[1:]
+        for i in date_pos:
+            keys[i] = datetime.fromisoformat(keys[i]) if keys[i] else None
+        if not isinstance(keys[-1], str):
+            raise ValueError("cursor id must be a string")
+        return keys
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+
+def _after_desc(col, value):
+    # 倒序（NULL 在 SQLite / MySQL 里视为最小，排在最后）：严格排在 value 之后
+    if value is None:
+        return None
+    return or_(col < value, col.is_(None))
+
+
+def _equal(col, value):
+    return col.is_(None) if value is None else col == value
+
+
+def _keyset_filter(sort: str, relevance_expr, keys: List[Any]):
+    """
+    严格排在游标之后的行：按排序键逐级展开成
+      k1 之后 OR (k1 相等 AND k2 之后) OR ...
+    """
+    if sort == "created_at_desc":
+        created, ev_id = keys
+        levels = [(Evidence.created_at, "desc", created), (Evidence.id, "desc", ev_id)]
+    elif sort == "expires_at_asc":
+        expires, created, ev_id = keys
+        levels = [(Evidence.expires_at, "asc_nulls_last", expires),
+                  (Evidence.created_at, "desc", created), (Evidence.id, "desc", ev_id)]
+    else:
+        relevance, created, ev_id = keys
+        levels = [(relevance_expr, "desc", relevance),
+                  (Evidence.created_at, "desc", created), (Evidence.id, "desc", ev_id)]
+
+    clauses = []
+    equal_so_far: List[Any] = []
+    for col, direction, value in levels:
+        if direction == "asc_nulls_last":
+            after = (col.is_(None) | (col > value)) if value is not None else None
+        else:
+            after = _after_desc(col, value)
+        if after is not None:
+            clauses.append(and_(*equal_so_far, after) if equal_so_far else after)
+        equal_so_far.append(_equal(col, value))
+    return or_(*clauses)
+
+
+def _row_keys(sort: str, ev, relevance) -> List[Any]:
+    if sort == "created_at_desc":
+        return [ev.created_at, ev.id]
+    if sort == "expires_at_asc":
+        return [ev.expires_at, ev.created_at, ev.id]
+    return [relevance, ev.created_at, ev.id]
 
+
+def _apply_sort(query, sort: str, relevance_col):
+    # 末尾都补 id 倒序：排序键唯一，OFFSET 与 keyset 翻页的结果一致
+    if sort == "created_at_desc":
+        return query.order_by(desc(Evidence.created_at), desc(Evidence.id))
+    if sort == "expires_at_asc":
+        nulls_last = case((Evidence.expires_at.is_(None), 1), else_=0)
+        return query.order_by(asc(nulls_last), asc(Evidence.expires_at), desc(Evidence.created_at), desc(Evidence.id))
+    return query.order_by(desc(relevance_col), desc(Evidence.created_at), desc(Evidence.id))
+
+
+def _filter_query(query, params: IndexSearchParams, valid_on_dt, q: str, q_lower: str, mode: str):
     # structured filters
-    if scope:
-        query = query.filter(Evidence.scope == scope)
+    if params.scope:
+        query = query.filter(Evidence.scope == params.scope)
     if params.owner_id:
         query = query.filter(Evidence.owner_id == params.owner_id)
     if params.doc_type_code:
         query = query.filter(DocumentType.code == params.doc_type_code)
     if valid_on_dt is not None:
+        if valid_on_dt >= evidence_status.day_start(date.today()):
+            # 今天及以后仍有效的一定不是 EXPIRED（经 ORM 写入时状态只会滞后于实际），先用 status 走索引收窄。
+            # 绕过 ORM 改了 expires_at 的行在下次 refresh_statuses() 前可能被误排除，见 evidence_status 模块说明
+            query = query.filter(Evidence.status.in_(evidence_status.NOT_EXPIRED))
         query = query.filter(or_(Evidence.expires_at.is_(None), Evidence.expires_at >= valid_on_dt))
 
-    relevance_col = literal_column("0").label("relevance")
-
-    if q:
+    if q and mode == "table":
+        query = query.join(EvidenceSearch, EvidenceSearch.evidence_id == Evidence.id)
+        query = query.filter(search_table.match_condition(q, _fulltext_enabled()))
+    elif q:
         doc_like = or_(
             _like_contains(DocumentType.name, q_lower),
             _like_contains(DocumentType.code, q_lower),
@@ -138,76 +237,301 @@ def _build_query(params: IndexSearchParams, use_ft: bool):
             _like_contains(Evidence.tags, q_lower),
         )
 
-        if use_ft:
+        if mode == "fulltext":
             dt_ft = literal_column("MATCH(document_types.name) AGAINST (:q IN NATURAL LANGUAGE MODE)")
             ev_ft = literal_column("MATCH(evidences.tags,evidences.cert_no,evidences.issuer) AGAINST (:q IN NATURAL LANGUAGE MODE)")
-            query = query.filter(or_(dt_ft > 0, ev_ft > 0, doc_like, ev_like))
-            relevance_col = _build_fulltext_relevance(q=q, q_lower=q_lower)
-            query = query.add_columns(relevance_col).params(q=q)
+            query = query.filter(or_(dt_ft > 0, ev_ft > 0, doc_like, ev_like)).params(q=q)
         else:
             query = query.filter(or_(doc_like, ev_like))
+    return query
+
+
+def _item(ev, dt, sf, person_name, company_name) -> Dict[str, Any]:
+    owner_name = person_name if ev.scope == "PERSON" else company_name
+    return {
+        "evidence_id": ev.id,
+        "scope": ev.scope,
+        "owner_id": ev.owner_id,
+        "owner_name": owner_name,
+        "doc_type_code": dt.code,
+        "doc_type_name": dt.name,
+        "cert_no": ev.cert_no,
+        "issuer": ev.issuer,
+        "issued_at": ev.issued_at.isoformat() if ev.issued_at else None,
+        "expires_at": ev.expires_at.isoformat() if ev.expires_at else None,
+        "status": ev.status,
+        "file": {
+            "file_id": sf.id,
+            "original_name": sf.original_name,
+            "mime_type": sf.mime_type,
+            "size_bytes": int(sf.size_bytes),
+            # "storage_rel_path": sf.storage_rel_path,  <-- 已移除该字段
+        },
+    }
+
+
+def _base_query():
+    return (
+        db.session.query(
+            Evidence,
+            DocumentType,
+            StoredFile,
+            Person.name.label("person_name"),
+            Company.name.label("company_name"),
+        )
+        .join(DocumentType, Evidence.document_type_id == DocumentType.id)
+        .join(StoredFile, Evidence.file_id == StoredFile.id)
+        .outerjoin(Person, and_(Evidence.scope == "PERSON", Evidence.owner_id == Person.id))
+        .outerjoin(Company, and_(Evidence.scope == "COMPANY", Evidence.owner_id == Company.id))
+    )
+
+
+def _build_query(params: IndexSearchParams, mode: str):
+    sort = params.sort or "relevance_desc"
+
+    page = _parse_int(params.page, default=1, min_v=1, max_v=10**9)
+    page_size = _parse_int(params.page_size, default=20, min_v=1, max_v=100)
+
+    valid_on_dt = _parse_date_ymd(params.valid_on)
+
+    q = (params.q or "").strip()
+    q_lower = q.lower()
+
+    query = _filter_query(_base_query(), params, valid_on_dt, q, q_lower, mode)
+
+    # 计数只需要过滤条件：不连 persons / companies（outer join 不改变行数），
+    # document_types 只在按类型或关键词（非 table 模式）过滤时才连；document_type_id / file_id 都是非空外键，内连接不减少行数
+    count_query = db.session.query(Evidence.id).select_from(Evidence)
+    if (q and mode != "table") or params.doc_type_code:
+        count_query = count_query.join(DocumentType, Evidence.document_type_id == DocumentType.id)
+    count_query = _filter_query(count_query, params, valid_on_dt, q, q_lower, mode)
+
+    relevance_col = literal_column("0").label("relevance")
+
+    if q:
+        if mode == "fulltext":
+            relevance_col = _build_fulltext_relevance(q=q, q_lower=q_lower)
+        else:
             relevance_col = _build_like_relevance(q_lower=q_lower)
-            query = query.add_columns(relevance_col)
     else:
         sort = "created_at_desc"
-        query = query.add_columns(relevance_col)
+    query = query.add_columns(relevance_col)
 
-    return query, relevance_col, sort, page, page_size
+    return query, count_query, relevance_col, sort, page, page_size
+
+
+def _count(count_query, mode: str) -> Dict[str, Any]:
+    if mode == "none":
+        return {"total": None}
+    if mode == "estimate":
+        cap = _count_cap()
+        n = db.session.query(func.count()).select_from(count_query.limit(cap + 1).subquery()).scalar() or 0
+        return {"total": min(int(n), cap), "total_capped": n > cap}
+    return {"total": int(count_query.with_entities(func.count(Evidence.id)).scalar() or 0)}
 
 
 def search_index(params: IndexSearchParams) -> Dict[str, Any]:
+    """
+    证照检索。两种翻页方式：
+      - page / page_size：OFFSET 翻页，翻得越深越慢
+      - cursor：把上一页返回的 next_cursor 原样传回，按排序键定位下一页（keyset），不再读 OFFSET 跳过的行；
+        relevance_desc 的排序键是现算的相关度，每页仍要给全部命中行打分，只有按时间排序时才走索引、与页深无关。
+        游标与 sort、q 等条件绑定，条件变了要从第一页重新开始
+    count 控制 total：exact（默认）| estimate（最多数到 INDEX_SEARCH_COUNT_CAP）| none（不统计，total 为 null）
+    """
     if params.scope not in ALLOWED_SCOPES:
         raise ValueError("scope must be PERSON, COMPANY or empty")
 
     if (params.sort or "relevance_desc") not in ALLOWED_SORTS:
         raise ValueError("sort must be created_at_desc|expires_at_asc|relevance_desc")
 
-    use_ft = _use_fulltext()
+    count_mode = params.count or "exact"
+    if count_mode not in COUNT_MODES:
+        raise ValueError("count must be exact|estimate|none")
+
+    def _exec(mode: str) -> Dict[str, Any]:
+        query, count_query, relevance_col, sort, page, page_size = _build_query(params, mode)
 
-    def _exec(use_ft_flag: bool) -> Dict[str, Any]:
-        query, relevance_col, sort, page, page_size = _build_query(params, use_ft_flag)
+        counted = _count(count_query, count_mode)
 
-        total = query.with_entities(func.count()).order_by(None).scalar() or 0
+        if params.cursor:
+            keys = _decode_cursor(params.cursor, sort)
+            query = query.filter(_keyset_filter(sort, relevance_col.element, keys))
+            offset = 0
+        else:
+            offset = (page - 1) * page_size
         query = _apply_sort(query, sort, relevance_col)
 
-        offset = (page - 1) * page_size
-        rows = query.limit(page_size).offset(offset).all()
-
-        items: List[Dict[str, Any]] = []
-        for row in rows:
-            ev, dt, sf, person_name, company_name, _rel = row
-            owner_name = person_name if ev.scope == "PERSON" else company_name
-
-            items.append(
-                {
-                    "evidence_id": ev.id,
-                    "scope": ev.scope,
-                    "owner_id": ev.owner_id,
-                    "owner_name": owner_name,
-                    "doc_type_code": dt.code,
-                    "doc_type_name": dt.name,
-                    "cert_no": ev.cert_no,
-                    "issuer": ev.issuer,
-                    "issued_at": ev.issued_at.isoformat() if ev.issued_at else None,
-                    "expires_at": ev.expires_at.isoformat() if ev.expires_at else None,
-                    "status": ev.status,
-                    "file": {
-                        "file_id": sf.id,
-                        "original_name": sf.original_name,
-                        "mime_type": sf.mime_type,
-                        "size_bytes": int(sf.size_bytes),
-                        # "storage_rel_path": sf.storage_rel_path,  <-- 已移除该字段
-                    },
-                }
+        # 多取一行判断是否还有下一页
+        rows = query.limit(page_size + 1).offset(offset).all()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        items = [_item(*row[:5]) for row in rows]
+
+        next_cursor = None
+        if has_more:
+            last = rows[-1]
+            next_cursor = _encode_cursor(sort, _row_keys(sort, last[0], last[-1]))
+
+        result = {"page": page, "page_size": page_size, **counted, "items": items, "next_cursor": next_cursor}
+        if params.cursor:
+            result["page"] = None
+        return result
+
+    return _with_fallback(params, _exec)
+
+
+def _with_fallback(params: IndexSearchParams, run):
+    # 依次尝试：检索表 -> FULLTEXT（若开启 & MySQL）-> LIKE；前一种失败（如检索表尚未迁移）自动降级
+    modes = _search_modes() if (params.q or "").strip() else ["like"]
+    for mode in modes[:-1]:
+        try:
+            return run(mode)
+        except SQLAlchemyError as e:
+            current_app.logger.warning(f"index search mode {mode} failed, falling back: {e}")
+    return run(modes[-1])
+
+
+def _facet_list(counts: Dict[Any, int], labels: Optional[Dict[Any, str]] = None) -> List[Dict[str, Any]]:
+    out = []
+    for value, n in sorted(counts.items(), key=lambda kv: (-kv[1], str(kv[0]))):
+        item = {"value": value, "count": n}
+        if labels is not None:
+            item["label"] = labels.get(value)
+        out.append(item)
+    return out
+
+
+def index_facets(params: IndexSearchParams) -> Dict[str, Any]:
+    """
+    当前筛选条件（q / scope / owner_id / doc_type_code / valid_on）下的分面计数：
+    scope、证照类型、类别、有效期状态。一条 GROUP BY 查询算出全部分面，结果按代次缓存，
+    evidences / 证照类型 / 持有人有写入提交后失效。
+    有效期状态与 evidences.status 同一套取值（见 evidence_status.compute_status）：
+    EXPIRED / EXPIRING_SOON / VALID（expires_at 为空算 VALID），按今天现算，不等定时刷新。
+    """
+    if params.scope not in ALLOWED_SCOPES:
+        raise ValueError("scope must be PERSON, COMPANY or empty")
+    valid_on_dt = _parse_date_ymd(params.valid_on)
+    q = (params.q or "").strip()
+    today = date.today()
+    soon_days = evidence_status.expiring_soon_days()
+
+    def _exec(mode: str) -> Dict[str, Any]:
+        validity = evidence_status.status_expr(today, soon_days).label("validity")
+        query = (
+            db.session.query(
+                Evidence.scope,
+                DocumentType.code,
+                DocumentType.name,
+                DocumentType.category,
+                validity,
+                func.count(Evidence.id),
             )
+            .join(DocumentType, Evidence.document_type_id == DocumentType.id)
+        )
+        query = _filter_query(query, params, valid_on_dt, q, q.lower(), mode)
+        query = query.group_by(
+            Evidence.scope, DocumentType.code, DocumentType.name, DocumentType.category, validity
+        )
 
-        return {"page": page, "page_size": page_size, "total": int(total), "items": items}
-
-    # 先用 FULLTEXT（若开启 & MySQL），失败则自动降级到 LIKE（不会影响你后续再开启 FULLTEXT）
+        scopes: Dict[Any, int] = {}
+        doc_types: Dict[Any, int] = {}
+        doc_type_names: Dict[Any, str] = {}
+        categories: Dict[Any, int] = {}
+        validities: Dict[Any, int] = {}
+        total = 0
+        for scope, code, name, category, status, n in query.all():
+            n = int(n)
+            total += n
+            scopes[scope] = scopes.get(scope, 0) + n
+            doc_types[code] = doc_types.get(code, 0) + n
+            doc_type_names.setdefault(code, name)
+            categories[category] = categories.get(category, 0) + n
+            validities[status] = validities.get(status, 0) + n
+
+        return {
+            "total": total,
+            "facets": {
+                "scope": _facet_list(scopes),
+                "doc_type": _facet_list(doc_types, doc_type_names),
+                "category": _facet_list(categories),
+                "validity": _facet_list(validities),
+            },
+        }
+
+    key = (
+        "facets",
+        q.lower(),
+        params.scope or "",
+        params.owner_id or "",
+        params.doc_type_code or "",
+        params.valid_on or "",
+        today.isoformat(),
+        soon_days,
+    )
+    return facet_cache.cached(key, lambda: _with_fallback(params, _exec))
+
+
+def list_expiring(
+    days: str,
+    scope: Optional[str] = None,
+    owner_id: Optional[str] = None,
+    doc_type_code: Optional[str] = None,
+    page: str = "1",
+    page_size: str = "20",
+) -> Dict[str, Any]:
+    """
+    今天起 days 天内（含第 days 天当天）到期、尚未过期的证照，按到期时间升序。
+    只按 expires_at 取区间（idx_expires_at 范围扫描），不依赖定时任务是否已刷新 status。
+    """
+    if scope not in ALLOWED_SCOPES:
+        raise ValueError("scope must be PERSON, COMPANY or empty")
     try:
-        return _exec(use_ft)
-    except SQLAlchemyError as e:
-        if use_ft and (params.q or "").strip():
-            # FULLTEXT 失败 -> fallback 到 LIKE
-            return _exec(False)
-        raise
\ No newline at end of file
+        n_days = int(days)
+    except (TypeError, ValueError):
+        raise ValueError("days must be an integer")
+    if n_days < 0 or n_days > 3650:
+        raise ValueError("days must be between 0 and 3650")
+
+    page_n = _parse_int(page, default=1, min_v=1, max_v=10**9)
+    page_size_n = _parse_int(page_size, default=20, min_v=1, max_v=100)
+
+    start = evidence_status.day_start(date.today())
+    end = start + timedelta(days=n_days + 1)
+
+    query = _base_query().filter(Evidence.expires_at >= start, Evidence.expires_at < end)
+    count_query = (
+        db.session.query(Evidence.id)
+        .select_from(Evidence)
+        .filter(Evidence.expires_at >= start, Evidence.expires_at < end)
+    )
+    if scope:
+        query = query.filter(Evidence.scope == scope)
+        count_query = count_query.filter(Evidence.scope == scope)
+    if owner_id:
+        query = query.filter(Evidence.owner_id == owner_id)
+        count_query = count_query.filter(Evidence.owner_id == owner_id)
+    if doc_type_code:
+        query = query.filter(DocumentType.code == doc_type_code)
+        count_query = count_query.join(DocumentType, Evidence.document_type_id == DocumentType.id).filter(
+            DocumentType.code == doc_type_code
+        )
+
+    total = count_query.with_entities(func.count(Evidence.id)).scalar() or 0
+    rows = (
+        query.order_by(asc(Evidence.expires_at), desc(Evidence.created_at), desc(Evidence.id))
+        .limit(page_size_n)
+        .offset((page_n - 1) * page_size_n)
+        .all()
+    )
+    return {
+        "days": n_days,
+        "from": start.date().isoformat(),
+        "to": (end - timedelta(days=1)).date().isoformat(),
+        "page": page_n,
+        "page_size": page_size_n,
+        "total": int(total),
+        "items": [_item(*row) for row in rows],
+    }
@@ -0,0 +1,275 @@
+# domain/kb/batch_retriever.py
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, literal, select, union_all
+
+from app.extensions import db
+from app.models import File, KbBlock, KbBlockTerm
+from domain.kb import search_cache, term_index
+from domain.kb.retriever import KbSearchError, _highlights, _snippet_chars, parse_fields
+
+# 多 query 批量检索：生成标书时每个章节 / 每行评审项各查一次库，这里一次性完成：
+#   1. 每个 query 的全部 bigram 在 SQL 里求交（GROUP BY block_id HAVING，与 term_index.match_block_ids 相同），
+#      所有 query 拼成一条 UNION ALL，只把 (query, block_id) 传回应用；
+#   2. 候选切片分批读一次正文，逐个 query 做子串校验（bigram 全中不代表连续出现，与 LIKE '%q%' 等价）；
+#   3. 每个 query 排序取 top_k，最后只为入选切片读取详情。
+# 单字 query 和含 % / _ 的 query 无法走倒排，单独回退到 LIKE（通配语义与 search_blocks 相同）。
+
+ORDERS = ("recent", "longest")
+MAX_BATCH_QUERIES = 1000
+DEFAULT_FIELDS = ("block_id", "file_id", "filename", "tag", "meta", "content_len", "content_text")
+
+_IN_BATCH = 500
+# 一条 UNION ALL 里最多拼多少个 query（SQLite 默认复合 SELECT 上限 500）
+_UNION_BATCH = 200
+
+
+@dataclass
+class BlockHit:
+    block_id: str
+    file_id: str
+    filename: Optional[str]
+    content_len: int
+    created_at: Optional[datetime]
+
+
+def _chunks(seq: Sequence, size: int = _IN_BATCH):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+
+def _candidates(terms_by_q: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """
+    block_id -> 候选 query 列表（候选只需是超集，后面会逐个做子串校验）：
+    每个 query 要求全部 bigram 命中，交集在数据库里完成（走 kb_block_terms 的 term 索引），
+    不再把常见 bigram 的长倒排、或只按少数 bigram 召回的大候选集传回应用。
+    """
+    indexable = [(q, terms) for q, terms in terms_by_q.items() if terms]
+
+    out: Dict[str, List[str]] = defaultdict(list)
+    for chunk in _chunks(indexable, _UNION_BATCH):
+        selects = []
+        for i, (_, terms) in enumerate(chunk):
+            # 与 term_index.match_block_ids 相同：count() >= n（兼容 MySQL *_ci 排序规则）
+            selects.append(
+                select(literal(i).label("qi"), KbBlockTerm.block_id)
+                .where(KbBlockTerm.term.in_(terms))
+                .group_by(KbBlockTerm.block_id)
+                .having(func.count() >= len(terms))
+            )
+        stmt = selects[0] if len(selects) == 1 else union_all(*selects)
+        for qi, block_id in db.session.execute(stmt).all():
+            out[block_id].append(chunk[int(qi)][0])
+    return out
+
+
+def _hit(row) -> BlockHit:
+    return BlockHit(
+        block_id=row.id,
+        file_id=row.file_id,
+        filename=row.filename,
+        content_len=int(row.content_len or 0),
+        created_at=row.created_at,
+    )
+
+
+def _light_query():
+    return db.session.query(
+        KbBlock.id,
+        KbBlock.file_id,
+        KbBlock.content_len,
+        KbBlock.created_at,
+        File.filename,
+    ).join(File, KbBlock.file_id == File.id)
+
+
+def match_blocks_batch(
+        queries: Iterable[str],
+        tag: Optional[str] = None,
+) -> Tuple[Dict[str, List[str]], Dict[str, BlockHit]]:
+    """
+    返回 (query -> 内容包含该 query 的全部 block_id, block_id -> 排序用的轻量信息)。
+    匹配规则与 search_blocks 一致：忽略大小写的子串匹配，只返回有对应 File 的切片；
+    含 % / _ 的 query 与 search_blocks 一样按 LIKE 通配匹配。
+    """
+    needles: Dict[str, str] = {}
+    for q in queries:
+        qq = (q or "").strip()
+        if qq:
+            needles[qq] = qq.lower()
+
+    matches: Dict[str, List[str]] = {q: [] for q in needles}
+    hits: Dict[str, BlockHit] = {}
+
+    terms_by_q = {
+        q: [] if term_index.has_like_wildcard(q) else term_index.query_terms(q)
+        for q in needles
+    }
+    wanted_by_block = _candidates(terms_by_q)
+
+    # 校验：候选切片分批读一次正文
+    for chunk in _chunks(sorted(wanted_by_block)):
+        rq = _light_query().add_columns(KbBlock.content_text).filter(KbBlock.id.in_(chunk))
+        if tag:
+            rq = rq.filter(KbBlock.tag == tag)
+        rows = rq.all()
+        for r in rows:
+            text = (r.content_text or "").lower()
+            for q in wanted_by_block[r.id]:
+                if needles[q] in text:
+                    matches[q].append(r.id)
+                    if r.id not in hits:
+                        hits[r.id] = _hit(r)
+
+    # 单字 / 通配 query：回退到 LIKE
+    for q, terms in terms_by_q.items():
+        if terms:
+            continue
+        rq = _light_query().filter(func.lower(KbBlock.content_text).like(f"%{needles[q]}%"))
+        if tag:
+            rq = rq.filter(KbBlock.tag == tag)
+        for r in rq.all():
+            matches[q].append(r.id)
+            hits.setdefault(r.id, _hit(r))
+
+    return matches, hits
+
+
+def rank_key(order: str):
+    if order == "longest":
+        return lambda h: (h.content_len, h.created_at or datetime.min, h.block_id)
+    return lambda h: (h.created_at or datetime.min, h.block_id)
+
+
+def load_block_details(block_ids: Iterable[str], with_content: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    一次读取入选切片的详情（按 id 分批）
+    """
+    ids = sorted(set(block_ids))
+    cols = [KbBlock.id, KbBlock.file_id, KbBlock.tag, KbBlock.meta_json, KbBlock.content_len, File.filename]
+    if with_content:
+        cols.append(KbBlock.content_text)
+
+    out: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunks(ids):
+        rows = (
+            db.session.query(*cols)
+            .join(File, KbBlock.file_id == File.id)
+            .filter(KbBlock.id.in_(chunk))
+            .all()
+        )
+        for r in rows:
+            out[r.id] = {
+                "block_id": r.id,
+                "file_id": r.file_id,
+                "filename": r.filename,
+                "tag": r.tag,
+                "meta": r.meta_json,
+                "content_len": r.content_len,
+                "content_text": r.content_text if with_content else None,
+            }
+    return out
+
+
+def _snippet(text: str, needle: str, width: int) -> Tuple[str, int]:
+    # 与 search_blocks 的 SQL 摘要窗口一致：命中位置前留 1/3 上下文
+    lead = width // 3
+    pos = text.lower().find(needle) if needle else -1
+    start = pos - lead if pos >= lead else 0
+    return text[start:start + width + len(needle)], start
+
+
+def search_blocks_batch(
+        queries: Sequence[str],
+        *,
+        by_tag: Optional[str] = None,
+        top_k: int = 3,
+        order: str = "recent",
+        fields=None,
+        snippet_chars: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    一次回答多个 query，按输入顺序返回 [{"query", "total", "items"}]。
+    order: recent = 按入库时间倒序（与 search_blocks 的纯内容检索一致）；longest = 按切片长度倒序
+    每个 query 的结果单独走检索缓存，只有未命中的 query 才进入批量查询。
+    """
+    if not isinstance(queries, (list, tuple)):
+        raise KbSearchError("queries must be an array of strings")
+    if len(queries) > MAX_BATCH_QUERIES:
+        raise KbSearchError(f"at most {MAX_BATCH_QUERIES} queries per batch")
+    order = (order or "recent").strip().lower()
+    if order not in ORDERS:
+        raise KbSearchError(f"order must be one of {', '.join(ORDERS)}")
+    try:
+        top_k = min(max(int(top_k or 0), 1), 100)
+    except (TypeError, ValueError) as exc:
+        raise KbSearchError("top_k must be an integer") from exc
+    field_set = parse_fields(fields) or DEFAULT_FIELDS
+    tag = (by_tag or "").strip() or None
+    width = _snippet_chars(snippet_chars)
+
+    distinct = list(dict.fromkeys((q or "").strip() for q in queries if isinstance(q, str) and (q or "").strip()))
+    cache = search_cache.get_cache()
+    generation = cache.generation() if cache is not None else None
+
+    def _key(q: str) -> Tuple:
+        return ("search_blocks_batch",) + search_cache.normalize_key(
+            query=q, tag=tag, title_keywords=None,
+            top_k=top_k, order=order, fields=list(field_set), snippet_chars=width,
+        )
+
+    answered: Dict[str, Dict[str, Any]] = {}
+    if cache is not None:
+        for q in distinct:
+            value = cache.get(_key(q))
+            if value is not None:
+                answered[q] = value
+
+    pending = [q for q in distinct if q not in answered]
+    if pending:
+        matches, hits = match_blocks_batch(pending, tag=tag)
+        key_fn = rank_key(order)
+        selected: Dict[str, List[str]] = {}
+        for q in pending:
+            ranked = sorted((hits[b] for b in matches.get(q, [])), key=key_fn, reverse=True)
+            selected[q] = [h.block_id for h in ranked[:top_k]]
+
+        need_content = bool(set(field_set) & {"content_text", "snippet", "highlights"})
+        details = load_block_details(
+            (b for ids in selected.values() for b in ids),
+            with_content=need_content,
+        )
+
+        for q in pending:
+            items = []
+            for block_id in selected[q]:
+                d = details.get(block_id)
+                if d is None:
+                    continue
+                item = dict(d, score=1)
+                if need_content and set(field_set) & {"snippet", "highlights"}:
+                    snippet, offset = _snippet(d["content_text"] or "", q.lower(), width)
+                    item["snippet"] = snippet
+                    item["snippet_offset"] = offset
+                    item["highlights"] = _highlights(snippet, q.lower())
+                keep = set(field_set)
+                if "snippet" in keep:
+                    keep.add("snippet_offset")
+                items.append({k: v for k, v in item.items() if k in keep})
+            result = {"query": q, "total": len(matches.get(q, [])), "items": items}
+            answered[q] = result
+            if cache is not None:
+                cache.put(_key(q), result, generation=generation)
+
+    out = []
+    for q in queries:
+        qq = (q or "").strip() if isinstance(q, str) else ""
+        result = dict(answered.get(qq) or {"total": 0, "items": []})
+        result["query"] = qq
+        out.append(result)
+    return out
@@ -0,0 +1,168 @@
+# domain/kb/block_docx_cache.py
+from __future__ import annotations
+
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from docx import Document as DocxDocument
+
+logger = logging.getLogger(__name__)
+
+# 切片 docx 按需生成的磁盘缓存：
+#   - 入库时不再为每个切片写 docx，第一次导出用到某个切片时才按「标题 + 正文」生成
+#   - 文件名 = block_id（切片入库后内容不变），命中时刷新 mtime，总大小超过上限按 mtime 淘汰最旧的
+#   - 只用文件系统做同步（先写临时文件再改名），导出子进程之间可以共用同一个目录
+# 用量：stats() 里的 files / bytes 来自目录本身；hits / misses / evictions 是当前进程的计数。
+# 同样的「目录 + mtime LRU + 大小上限」也用于导出的章节片段缓存（domain/exports/word.py，文件由调用方写入，再 trim()）。
+
+DEFAULT_MAX_MB = 512
+
+# 超过上限时淘汰到上限的这个比例，避免每次写入都触发一轮淘汰
+_EVICT_TO = 0.9
+
+
+def write_block_docx(block_path: Path, title: str, content: str) -> None:
+    block_path.parent.mkdir(parents=True, exist_ok=True)
+    d = DocxDocument()
+    if title:
+        d.add_heading(title, level=1)
+    for line in content.splitlines():
+        d.add_paragraph(line)
+    d.save(str(block_path))
+
+
+class BlockDocxCache:
+    def __init__(self, root: str, max_bytes: int):
+        self.root = str(root)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None  # 目录总大小的估计值，首次写入时扫描一次
+
+    def path_for(self, block_id: str) -> Path:
+        return Path(self.root) / f"{block_id}.docx"
+
+    def get(self, block_id: str, title: str, content_text: str) -> Path:
+        """返回切片 docx 路径，缓存里没有就现在生成"""
+        path = self.path_for(block_id)
+        try:
+            os.utime(path)
+            self.hits += 1
+            return path
+        except FileNotFoundError:
+            pass
+
+        self.misses += 1
+        tmp = path.with_name(f"{path.stem}.{uuid.uuid4().hex}.tmp")
+        write_block_docx(tmp, title or "", content_text or "")
+        os.replace(tmp, path)
+
+        if self.max_bytes:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._entries())
+            else:
+                self._size += path.stat().st_size
+            if self._size > self.max_bytes:
+                self.evict(keep=path)
+        return path
+
+    def _entries(self) -> List[Tuple[float, int, Path]]:
+        out: List[Tuple[float, int, Path]] = []
+        try:
+            with os.scandir(self.root) as it:
+                for entry in it:
+                    if not entry.name.endswith(".docx"):
+                        continue
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    out.append((st.st_mtime, st.st_size, Path(entry.path)))
+        except FileNotFoundError:
+            pass
+        return out
+
+    def trim(self, keep: Iterable[Path] = ()) -> int:
+        """调用方自己往目录里写了文件之后调用：总大小超过上限就淘汰（keep 里的文件不删）"""
+        if not self.max_bytes:
+            return 0
+        self._size = sum(size for _, size, _ in self._entries())
+        if self._size <= self.max_bytes:
+            return 0
+        return self.evict(keep=keep)
+
+    def evict(self, keep: Union[Path, Iterable[Path], None] = None) -> int:
+        """按 mtime 从旧到新删除，直到总大小降到上限的 90%；返回删除的文件数"""
+        keep_paths = {keep} if isinstance(keep, Path) else set(keep or ())
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * _EVICT_TO)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            if path in keep_paths:
+                continue
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        self._size = total
+        self.evictions += removed
+        if removed:
+            logger.info(f"block docx cache evicted {removed} files, {total} bytes left")
+        return removed
+
+    def usage(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def usage_since(self, before: Dict[str, int]) -> Dict[str, int]:
+        return {k: v - before.get(k, 0) for k, v in self.usage().items()}
+
+    def record(self, usage: Dict[str, int]) -> None:
+        """汇总其它进程（导出子进程）里的用量"""
+        self.hits += int(usage.get("hits", 0))
+        self.misses += int(usage.get("misses", 0))
+        self.evictions += int(usage.get("evictions", 0))
+
+    def detached(self) -> "BlockDocxCache":
+        """同一目录、计数清零的句柄（交给子进程用）"""
+        return BlockDocxCache(self.root, self.max_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = self._entries()
+        return {
+            "dir": self.root,
+            "files": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+_caches: Dict[Tuple[str, int], BlockDocxCache] = {}
+
+
+def get_block_docx_cache() -> BlockDocxCache:
+    """当前 app 的切片 docx 缓存（instance/kb_storage/block_cache，上限 KB_BLOCK_DOCX_CACHE_MB）"""
+    from flask import current_app
+
+    root = str(Path(current_app.instance_path) / "kb_storage" / "block_cache")
+    try:
+        max_mb = int(current_app.config.get("KB_BLOCK_DOCX_CACHE_MB", DEFAULT_MAX_MB))
+    except (TypeError, ValueError):
+        max_mb = DEFAULT_MAX_MB
+    key = (root, max_mb)
+    cache = _caches.get(key)
+    if cache is None:
+        Path(root).mkdir(parents=True, exist_ok=True)
+        cache = _caches[key] = BlockDocxCache(root, max_mb * 1024 * 1024)
+    return cache
@@ -0,0 +1,80 @@
+# domain/kb/block_writer.py
+from __future__ import annotations
+
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import KbBlock
+from domain.kb import term_index
+
+# 批量写入 kb_blocks：绕过 ORM unit-of-work，直接用 Core insert + executemany。
+# 入库路径（在线 IngestLogic / 离线 offline_builder）都走这里，切片与 bigram 倒排一起写。
+DEFAULT_BATCH_SIZE = 1000
+
+
+def build_block_row(
+    *,
+    file_id: str,
+    content_text: str,
+    tag: Optional[str],
+    meta: Dict[str, Any],
+    block_id: Optional[str] = None,
+    created_at: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    构造一行 kb_blocks 的插入参数（纯 dict，不创建 ORM 对象）
+    """
+    return {
+        "id": block_id or str(uuid.uuid4()),
+        "file_id": file_id,
+        "content_text": content_text,
+        "content_len": len(content_text),
+        "tag": tag,
+        "meta_json": json.dumps(meta, ensure_ascii=False),
+        "created_at": created_at or datetime.now(),
+    }
+
+
+def bulk_insert_blocks(
+    rows: Iterable[Dict[str, Any]],
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    commit_every: Optional[int] = None,
+) -> int:
+    """
+    分批 executemany 写入切片及其倒排。
+      - batch_size: 每次 executemany 的行数
+      - commit_every: 每写入多少行提交一次（超大文档分段提交，控制事务体积）；
+        为 None 时不提交，由调用方在同一事务里统一 commit
+    返回写入的切片数量。
+    """
+    batch_size = max(int(batch_size or DEFAULT_BATCH_SIZE), 1)
+    written = 0
+    since_commit = 0
+    batch: List[Dict[str, Any]] = []
+
+    def _flush() -> None:
+        nonlocal written, since_commit, batch
+        if not batch:
+            return
+        db.session.execute(insert(KbBlock), batch)
+        term_index.index_blocks((r["id"], r["file_id"], r["content_text"]) for r in batch)
+        written += len(batch)
+        since_commit += len(batch)
+        batch = []
+        if commit_every and since_commit >= commit_every:
+            db.session.commit()
+            since_commit = 0
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            _flush()
+    _flush()
+
+    return written
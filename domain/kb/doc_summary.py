@@ -0,0 +1,137 @@
+# domain/kb/doc_summary.py
+from __future__ import annotations
+
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+
+from app.extensions import db
+from app.models import File, KbBlock, KbDocument, KbDocumentTag
+
+# 知识库文档汇总：每个文件在 kb_documents 上维护 chunk_count / total_chars / last_ingest_at，
+# 标签集合写 kb_document_tags。入库、删除时按 file_id 重算（只扫该文件的切片，走 file_id 索引），
+# 文档列表直接分页读 kb_documents，不再对整张 kb_blocks 做 GROUP BY。
+
+
+def refresh_summary(file_id: str, ingested_at: Optional[datetime] = None) -> Optional[KbDocument]:
+    """
+    按当前 kb_blocks 重算某个文件的汇总（不提交事务）。
+    ingested_at：本次入库时间；为空时取切片的最大 created_at（回填历史数据时用）
+    """
+    row = (
+        db.session.query(
+            func.count(KbBlock.id),
+            func.coalesce(func.sum(KbBlock.content_len), 0),
+            func.max(KbBlock.created_at),
+        )
+        .filter(KbBlock.file_id == file_id)
+        .one()
+    )
+    chunk_count, total_chars, last_created = int(row[0] or 0), int(row[1] or 0), row[2]
+    tag_rows = (
+        db.session.query(KbBlock.tag, func.count(KbBlock.id), func.coalesce(func.sum(KbBlock.content_len), 0))
+        .filter(KbBlock.file_id == file_id)
+        .group_by(KbBlock.tag)
+        .all()
+    )
+    tag_summaries = sorted(
+        ({"file_id": file_id, "tag": t, "chunk_count": int(n or 0), "total_chars": int(chars or 0)}
+         for t, n, chars in tag_rows if t),
+        key=lambda r: r["tag"],
+    )
+
+    db.session.query(KbDocumentTag).filter(KbDocumentTag.file_id == file_id).delete(synchronize_session=False)
+
+    kb_doc = db.session.query(KbDocument).filter(KbDocument.file_id == file_id).first()
+    if kb_doc is None:
+        if not chunk_count:
+            return None
+        f = db.session.get(File, file_id)
+        kb_doc = KbDocument(id=str(uuid.uuid4()), file_id=file_id, title=f.filename if f else None)
+        db.session.add(kb_doc)
+
+    kb_doc.chunk_count = chunk_count
+    kb_doc.total_chars = total_chars
+    kb_doc.last_ingest_at = (ingested_at or last_created) if chunk_count else None
+
+    if tag_summaries:
+        db.session.execute(insert(KbDocumentTag), tag_summaries)
+    return kb_doc
+
+
+def delete_summary(file_id: str) -> None:
+    db.session.query(KbDocumentTag).filter(KbDocumentTag.file_id == file_id).delete(synchronize_session=False)
+    db.session.query(KbDocument).filter(KbDocument.file_id == file_id).delete(synchronize_session=False)
+
+
+def rebuild_summaries(file_ids: Optional[Iterable[str]] = None, commit_every: int = 200) -> int:
+    """
+    回填 / 校正汇总（flask kb-rebuild-summary）。返回处理的文件数
+    """
+    if file_ids is None:
+        file_ids = [r[0] for r in db.session.query(KbBlock.file_id).distinct().all()]
+
+    n = 0
+    for file_id in file_ids:
+        refresh_summary(file_id)
+        n += 1
+        if n % commit_every == 0:
+            db.session.commit()
+    db.session.commit()
+    return n
+
+
+def list_summaries(page: int = 1, page_size: int = 20, tag: Optional[str] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    分页读取文档汇总（按最近入库时间倒序），tag 过滤走 kb_document_tags 索引。
+    按 tag 过滤时 chunk_count / total_chars 只统计带该 tag 的切片（与文件里其它 tag 的切片无关）。
+    """
+    page = max(int(page), 1)
+    page_size = max(int(page_size), 1)
+
+    q = db.session.query(KbDocument).filter(KbDocument.chunk_count > 0)
+    if tag:
+        q = q.filter(
+            KbDocument.file_id.in_(
+                db.session.query(KbDocumentTag.file_id).filter(KbDocumentTag.tag == tag)
+            )
+        )
+
+    total = q.order_by(None).count()
+    docs = (
+        q.order_by(KbDocument.last_ingest_at.desc(), KbDocument.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+
+    tags_by_file: Dict[str, List[str]] = {d.file_id: [] for d in docs}
+    tagged: Dict[str, KbDocumentTag] = {}
+    if docs:
+        rows = (
+            db.session.query(KbDocumentTag)
+            .filter(KbDocumentTag.file_id.in_(list(tags_by_file)))
+            .order_by(KbDocumentTag.file_id, KbDocumentTag.tag)
+            .all()
+        )
+        for r in rows:
+            tags_by_file[r.file_id].append(r.tag)
+            if r.tag == tag:
+                tagged[r.file_id] = r
+
+    result = []
+    for d in docs:
+        doc_tags = tags_by_file.get(d.file_id) or []
+        counted = tagged.get(d.file_id) or d
+        result.append({
+            "file_id": d.file_id,
+            "file_name": d.title or "Unknown",
+            "chunk_count": counted.chunk_count,
+            "total_chars": counted.total_chars,
+            "tags": doc_tags,
+            "tag": doc_tags[0] if len(doc_tags) == 1 else "mixed",
+            "created_at": d.last_ingest_at,
+        })
+    return result, total
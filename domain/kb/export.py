@@ -36,9 +36,9 @@ def export_search_to_docx(
     if top_k == 0:
         top_k = 50
 
-    # 分页拉取
+    # 按 cursor 逐页拉取（keyset 翻页，不做 count）：不再读 OFFSET 跳过的行，但每页仍会给全部命中行打分
     items: List[Dict[str, Any]] = []
-    page = 1
+    cursor: Optional[str] = None
     page_size = min(100, top_k)
 
     while len(items) < top_k:
@@ -47,16 +47,15 @@ def export_search_to_docx(
             top_k=top_k,
             by_tag=by_tag,
             title_keywords=title_keywords,
-            page=page,
+            page=1,
             page_size=page_size,
+            cursor=cursor,
+            count="none",
         )
-        batch = res.get("items") or []
-        if not batch:
+        items.extend(res.get("items") or [])
+        cursor = res.get("next_cursor")
+        if not cursor:
             break
-        items.extend(batch)
-        if len(items) >= res.get("total", 0):
-            break
-        page += 1
 
     items = items[:top_k]
 
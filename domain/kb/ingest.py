@@ -1,14 +1,23 @@
+import hashlib
+import json
+import logging
 import os
 import uuid
+from collections import defaultdict
 from datetime import datetime  # 【核心修改】引入 datetime
-from typing import List, Dict, Any, Optional, Tuple
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from pathlib import Path
-from sqlalchemy import func
+from sqlalchemy import func, or_
 
 from app.extensions import db
-from app.models import KbBlock, File
+from app.models import KbBlock, KbDocument, File
 from app.worker.components.parser import Parser
 from domain.kb.splitter import SemanticTextSplitter
+from domain.kb.structure_splitter import DEFAULT_MAX_CHARS, DEFAULT_MIN_CHARS, StructureTextSplitter
+from domain.kb import doc_summary, search_cache, term_index
+from domain.kb.block_writer import DEFAULT_BATCH_SIZE, build_block_row, bulk_insert_blocks
+
+logger = logging.getLogger(__name__)
 
 
 # 定义异常类
@@ -16,13 +25,220 @@ class KbIngestError(Exception):
     pass
 
 
+# 入库进度回调：(stage, percent)
+ProgressFn = Callable[[str, int], None]
+
+# 切片策略：semantic = 向量语义切分（需加载模型）；structure = 按标题/编号结构切分（无模型、确定性）
+CHUNK_STRATEGIES = ("semantic", "structure")
+DEFAULT_CHUNK_STRATEGY = "semantic"
+
+
+# 增量入库：按段落把全文切成「区域」，区域边界由段落内容本身决定（content-defined），
+# 修改某一章节只会影响附近的区域。未变化区域的切片保留原 block_id，不再重新做语义切分。
+_REGION_MIN_CHARS = 1000
+_REGION_MAX_CHARS = 8000
+_REGION_CUT_MODULUS = 8
+
+
+def _file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def _is_cut_point(para: str) -> bool:
+    if not para.strip():
+        return False
+    return hashlib.md5(para.encode("utf-8")).digest()[0] % _REGION_CUT_MODULUS == 0
+
+
+def _split_regions(text: str) -> List[str]:
+    regions: List[str] = []
+    buf: List[str] = []
+    size = 0
+    for para in text.split("\n"):
+        buf.append(para)
+        size += len(para) + 1
+        if size >= _REGION_MAX_CHARS or (size >= _REGION_MIN_CHARS and _is_cut_point(para)):
+            regions.append("\n".join(buf))
+            buf = []
+            size = 0
+    if buf:
+        tail = "\n".join(buf)
+        if tail.strip():
+            regions.append(tail)
+    return [r for r in regions if r.strip()]
+
+
+def _load_meta(meta_json: Optional[str]) -> Dict[str, Any]:
+    if not meta_json:
+        return {}
+    try:
+        meta = json.loads(meta_json)
+    except (TypeError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) else {}
+
+
+def _block_meta(
+        chunk_index: int,
+        source: str,
+        region_index: int,
+        region_hash: str,
+        region_chunks: int,
+        chunker: str,
+) -> Dict[str, Any]:
+    # region_chunks 用于识别「只写入了一部分」的区域（超大文档分段提交时中断）
+    # chunker 记录切片策略，换策略后旧区域不能复用
+    return {
+        "chunk_index": chunk_index,
+        "source": source,
+        "region_index": region_index,
+        "region_hash": region_hash,
+        "region_chunks": region_chunks,
+        "chunker": chunker,
+    }
+
+
+def _ingest_setting(name: str, default: int) -> int:
+    try:
+        from flask import current_app
+        return int(current_app.config.get(name, default))
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+def resolve_chunk_strategy(strategy: Optional[str] = None) -> str:
+    """
+    未指定时取配置 KB_CHUNK_STRATEGY；不支持的策略抛 ValueError
+    """
+    if not strategy:
+        try:
+            from flask import current_app
+            strategy = current_app.config.get("KB_CHUNK_STRATEGY")
+        except RuntimeError:
+            strategy = None
+    strategy = (strategy or DEFAULT_CHUNK_STRATEGY).strip().lower()
+    if strategy not in CHUNK_STRATEGIES:
+        raise ValueError(f"unsupported chunk strategy: {strategy}")
+    return strategy
+
+
+def chunk_settings(strategy: Optional[str] = None) -> Dict[str, Any]:
+    """
+    在主进程（有 app context）里把切片相关配置解析成 prepare_file_chunks 的参数。
+    子进程里没有 app context，读不到 KB_CHUNK_*，所以流水线要把这些值经 prepare_kwargs 传过去。
+    """
+    return {
+        "strategy": resolve_chunk_strategy(strategy),
+        "min_chars": _ingest_setting("KB_CHUNK_MIN_CHARS", DEFAULT_MIN_CHARS),
+        "max_chars": _ingest_setting("KB_CHUNK_MAX_CHARS", DEFAULT_MAX_CHARS),
+    }
+
+
+def _structure_chunks(text: str, min_chars: Optional[int] = None, max_chars: Optional[int] = None) -> List[str]:
+    return StructureTextSplitter.split_text(
+        text,
+        min_chars=_ingest_setting("KB_CHUNK_MIN_CHARS", DEFAULT_MIN_CHARS) if min_chars is None else min_chars,
+        max_chars=_ingest_setting("KB_CHUNK_MAX_CHARS", DEFAULT_MAX_CHARS) if max_chars is None else max_chars,
+    )
+
+
+def _chunk_text(
+        text: str,
+        strategy: str = DEFAULT_CHUNK_STRATEGY,
+        min_chars: Optional[int] = None,
+        max_chars: Optional[int] = None,
+) -> List[str]:
+    if strategy == "structure":
+        return _structure_chunks(text, min_chars, max_chars)
+    try:
+        chunks = SemanticTextSplitter.split_text(text)
+    except Exception as e:
+        # 原先退回 text.split("\n\n")，但 docx 文本按单个换行拼接，会得到整段的超大块
+        logger.warning(f"Semantic split failed, fallback to structure split: {e}")
+        return _structure_chunks(text, min_chars, max_chars)
+    return [c for c in chunks if c.strip()]
+
+
+def file_chunker(file_id: str) -> str:
+    """
+    该文件现有切片使用的切片策略（取最近写入的一条；旧数据未记录时视为 semantic）
+    """
+    row = (
+        db.session.query(KbBlock.meta_json)
+        .filter(KbBlock.file_id == file_id)
+        .order_by(KbBlock.created_at.desc())
+        .first()
+    )
+    return _load_meta(row.meta_json if row else None).get("chunker") or DEFAULT_CHUNK_STRATEGY
+
+
 class IngestLogic:
     @staticmethod
-    def ingest_file(file_id: str, tag: str = "general") -> int:
+    def _existing_regions(
+            file_id: str,
+            chunker: str = DEFAULT_CHUNK_STRATEGY,
+    ) -> Tuple[Dict[str, List[List[str]]], List[str]]:
         """
-        解析文件 -> 语义切片 -> 存入 kb_block
-        返回生成的 block 数量
+        读取该文件已入库的切片，按 region_hash 分组（同一区域内按 chunk_index 排序）。
+        只复用同一切片策略产出的区域（未记录 chunker 的旧切片视为 semantic）。
+        返回 (region_hash -> [该区域的 block_id 列表, ...], 不可复用的旧切片 id)
         """
+        grouped: Dict[str, Dict[int, List[Tuple[int, str]]]] = defaultdict(lambda: defaultdict(list))
+        expected: Dict[Tuple[str, int], int] = {}
+        legacy_ids: List[str] = []
+        rows = db.session.query(KbBlock.id, KbBlock.meta_json).filter(KbBlock.file_id == file_id).all()
+        for r in rows:
+            meta = _load_meta(r.meta_json)
+            region_hash = meta.get("region_hash")
+            region_index = meta.get("region_index")
+            if not region_hash or region_index is None \
+                    or (meta.get("chunker") or DEFAULT_CHUNK_STRATEGY) != chunker:
+                legacy_ids.append(r.id)
+                continue
+            grouped[region_hash][int(region_index)].append((int(meta.get("chunk_index") or 0), r.id))
+            if meta.get("region_chunks") is not None:
+                expected[(region_hash, int(region_index))] = int(meta["region_chunks"])
+
+        reusable: Dict[str, List[List[str]]] = {}
+        for region_hash, by_region in grouped.items():
+            for region_index, items in sorted(by_region.items()):
+                block_ids = [block_id for _, block_id in sorted(items)]
+                want = expected.get((region_hash, region_index))
+                if want is not None and want != len(block_ids):
+                    # 区域不完整，不能复用
+                    legacy_ids.extend(block_ids)
+                    continue
+                reusable.setdefault(region_hash, []).append(block_ids)
+        return reusable, legacy_ids
+
+    @staticmethod
+    def ingest_file(
+            file_id: str,
+            tag: str = "general",
+            force: bool = False,
+            progress: Optional[ProgressFn] = None,
+            strategy: Optional[str] = None,
+    ) -> int:
+        """
+        解析文件 -> 切片 -> 存入 kb_block（增量）
+          - 文件内容 hash 与上次入库一致且切片策略相同：直接跳过（force=True 时强制全量重建）
+          - 否则按区域 diff，只对变化的区域重新切片，未变化区域的 block_id 保持不变
+        strategy：切片策略（semantic / structure），默认取配置 KB_CHUNK_STRATEGY
+        progress(stage, percent)：阶段回调（PARSE / CHUNK / EMBED / WRITE），供异步任务上报进度；
+        回调只在写库之前触发，回调里提交 session 不会提交半成品数据。
+        返回该文件当前的 block 数量
+        """
+        report = progress or (lambda stage, pct: None)
+        strategy = resolve_chunk_strategy(strategy)
+
         f = db.session.get(File, file_id)
         if not f:
             raise ValueError(f"File {file_id} not found")
@@ -39,56 +255,213 @@ class IngestLogic:
         if not file_path.exists():
             raise FileNotFoundError(f"Disk file missing: {file_path}")
 
-        # 2. 解析文本
+        # 2. 文件未变化则跳过（标签变化只需要改列，不必重新切片）
+        content_hash = _file_sha256(file_path)
+        kb_doc = db.session.query(KbDocument).filter(KbDocument.file_id == file_id).first()
+        existing_count = (
+            db.session.query(func.count(KbBlock.id)).filter(KbBlock.file_id == file_id).scalar() or 0
+        )
+        if (
+                not force
+                and kb_doc is not None
+                and kb_doc.content_hash == content_hash
+                and existing_count
+                and file_chunker(file_id) == strategy
+        ):
+            (
+                db.session.query(KbBlock)
+                .filter(KbBlock.file_id == file_id, or_(KbBlock.tag.is_(None), KbBlock.tag != tag))
+                .update({KbBlock.tag: tag}, synchronize_session=False)
+            )
+            search_cache.mark_dirty()
+            doc_summary.refresh_summary(file_id, ingested_at=datetime.now())
+            db.session.commit()
+            print(f"File unchanged, skip ingest: {f.filename}")
+            return existing_count
+
+        # 3. 解析文本
+        report("PARSE", 10)
         text = Parser.parse(file_path, f.ext)
         if not text:
             return 0
 
-        # 3. 执行语义切片
-        print(f"Start semantic chunking for file: {f.filename}...")
-        try:
-            chunks = SemanticTextSplitter.split_text(text)
-        except Exception as e:
-            print(f"Semantic split failed, fallback to simple split: {e}")
-            chunks = [t for t in text.split("\n\n") if t.strip()]
-
-        print(f"Generated {len(chunks)} chunks.")
+        # 4. 区域 diff
+        report("CHUNK", 20)
+        regions = _split_regions(text)
+        if force:
+            reusable, stale_ids = {}, [
+                r.id for r in db.session.query(KbBlock.id).filter(KbBlock.file_id == file_id).all()
+            ]
+        else:
+            reusable, stale_ids = IngestLogic._existing_regions(file_id, strategy)
 
-        # 4. 存入数据库
-        # 先清理该文件的旧索引
-        db.session.query(KbBlock).filter(KbBlock.file_id == file_id).delete()
+        kept_updates: List[Dict[str, Any]] = []
+        new_rows: List[Dict[str, Any]] = []
+        chunk_idx = 0
+        rechunked = 0
 
-        blocks_to_add = []
-        for idx, chunk_content in enumerate(chunks):
-            if not chunk_content.strip():
+        print(f"Start {strategy} chunking for file: {f.filename} ({len(regions)} regions)...")
+        report("EMBED", 25)
+        for region_index, region in enumerate(regions):
+            region_hash = _text_hash(region)
+            candidates = reusable.get(region_hash)
+            if candidates:
+                # 未变化区域：保留原切片，只刷新顺序信息与标签
+                block_ids = candidates.pop(0)
+                for block_id in block_ids:
+                    meta = _block_meta(chunk_idx, f.filename, region_index, region_hash, len(block_ids), strategy)
+                    kept_updates.append({
+                        "id": block_id,
+                        "tag": tag,
+                        "meta_json": json.dumps(meta, ensure_ascii=False),
+                    })
+                    chunk_idx += 1
                 continue
 
-            block_id = str(uuid.uuid4())
+            rechunked += 1
+            report("EMBED", 25 + int(55 * region_index / max(len(regions), 1)))
+            chunks = _chunk_text(region, strategy)
+            now = datetime.now()
+            for chunk_content in chunks:
+                meta = _block_meta(chunk_idx, f.filename, region_index, region_hash, len(chunks), strategy)
+                new_rows.append(
+                    build_block_row(file_id=file_id, content_text=chunk_content, tag=tag, meta=meta, created_at=now)
+                )
+                chunk_idx += 1
 
-            b = KbBlock(
-                id=block_id,
-                file_id=file_id,
-                content_text=chunk_content,
-                content_len=len(chunk_content),
-                tag=tag,
-                meta_json=f'{{"chunk_index": {idx}, "source": "{f.filename}"}}',
+        # 没有被复用的旧区域全部作废
+        for groups in reusable.values():
+            for block_ids in groups:
+                stale_ids.extend(block_ids)
 
-                # 【核心修复】使用 datetime 对象
-                created_at=datetime.now()
-            )
-            blocks_to_add.append(b)
+        print(
+            f"Regions: {len(regions)} total, {rechunked} re-chunked; "
+            f"blocks: {len(kept_updates)} kept, {len(new_rows)} new, {len(stale_ids)} removed."
+        )
+
+        report("WRITE", 85)
+
+        # 5. 存入数据库（切片 + bigram 倒排走 Core 批量写入；
+        #    超大文档按 KB_INGEST_COMMIT_ROWS 分段提交，content_hash 最后写入，中断后重跑会自动续上）
+        if stale_ids:
+            for i in range(0, len(stale_ids), 500):
+                batch = stale_ids[i:i + 500]
+                db.session.query(KbBlock).filter(KbBlock.id.in_(batch)).delete(synchronize_session=False)
+                term_index.delete_block_terms(batch)
+
+        if kept_updates:
+            # 保留的切片可能只改了 tag / 顺序，同样要让检索缓存失效
+            search_cache.mark_dirty()
+            db.session.bulk_update_mappings(KbBlock, kept_updates)
+
+        bulk_insert_blocks(
+            new_rows,
+            batch_size=_ingest_setting("KB_INGEST_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+            commit_every=_ingest_setting("KB_INGEST_COMMIT_ROWS", 20000),
+        )
+
+        if kb_doc is None:
+            kb_doc = KbDocument(id=str(uuid.uuid4()), file_id=file_id, title=f.filename)
+            db.session.add(kb_doc)
+        kb_doc.content_hash = content_hash
+        db.session.flush()
+        doc_summary.refresh_summary(file_id, ingested_at=datetime.now())
 
-        db.session.add_all(blocks_to_add)
         db.session.commit()
 
-        return len(blocks_to_add)
+        return len(kept_updates) + len(new_rows)
+
+
+def prepare_file_chunks(
+        path: str,
+        ext: Optional[str] = None,
+        strategy: Optional[str] = None,
+        min_chars: Optional[int] = None,
+        max_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    入库中的纯计算部分：解析 -> 区域切分 -> 切片。
+    不访问数据库，可放到子进程里并发执行（见 domain/kb/pipeline.py）；
+    子进程里读不到配置，strategy / min_chars / max_chars 由主进程用 chunk_settings() 解析后传入。
+    """
+    strategy = resolve_chunk_strategy(strategy)
+    p = Path(path)
+    ext = (ext or p.suffix.lstrip(".")).lower()
+    text = Parser.parse(p, ext) or ""
+
+    regions = []
+    for region_index, region in enumerate(_split_regions(text)):
+        regions.append({
+            "region_index": region_index,
+            "region_hash": _text_hash(region),
+            "chunks": _chunk_text(region, strategy, min_chars, max_chars),
+        })
+
+    return {
+        "path": str(p),
+        "ext": ext,
+        "size": p.stat().st_size,
+        "content_hash": _file_sha256(p),
+        "chars": len(text),
+        "chunker": strategy,
+        "regions": regions,
+    }
+
+
+def write_prepared_file(file_id: str, source: str, tag: str, prepared: Dict[str, Any]) -> int:
+    """
+    把 prepare_file_chunks 的结果写入 kb_blocks（全量替换该文件原有切片），并记录 content_hash。
+    返回写入的切片数量。
+    """
+    db.session.query(KbBlock).filter(KbBlock.file_id == file_id).delete(synchronize_session=False)
+    term_index.delete_file_terms(file_id)
+
+    rows: List[Dict[str, Any]] = []
+    chunk_idx = 0
+    now = datetime.now()
+    for region in prepared.get("regions") or []:
+        chunks = region["chunks"]
+        for chunk_content in chunks:
+            meta = _block_meta(
+                chunk_idx,
+                source,
+                region["region_index"],
+                region["region_hash"],
+                len(chunks),
+                prepared.get("chunker") or DEFAULT_CHUNK_STRATEGY,
+            )
+            rows.append(build_block_row(file_id=file_id, content_text=chunk_content, tag=tag, meta=meta, created_at=now))
+            chunk_idx += 1
+
+    written = bulk_insert_blocks(
+        rows,
+        batch_size=_ingest_setting("KB_INGEST_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+        commit_every=_ingest_setting("KB_INGEST_COMMIT_ROWS", 20000),
+    )
+
+    kb_doc = db.session.query(KbDocument).filter(KbDocument.file_id == file_id).first()
+    if kb_doc is None:
+        kb_doc = KbDocument(id=str(uuid.uuid4()), file_id=file_id, title=source)
+        db.session.add(kb_doc)
+    kb_doc.content_hash = prepared.get("content_hash")
+    db.session.flush()
+    doc_summary.refresh_summary(file_id, ingested_at=now)
+
+    db.session.commit()
+    return written
 
 
 # 导出兼容函数 (供 API 调用)
 
-def ingest_kb(file_id: str, tag: str = "general") -> int:
+def ingest_kb(
+        file_id: str,
+        tag: str = "general",
+        force: bool = False,
+        progress: Optional[ProgressFn] = None,
+        strategy: Optional[str] = None,
+) -> int:
     try:
-        return IngestLogic.ingest_file(file_id, tag)
+        return IngestLogic.ingest_file(file_id, tag, force=force, progress=progress, strategy=strategy)
     except Exception as e:
         raise KbIngestError(str(e)) from e
 
@@ -96,6 +469,8 @@ def ingest_kb(file_id: str, tag: str = "general") -> int:
 def delete_doc(file_id: str) -> None:
     try:
         db.session.query(KbBlock).filter(KbBlock.file_id == file_id).delete()
+        term_index.delete_file_terms(file_id)
+        doc_summary.delete_summary(file_id)
         db.session.commit()
     except Exception as e:
         db.session.rollback()
@@ -104,36 +479,6 @@ def delete_doc(file_id: str) -> None:
 
 def list_docs(page: int = 1, page_size: int = 20, tag: Optional[str] = None) -> Tuple[List[Dict], int]:
     """
-    列出知识库中的文档
+    列出知识库中的文档（读 kb_documents 汇总，见 domain/kb/doc_summary.py）
     """
-    q = db.session.query(
-        KbBlock.file_id,
-        func.count(KbBlock.id).label("chunk_count"),
-        func.max(KbBlock.created_at).label("last_ingest_time")
-    )
-
-    if tag:
-        q = q.filter(KbBlock.tag == tag)
-
-    q = q.group_by(KbBlock.file_id)
-
-    total = q.count()
-    rows = q.offset((page - 1) * page_size).limit(page_size).all()
-
-    result = []
-    if rows:
-        file_ids = [r.file_id for r in rows]
-        files = db.session.query(File).filter(File.id.in_(file_ids)).all()
-        file_map = {f.id: f for f in files}
-
-        for r in rows:
-            f = file_map.get(r.file_id)
-            result.append({
-                "file_id": r.file_id,
-                "file_name": f.filename if f else "Unknown",
-                "chunk_count": r.chunk_count,
-                "created_at": r.last_ingest_time,
-                "tag": tag or "mixed"
-            })
-
-    return result, total
\ No newline at end of file
+    return doc_summary.list_summaries(page=page, page_size=page_size, tag=tag)
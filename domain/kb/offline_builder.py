@@ -11,20 +11,16 @@ from docx import Document as DocxDocument
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.extensions import db
-from app.models import KbDocument, KbBlock
+from app.models import File, KbDocument
+from domain.kb import doc_summary
+from domain.kb.block_writer import build_block_row, bulk_insert_blocks
+from domain.kb.pipeline import CheckpointLog, load_checkpoint, run_pipeline
 
 
 class KbOfflineBuildError(Exception):
     pass
 
 
-def _kb_storage_dir() -> Path:
-    base = Path(current_app.instance_path) / "kb_storage"
-    (base / "blocks").mkdir(parents=True, exist_ok=True)
-    (base / "exports").mkdir(parents=True, exist_ok=True)
-    return base
-
-
 def _read_docx_text(path: Path) -> str:
     doc = DocxDocument(str(path))
     parts: List[str] = []
@@ -50,31 +46,24 @@ def _chunk_text(text: str, chunk_chars: int = 1500, overlap: int = 200) -> List[
     return chunks
 
 
-def _write_block_docx(block_path: Path, title: str, content: str) -> None:
-    block_path.parent.mkdir(parents=True, exist_ok=True)
-    d = DocxDocument()
-    d.add_heading(title, level=1)
-    for line in content.splitlines():
-        d.add_paragraph(line)
-    d.save(str(block_path))
-
-
-def ingest_docx_file_offline(
+def prepare_docx_offline(
     file_path: str,
     title: Optional[str] = None,
-    tag: Optional[str] = None,
     chunk_chars: int = 1500,
     overlap: int = 200,
 ) -> dict:
+    """
+    离线入库的纯计算部分：读 docx -> 定长切片。
+    不访问数据库、不依赖 app context，可在子进程里并发执行。
+    切片 docx 不在入库时生成，导出时按需生成并缓存（domain/kb/block_docx_cache.py）。
+    """
     p = Path(file_path).expanduser().resolve()
     if not p.exists():
         raise KbOfflineBuildError(f"file not found: {p}")
     if p.suffix.lower() != ".docx":
         raise KbOfflineBuildError(f"only .docx supported: {p}")
 
-    storage = _kb_storage_dir()
     doc_id = str(uuid.uuid4())
-    file_id = str(uuid.uuid4())
     doc_title = title or p.stem
 
     text = _read_docx_text(p)
@@ -85,69 +74,118 @@ def ingest_docx_file_offline(
     if not chunks:
         raise KbOfflineBuildError(f"no chunks generated: {p}")
 
-    # 记录生成过哪些 block 文件，失败时可清理
-    created_block_files: List[Path] = []
+    blocks = []
+    for idx, (start_i, end_i, chunk) in enumerate(chunks, start=1):
+        blocks.append(
+            {
+                "block_id": str(uuid.uuid4()),
+                "chunk_index": idx,
+                "section_title": f"{doc_title} - chunk {idx}",
+                "section_path": f"/chunk/{idx}",
+                "start_idx": start_i,
+                "end_idx": end_i,
+                "content_text": chunk,
+            }
+        )
+
+    return {
+        "path": str(p),
+        "doc_id": doc_id,
+        "title": doc_title,
+        "size": int(p.stat().st_size),
+        "blocks": blocks,
+    }
+
+
+def write_prepared_offline(prepared: dict, tag: Optional[str] = None) -> dict:
+    """
+    把 prepare_docx_offline 的结果写入数据库（File + KbDocument + 切片），整份文档一次提交。
+    """
+    p = Path(prepared["path"])
+    doc_id = prepared["doc_id"]
+    file_id = str(uuid.uuid4())
+    blocks = prepared["blocks"]
 
     try:
-        # ✅ 先插父表
-        kb_doc = KbDocument(
-            id=doc_id,
-            file_id=file_id,
-            title=doc_title,
-            created_at=datetime.utcnow(),  # 更稳：即使 DB 没 server_default 也不为 NULL
+        # ✅ 先登记 File + KbDocument（检索接口通过 File.filename 展示来源）
+        db.session.add(
+            File(
+                id=file_id,
+                filename=p.name,
+                ext="docx",
+                size=int(prepared["size"]),
+                storage_path=str(p),
+                created_at=datetime.now(),
+            )
+        )
+        db.session.add(
+            KbDocument(
+                id=doc_id,
+                file_id=file_id,
+                title=prepared["title"],
+                created_at=datetime.utcnow(),  # 更稳：即使 DB 没 server_default 也不为 NULL
+            )
         )
-        db.session.add(kb_doc)
-
-        # ✅ 强制 flush：确保 kb_documents 先落库，外键才能过
         db.session.flush()
 
-        blocks_dir = storage / "blocks" / doc_id
-        created = 0
-
-        for idx, (start_i, end_i, chunk) in enumerate(chunks, start=1):
-            block_id = str(uuid.uuid4())
-            section_title = f"{doc_title} - chunk {idx}"
-            section_path = f"/chunk/{idx}"
-
-            block_docx_path = blocks_dir / f"{block_id}.docx"
-            _write_block_docx(block_docx_path, section_title, chunk)
-            created_block_files.append(block_docx_path)
-
-            kb_block = KbBlock(
-                id=block_id,
-                doc_id=doc_id,
+        now = datetime.now()
+        rows = [
+            build_block_row(
+                block_id=b["block_id"],
+                file_id=file_id,
+                content_text=b["content_text"],
                 tag=tag,
-                section_title=section_title,
-                section_path=section_path,
-                content_text=chunk,
-                start_idx=start_i,
-                end_idx=end_i,
-                block_docx_path=str(block_docx_path),
+                meta={
+                    "chunk_index": b["chunk_index"],
+                    "source": p.name,
+                    "doc_id": doc_id,
+                    "section_title": b["section_title"],
+                    "section_path": b["section_path"],
+                    "start_idx": b["start_idx"],
+                    "end_idx": b["end_idx"],
+                    # 切片 docx 导出时按需生成（domain/kb/block_docx_cache.py）
+                    "block_docx": "lazy",
+                },
+                created_at=now,
             )
-            db.session.add(kb_block)
-            created += 1
+            for b in blocks
+        ]
 
+        # ✅ Core 批量写入（切片 + bigram 倒排）
+        created = bulk_insert_blocks(rows)
+        doc_summary.refresh_summary(file_id, ingested_at=now)
         db.session.commit()
         return {
             "status": "ok",
             "doc_id": doc_id,
             "file_id": file_id,
-            "title": doc_title,
+            "title": prepared["title"],
             "blocks_created": created,
             "source_path": str(p),
+            "path": str(p),
         }
 
     except Exception as e:
         db.session.rollback()
-        # 可选：清理刚生成的 block docx，避免污染目录
-        for fp in created_block_files:
-            try:
-                fp.unlink(missing_ok=True)
-            except Exception:
-                pass
         raise KbOfflineBuildError(str(e)) from e
 
 
+def ingest_docx_file_offline(
+    file_path: str,
+    title: Optional[str] = None,
+    tag: Optional[str] = None,
+    chunk_chars: int = 1500,
+    overlap: int = 200,
+) -> dict:
+    prepared = prepare_docx_offline(
+        file_path,
+        title=title,
+        chunk_chars=chunk_chars,
+        overlap=overlap,
+    )
+    return write_prepared_offline(prepared, tag=tag)
+
+
 def ingest_dir_offline(
     root: str,
     pattern: str = "*.docx",
@@ -155,7 +193,15 @@ def ingest_dir_offline(
     chunk_chars: int = 1500,
     overlap: int = 200,
     exclude_subdirs: Optional[List[str]] = None,
+    workers: int = 1,
+    checkpoint: Optional[str] = None,
+    fresh: bool = False,
 ) -> list[dict]:
+    """
+    递归入库目录下的 docx。
+      - workers>1：子进程并发读取/切片（切片 docx 不在入库时生成），当前进程单线程批量写库
+      - checkpoint：jsonl 检查点路径；已成功的文件会被跳过，中断后重跑可续上
+    """
     base = Path(root).expanduser().resolve()
     if not base.exists():
         raise KbOfflineBuildError(f"root not found: {base}")
@@ -163,26 +209,43 @@ def ingest_dir_offline(
     exclude_subdirs = exclude_subdirs or ["instance/kb_storage", "instance\\kb_storage"]
     exclude_paths = [(base / x).resolve() for x in exclude_subdirs]
 
-    results: list[dict] = []
-
+    paths: List[str] = []
     for p in base.rglob(pattern):
         rp = p.resolve()
         # ✅ 排除 instance/kb_storage 下的 docx（这些是你生成的 block 文件）
         if any(str(rp).startswith(str(ex)) for ex in exclude_paths):
             continue
+        paths.append(str(rp))
 
-        try:
-            r = ingest_docx_file_offline(
-                file_path=str(rp),
-                title=rp.stem,
-                tag=tag,
-                chunk_chars=chunk_chars,
-                overlap=overlap,
-            )
-            results.append(r)
-        except Exception as e:
-            results.append({"status": "failed", "path": str(rp), "error": str(e)})
-            # ✅ 继续下一份文件，别让 session 卡死
-            db.session.rollback()
+    log = None
+    if checkpoint:
+        cp = Path(checkpoint).expanduser().resolve()
+        done = set() if fresh else load_checkpoint(cp)
+        paths = [x for x in paths if x not in done]
+        log = CheckpointLog(cp, fresh=fresh)
+
+    results: list[dict] = []
+
+    def _on_result(res: dict) -> None:
+        results.append(res)
+        if log is not None:
+            log.append(res)
+
+    try:
+        stats = run_pipeline(
+            paths,
+            prepare_docx_offline,
+            lambda prepared: write_prepared_offline(prepared, tag=tag),
+            workers=workers,
+            prepare_kwargs={
+                "chunk_chars": chunk_chars,
+                "overlap": overlap,
+            },
+            on_result=_on_result,
+        )
+    finally:
+        if log is not None:
+            log.close()
 
+    current_app.logger.info(f"ingest_dir_offline: {stats}")
     return results
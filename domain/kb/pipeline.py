@@ -0,0 +1,185 @@
+# domain/kb/pipeline.py
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from app.extensions import db
+
+# 离线入库流水线：
+#   子进程池并发做「解析 + 切片」（纯计算，不碰数据库），
+#   主进程作为唯一写入方，按完成顺序批量写库，并把每个文件的结果追加到 jsonl 检查点。
+# 中断后重跑时，检查点里已成功的文件会被跳过。
+
+PrepareFn = Callable[..., Dict[str, Any]]
+WriteFn = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+DONE_STATUSES = ("ok", "skipped")
+
+
+def load_checkpoint(path: Path) -> Set[str]:
+    """
+    读取 jsonl 检查点，返回已完成（ok / skipped）的源文件路径集合
+    """
+    done: Set[str] = set()
+    if not path.exists():
+        return done
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                # 中断时可能留下半行，忽略即可
+                continue
+            if rec.get("status") in DONE_STATUSES and rec.get("path"):
+                done.add(rec["path"])
+    return done
+
+
+class CheckpointLog:
+    """
+    逐条追加写 jsonl（每条 flush），进程被杀时最多丢失正在写的一行
+    """
+
+    def __init__(self, path: Path, fresh: bool = False):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fp = self.path.open("w" if fresh else "a", encoding="utf-8")
+
+    def append(self, record: Dict[str, Any]) -> None:
+        self._fp.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._fp.flush()
+
+    def close(self) -> None:
+        self._fp.close()
+
+
+class Throughput:
+    def __init__(self, total: int, report_every: float = 10.0):
+        self.total = total
+        self.report_every = report_every
+        self.started = time.perf_counter()
+        self._last_report = self.started
+        self.done = 0
+        self.ok = 0
+        self.failed = 0
+        self.skipped = 0
+        self.chunks = 0
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.done += 1
+        status = result.get("status")
+        if status == "ok":
+            self.ok += 1
+        elif status == "skipped":
+            self.skipped += 1
+        else:
+            self.failed += 1
+        self.chunks += int(result.get("chunks") or result.get("blocks_created") or 0)
+
+        now = time.perf_counter()
+        if now - self._last_report >= self.report_every or self.done == self.total:
+            self._last_report = now
+            print(self.line())
+
+    def summary(self) -> Dict[str, Any]:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        return {
+            "total": self.total,
+            "done": self.done,
+            "ok": self.ok,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "chunks": self.chunks,
+            "elapsed_sec": round(elapsed, 2),
+            "files_per_sec": round(self.done / elapsed, 3),
+            "chunks_per_sec": round(self.chunks / elapsed, 1),
+        }
+
+    def line(self) -> str:
+        s = self.summary()
+        remain = self.total - self.done
+        eta = remain / s["files_per_sec"] if s["files_per_sec"] > 0 else 0
+        return (
+            f"[{s['done']}/{s['total']}] ok={s['ok']} skipped={s['skipped']} fail={s['failed']} "
+            f"{s['files_per_sec']} files/s {s['chunks_per_sec']} chunks/s "
+            f"elapsed={s['elapsed_sec']}s eta={eta:.0f}s"
+        )
+
+
+def _safe_write(write_fn: WriteFn, prepared: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return write_fn(prepared)
+    except Exception as e:
+        # ✅ 单个文件写入失败时回滚，别让 session 卡死
+        db.session.rollback()
+        return {"status": "failed", "path": prepared.get("path"), "error": str(e)}
+
+
+def run_pipeline(
+    paths: Iterable[str],
+    prepare_fn: PrepareFn,
+    write_fn: WriteFn,
+    *,
+    workers: int = 1,
+    prepare_kwargs: Optional[Dict[str, Any]] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+    report_every: float = 10.0,
+) -> Dict[str, Any]:
+    """
+    prepare_fn(path, **prepare_kwargs) 在子进程执行（workers<=1 时在当前进程执行），必须是模块级函数；
+    write_fn(prepared) 在当前进程（需要 app context）执行，返回结果 dict（含 status / path）。
+    返回吞吐统计。
+    """
+    path_list: List[str] = list(paths)
+    prepare_kwargs = prepare_kwargs or {}
+    stats = Throughput(total=len(path_list), report_every=report_every)
+
+    def _emit(result: Dict[str, Any]) -> None:
+        stats.add(result)
+        if on_result is not None:
+            on_result(result)
+
+    if workers <= 1:
+        for p in path_list:
+            try:
+                prepared = prepare_fn(p, **prepare_kwargs)
+            except Exception as e:
+                _emit({"status": "failed", "path": p, "error": str(e)})
+                continue
+            _emit(_safe_write(write_fn, prepared))
+        return stats.summary()
+
+    # 控制在途任务数量，避免切片结果堆积在内存里
+    max_in_flight = workers * 2
+    it = iter(path_list)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+
+        def _fill() -> None:
+            while len(pending) < max_in_flight:
+                p = next(it, None)
+                if p is None:
+                    return
+                pending[pool.submit(prepare_fn, p, **prepare_kwargs)] = p
+
+        _fill()
+        while pending:
+            done, _ = wait(list(pending), return_when=FIRST_COMPLETED)
+            for fut in done:
+                p = pending.pop(fut)
+                try:
+                    prepared = fut.result()
+                except Exception as e:
+                    _emit({"status": "failed", "path": p, "error": str(e)})
+                    continue
+                _emit(_safe_write(write_fn, prepared))
+            _fill()
+
+    return stats.summary()
@@ -1,15 +1,131 @@
-from typing import Any, Dict, Iterable, List, Optional
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-from sqlalchemy import and_, case, desc, func
+from sqlalchemy import and_, case, desc, func, literal, or_
 
 from app.extensions import db
 from app.models import KbBlock, File  # 引入 File 模型用于关联
+from domain.kb import search_cache
+from domain.kb.term_index import match_block_ids
 
 
 class KbSearchError(ValueError):
     pass
 
 
+# 总数统计方式：exact = 精确 count；capped = 最多数到 count_cap（超过时 total_capped=True）；none = 不统计
+COUNT_MODES = ("exact", "capped", "none")
+DEFAULT_COUNT_CAP = 1000
+
+
+def _encode_cursor(score: int, created_at: Optional[datetime], block_id: str, seen: int) -> str:
+    payload = [score, created_at.isoformat() if created_at else None, block_id, seen]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, Optional[datetime], str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        score, created_at, block_id, seen = json.loads(raw.decode("utf-8"))
+        return (
+            int(score),
+            datetime.fromisoformat(created_at) if created_at else None,
+            str(block_id),
+            max(int(seen), 0),
+        )
+    except (TypeError, ValueError) as exc:
+        raise KbSearchError("invalid cursor") from exc
+
+
+# 返回字段投影：fields 为空时保持旧的返回结构（含完整 content_text）；
+# API 默认只返回摘要片段（snippet + highlights），完整正文按需走 GET /api/v1/kb/blocks/<block_id>
+SEARCH_FIELDS = (
+    "block_id", "file_id", "filename", "score", "tag", "meta",
+    "content_len", "content_text", "snippet", "highlights",
+)
+LEGACY_FIELDS = ("block_id", "file_id", "filename", "score", "content_text", "meta")
+SNIPPET_FIELDS = ("block_id", "file_id", "filename", "score", "meta", "content_len", "snippet", "highlights")
+DEFAULT_SNIPPET_CHARS = 160
+
+
+def parse_fields(fields) -> Optional[Tuple[str, ...]]:
+    """
+    fields 可以是列表或逗号分隔字符串；返回规范化（排序去重）的字段元组，None 表示旧结构
+    """
+    if fields is None:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    if not isinstance(fields, (list, tuple)):
+        raise KbSearchError("fields must be an array of strings or a comma separated string")
+    names = {f.strip() for f in fields if isinstance(f, str) and f.strip()}
+    unknown = names - set(SEARCH_FIELDS)
+    if unknown:
+        raise KbSearchError(f"unknown fields: {', '.join(sorted(unknown))}")
+    names.add("block_id")
+    return tuple(sorted(names))
+
+
+def _snippet_chars(snippet_chars: Optional[int]) -> int:
+    if snippet_chars:
+        return max(int(snippet_chars), 20)
+    try:
+        from flask import current_app
+        return int(current_app.config.get("KB_SEARCH_SNIPPET_CHARS", DEFAULT_SNIPPET_CHARS))
+    except (RuntimeError, TypeError, ValueError):
+        return DEFAULT_SNIPPET_CHARS
+
+
+def _highlights(snippet: str, needle: str) -> List[List[int]]:
+    if not snippet or not needle:
+        return []
+    hay = snippet.lower()
+    out: List[List[int]] = []
+    start = hay.find(needle)
+    while start >= 0:
+        out.append([start, start + len(needle)])
+        start = hay.find(needle, start + len(needle))
+    return out
+
+
+def get_block(block_id: str) -> Optional[Dict[str, Any]]:
+    """
+    单个切片的完整内容（检索结果只带摘要，预览全文时调用）
+    """
+    row = (
+        db.session.query(KbBlock, File.filename)
+        .outerjoin(File, KbBlock.file_id == File.id)
+        .filter(KbBlock.id == block_id)
+        .first()
+    )
+    if row is None:
+        return None
+    block, filename = row
+    return {
+        "block_id": block.id,
+        "file_id": block.file_id,
+        "filename": filename,
+        "tag": block.tag,
+        "content_text": block.content_text,
+        "content_len": block.content_len,
+        "meta": block.meta_json,
+        "created_at": block.created_at.isoformat() if block.created_at else None,
+    }
+
+
+def _count_cap(count_cap: Optional[int]) -> int:
+    if count_cap:
+        return max(int(count_cap), 1)
+    try:
+        from flask import current_app
+        return int(current_app.config.get("KB_SEARCH_COUNT_CAP", DEFAULT_COUNT_CAP))
+    except (RuntimeError, TypeError, ValueError):
+        return DEFAULT_COUNT_CAP
+
+
 def _normalize_keywords(keywords: Optional[Iterable[str]]) -> List[str]:
     if not keywords:
         return []
@@ -24,7 +140,71 @@ def search_blocks(
         title_keywords: Optional[Iterable[str]],
         page: int,
         page_size: int,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        count_cap: Optional[int] = None,
+        fields=None,
+        snippet_chars: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    KB 检索入口：先查检索缓存（domain/kb/search_cache.py），未命中再查库。
+    参数含义见 _search_blocks。
+    """
+    fields = parse_fields(fields)
+    params = dict(
+        query=query,
+        top_k=top_k,
+        by_tag=by_tag,
+        title_keywords=title_keywords,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count=count,
+        count_cap=count_cap,
+        fields=fields,
+        snippet_chars=snippet_chars,
+    )
+    if title_keywords is not None and not isinstance(title_keywords, (list, tuple)):
+        return _search_blocks(**params)
+
+    key = ("search_blocks",) + search_cache.normalize_key(
+        query=query,
+        tag=by_tag,
+        title_keywords=title_keywords,
+        top_k=top_k,
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count=count,
+        count_cap=count_cap,
+        fields=list(fields) if fields is not None else None,
+        snippet_chars=snippet_chars,
+    )
+    return search_cache.cached(key, lambda: _search_blocks(**params))
+
+
+def _search_blocks(
+        *,
+        query: Optional[str],
+        top_k: Optional[int],
+        by_tag: Optional[str],
+        title_keywords: Optional[Iterable[str]],
+        page: int,
+        page_size: int,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        count_cap: Optional[int] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+        snippet_chars: Optional[int] = None,
 ) -> Dict[str, Any]:
+    """
+    两种翻页方式：
+      - page / page_size：OFFSET 翻页（兼容旧调用）
+      - cursor：上一页返回的 next_cursor（按 score, created_at, id 做 keyset），省掉 OFFSET 跳过行的读取与排序；
+        score 是现算的表达式、没有索引可走，每一页仍要给全部命中行打分，单页代价随命中数增长（与页深无关的只有 OFFSET 那部分）
+    count 控制 total 的统计方式（exact / capped / none），见 COUNT_MODES
+    fields 控制返回字段（见 SEARCH_FIELDS）；snippet 在 SQL 里按命中位置截取，不需要时不读取 content_text
+    """
     q = (query or "").strip()
     tag = (by_tag or "").strip()
     if title_keywords is not None and not isinstance(title_keywords, (list, tuple)):
@@ -37,6 +217,10 @@ def search_blocks(
         top_k = max(int(top_k or 0), 0)
     except (TypeError, ValueError) as exc:
         raise KbSearchError("top_k must be an integer") from exc
+    count = (count or "exact").strip().lower()
+    if count not in COUNT_MODES:
+        raise KbSearchError(f"count must be one of {', '.join(COUNT_MODES)}")
+    after = _decode_cursor(cursor) if cursor else None
 
     # ==========================================
     # 核心查询构建：KbBlock JOIN File
@@ -65,8 +249,11 @@ def search_blocks(
             )
         score_parts.append(sum(title_hits))
 
-    # 内容匹配
+    # 内容匹配：先用 bigram 倒排缩小候选集，再用 LIKE 精确校验
     if q:
+        candidate_ids = match_block_ids(q)
+        if candidate_ids is not None:
+            filters.append(KbBlock.id.in_(candidate_ids))
         filters.append(func.lower(KbBlock.content_text).like(f"%{q.lower()}%"))
         score_parts.append(
             case(
@@ -81,39 +268,137 @@ def search_blocks(
     if filters:
         query_base = query_base.filter(and_(*filters))
 
-    # 4. 统计总数
-    total = query_base.count()
-    if top_k:
-        total = min(total, top_k)
+    # 4. 统计总数（有 top_k 时最多数到 top_k，结果与 min(count, top_k) 相同）
+    total: Optional[int] = None
+    total_capped = False
+    if count != "none":
+        cap = top_k or None
+        if count == "capped":
+            cap = min(cap, _count_cap(count_cap)) if cap else _count_cap(count_cap)
+        if cap:
+            limited = query_base.with_entities(KbBlock.id).limit(cap + 1).subquery()
+            total = db.session.query(func.count()).select_from(limited).scalar() or 0
+            if total > cap:
+                total = cap
+                total_capped = not (top_k and cap == top_k)
+        else:
+            total = query_base.count()
 
-    offset = (page - 1) * page_size
-    if top_k and offset >= top_k:
-        return {"page": page, "page_size": page_size, "total": total, "items": []}
+    if after is not None:
+        seen = after[3]
+        offset = 0
+    else:
+        offset = (page - 1) * page_size
+        seen = offset
+
+    def _empty() -> Dict[str, Any]:
+        return {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_capped": total_capped,
+            "next_cursor": None,
+            "items": [],
+        }
+
+    if top_k and seen >= top_k:
+        return _empty()
 
     limit = page_size
     if top_k:
-        limit = min(page_size, top_k - offset)
+        limit = min(page_size, top_k - seen)
+
+    # 5. 执行查询（多取一行判断是否还有下一页）；只取需要的列
+    wanted = set(fields or LEGACY_FIELDS)
+    columns = [
+        KbBlock.id.label("id"),
+        KbBlock.created_at.label("created_at"),
+        score_expr.label("score"),
+        KbBlock.file_id.label("file_id"),
+    ]
+    if "filename" in wanted:
+        columns.append(File.filename.label("filename"))
+    if "tag" in wanted:
+        columns.append(KbBlock.tag.label("tag"))
+    if "meta" in wanted:
+        columns.append(KbBlock.meta_json.label("meta_json"))
+    if "content_len" in wanted:
+        columns.append(KbBlock.content_len.label("content_len"))
+    if "content_text" in wanted:
+        columns.append(KbBlock.content_text.label("content_text"))
+    needle = q.lower()
+    if wanted & {"snippet", "highlights"}:
+        # 摘要窗口：命中位置前留 1/3 的上下文，只把窗口内的文本传回应用
+        width = _snippet_chars(snippet_chars)
+        lead = width // 3
+        if needle:
+            pos = func.instr(func.lower(KbBlock.content_text), needle)
+            start = case((pos > lead, pos - lead), else_=1)
+        else:
+            start = literal(1)
+        columns.append(start.label("snippet_start"))
+        columns.append(func.substr(KbBlock.content_text, start, width + len(needle)).label("snippet"))
 
-    # 5. 执行查询
+    rows_q = query_base.with_entities(*columns)
+    if after is not None:
+        a_score, a_created, a_id, _ = after
+        if a_created is None:
+            rows_q = rows_q.filter(or_(
+                score_expr < a_score,
+                and_(score_expr == a_score, KbBlock.created_at.is_(None), KbBlock.id < a_id),
+            ))
+        else:
+            # created_at 降序时 NULL 排在最后（SQLite / MySQL 都把 NULL 当最小值），同分的 NULL 行都在游标之后
+            rows_q = rows_q.filter(or_(
+                score_expr < a_score,
+                and_(score_expr == a_score, KbBlock.created_at < a_created),
+                and_(score_expr == a_score, KbBlock.created_at.is_(None)),
+                and_(score_expr == a_score, KbBlock.created_at == a_created, KbBlock.id < a_id),
+            ))
     rows = (
-        query_base.with_entities(KbBlock, File, score_expr.label("score"))
-        .order_by(desc("score"), desc(KbBlock.created_at))
+        rows_q.order_by(desc("score"), desc(KbBlock.created_at), desc(KbBlock.id))
         .offset(offset)
-        .limit(limit)
+        .limit(limit + 1)
         .all()
     )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
     items: List[Dict[str, Any]] = []
-    for block, file_rec, score in rows:
-        items.append(
-            {
-                "block_id": block.id,
-                "file_id": block.file_id,
-                "filename": file_rec.filename,  # 替代 section_title
-                "score": int(score or 0),
-                "content_text": block.content_text,
-                "meta": block.meta_json,  # 包含 chunk_index 等信息
-            }
-        )
+    for r in rows:
+        item: Dict[str, Any] = {
+            "block_id": r.id,
+            "file_id": r.file_id,
+            "filename": r.filename if "filename" in wanted else None,  # 替代 section_title
+            "score": int(r.score or 0),
+            "tag": r.tag if "tag" in wanted else None,
+            "meta": r.meta_json if "meta" in wanted else None,  # 包含 chunk_index 等信息
+            "content_len": r.content_len if "content_len" in wanted else None,
+            "content_text": r.content_text if "content_text" in wanted else None,
+        }
+        if wanted & {"snippet", "highlights"}:
+            snippet = r.snippet or ""
+            item["snippet"] = snippet
+            item["snippet_offset"] = int(r.snippet_start or 1) - 1
+            item["highlights"] = _highlights(snippet, needle)
+        if fields is None:
+            items.append({k: item[k] for k in LEGACY_FIELDS})
+        else:
+            keep = set(fields)
+            if "snippet" in keep:
+                keep.add("snippet_offset")
+            items.append({k: v for k, v in item.items() if k in keep})
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        next_cursor = _encode_cursor(int(last.score or 0), last.created_at, last.id, seen + len(rows))
 
-    return {"page": page, "page_size": page_size, "total": total, "items": items}
\ No newline at end of file
+    return {
+        "page": page,
+        "page_size": page_size,
+        "total": total,
+        "total_capped": total_capped,
+        "next_cursor": next_cursor,
+        "items": items,
+    }
\ No newline at end of file
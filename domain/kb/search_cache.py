@@ -0,0 +1,255 @@
+# domain/kb/search_cache.py
+from __future__ import annotations
+
+import copy
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# KB 检索结果缓存：
+#   - 进程内 LRU（每个 Flask app 一份，挂在 app.extensions 上）
+#   - 可选的磁盘共享层（KB_SEARCH_CACHE_DIR），多进程共用
+# 失效靠「KB 代次」：入库 / 删除 / 重建索引写库时标记 session，提交成功后换一个新代次，
+# 旧代次的缓存条目自然不再命中（提交之后才换代次，避免把提交前的旧结果缓存到新代次下）。
+# 换代次只发生在提交的那个进程里：离线入库脚本、离线流水线等其它进程写库时，
+# 只有共用磁盘层（代次记在 KB_SEARCH_CACHE_DIR/generation）的进程能感知到，
+# 所以条目另有存活时间（KB_SEARCH_CACHE_TTL_SECONDS），过期即视为未命中，兜底跨进程写入。
+
+DEFAULT_CACHE_SIZE = 256
+DEFAULT_TTL_SECONDS = 300
+
+_SESSION_FLAG = "kb_search_dirty"
+_EXT_KEY = "kb_search_cache"
+
+
+def _new_generation() -> str:
+    return f"{time.time_ns():x}-{uuid.uuid4().hex[:8]}"
+
+
+class SearchCache:
+    def __init__(
+            self,
+            maxsize: int = DEFAULT_CACHE_SIZE,
+            disk_dir: Optional[str] = None,
+            ttl: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.maxsize = max(int(maxsize), 0)
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        # 条目存活秒数，0 = 不过期（只靠换代次失效）
+        self.ttl = max(float(ttl or 0), 0.0)
+        self._lock = threading.Lock()
+        # full_key -> (写入时间 time.time(), value)
+        self._entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+        self._generation = _new_generation()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            if not self._generation_file().exists():
+                self._write_generation(self._generation)
+
+    # ---------- 代次 ----------
+
+    def _generation_file(self) -> Path:
+        return self.disk_dir / "generation"
+
+    def _write_generation(self, token: str) -> None:
+        tmp = self._generation_file().with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp.write_text(token, encoding="utf-8")
+        os.replace(tmp, self._generation_file())
+
+    def generation(self) -> str:
+        if self.disk_dir is not None:
+            try:
+                return self._generation_file().read_text(encoding="utf-8").strip() or self._generation
+            except OSError:
+                return self._generation
+        return self._generation
+
+    def bump_generation(self) -> str:
+        token = _new_generation()
+        with self._lock:
+            self._generation = token
+            self._entries.clear()
+        if self.disk_dir is not None:
+            self._write_generation(token)
+            # 清掉旧代次的磁盘条目（尽力而为）
+            for child in self.disk_dir.iterdir():
+                if child.is_dir() and child.name != token:
+                    shutil.rmtree(child, ignore_errors=True)
+        return token
+
+    # ---------- 读写 ----------
+
+    def _disk_path(self, generation: str, key: Tuple) -> Path:
+        digest = hashlib.sha1(json.dumps(key, ensure_ascii=False).encode("utf-8")).hexdigest()
+        return self.disk_dir / generation / digest[:2] / f"{digest}.json"
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return bool(self.ttl) and now - stored_at > self.ttl
+
+    def get(self, key: Tuple) -> Optional[Any]:
+        generation = self.generation()
+        full_key = (generation,) + key
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                stored_at, value = entry
+                if self._expired(stored_at, now):
+                    del self._entries[full_key]
+                else:
+                    self._entries.move_to_end(full_key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+
+        if self.disk_dir is not None:
+            path = self._disk_path(generation, key)
+            try:
+                stored_at = path.stat().st_mtime
+                value = None if self._expired(stored_at, now) else json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                self._remember(full_key, value, stored_at)
+                return copy.deepcopy(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: Tuple, value: Any, generation: Optional[str] = None) -> None:
+        """
+        generation：查询开始前读到的代次。查询期间若有提交换了代次，结果只会落在旧代次下，不会污染新代次
+        """
+        generation = generation or self.generation()
+        self._remember((generation,) + key, copy.deepcopy(value), time.time())
+
+        if self.disk_dir is not None:
+            path = self._disk_path(generation, key)
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+                tmp.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+                os.replace(tmp, path)
+            except OSError:
+                pass
+
+    def _remember(self, full_key: Tuple, value: Any, stored_at: float) -> None:
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._entries[full_key] = (stored_at, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "enabled": True,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+                "generation": self._generation if self.disk_dir is None else self.generation(),
+                "disk_dir": str(self.disk_dir) if self.disk_dir is not None else None,
+            }
+
+
+def get_cache() -> Optional[SearchCache]:
+    """
+    当前 app 的检索缓存；KB_SEARCH_CACHE_SIZE=0 且未配置磁盘层时返回 None（关闭缓存）
+    """
+    try:
+        from flask import current_app
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return None
+
+    cache = app.extensions.get(_EXT_KEY)
+    if cache is None:
+        size = int(app.config.get("KB_SEARCH_CACHE_SIZE", DEFAULT_CACHE_SIZE) or 0)
+        disk_dir = app.config.get("KB_SEARCH_CACHE_DIR") or None
+        if not size and not disk_dir:
+            return None
+        ttl = app.config.get("KB_SEARCH_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+        cache = app.extensions.setdefault(_EXT_KEY, SearchCache(maxsize=size, disk_dir=disk_dir, ttl=ttl))
+    return cache
+
+
+def cached(key: Tuple, compute: Callable[[], Any]) -> Any:
+    """
+    查缓存，未命中时调用 compute() 并写入（结果须可 JSON 序列化）；缓存关闭时直接 compute()
+    """
+    cache = get_cache()
+    if cache is None:
+        return compute()
+    generation = cache.generation()
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.put(key, value, generation=generation)
+    return value
+
+
+def normalize_key(
+        *,
+        query: Optional[str],
+        tag: Optional[str],
+        title_keywords,
+        **params: Any,
+) -> Tuple:
+    # 检索本身大小写不敏感（LIKE 两侧都 lower），这里同样小写化；
+    # 标题关键词顺序不影响得分，但重复出现会累加得分，所以只排序不去重
+    q = (query or "").strip().lower()
+    t = (tag or "").strip()
+    kws = tuple(sorted(kw.strip().lower() for kw in (title_keywords or []) if isinstance(kw, str) and kw.strip()))
+    return (q, t, kws) + tuple(sorted(params.items()))
+
+
+def mark_dirty(session=None) -> None:
+    """
+    标记当前事务改动了知识库；事务提交成功后换代次
+    """
+    if session is None:
+        from app.extensions import db
+        session = db.session
+    session.info[_SESSION_FLAG] = True
+
+
+def stats() -> Dict[str, Any]:
+    cache = get_cache()
+    return cache.stats() if cache is not None else {"enabled": False}
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session) -> None:
+    if not session.info.pop(_SESSION_FLAG, False):
+        return
+    cache = get_cache()
+    if cache is not None:
+        cache.bump_generation()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session) -> None:
+    session.info.pop(_SESSION_FLAG, None)
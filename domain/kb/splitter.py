@@ -45,16 +45,7 @@ class SemanticTextSplitter:
             breakpoint_threshold_amount=85
         )
 
-        try:
-            # LangChain 的 create_documents 会返回 Document 对象列表
-            docs = text_splitter.create_documents([text])
-            chunks = [doc.page_content for doc in docs]
-
-            # 兜底策略：如果语义切分失败或只切出一大块（且长度过长），
-            # 可以考虑在这里加一个基于字符长度的二次切分（RecursiveCharacterTextSplitter）
-            # 但目前先保持纯语义切分
-            return chunks
-        except Exception as e:
-            print(f"Semantic split failed, fallback to simple split: {e}")
-            # 降级处理：简单的按换行符切分
-            return [t for t in text.split("\n\n") if t.strip()]
\ No newline at end of file
+        # LangChain 的 create_documents 会返回 Document 对象列表
+        # 切分失败直接抛出，由调用方（ingest._chunk_text）退回结构切分
+        docs = text_splitter.create_documents([text])
+        return [doc.page_content for doc in docs]
\ No newline at end of file
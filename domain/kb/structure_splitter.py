@@ -0,0 +1,127 @@
+import re
+from typing import List
+
+# 基于标题 / 编号结构的确定性切片：不加载模型，按「章节标题」断开，再按长度上下限合并 / 拆分。
+#   - 标题行：第X章/节/条、1 / 1.1 / 1.1.1、一、 （一）
+#   - 小于 min_chars 的小节与后续小节合并（避免只有一行标题的碎块）
+#   - 超过 max_chars 的小节按段落 -> 句子 -> 定长依次拆分
+
+DEFAULT_MIN_CHARS = 200
+DEFAULT_MAX_CHARS = 1500
+
+# 标题行一般很短；更长的编号行（如「1、供应商应……」）视为正文条目
+_HEADING_MAX_CHARS = 60
+
+_CN_NUM = "一二三四五六七八九十百零〇"
+
+_HEADING_PATTERNS = [
+    re.compile(rf"^第[{_CN_NUM}\d]+[章节篇部分条]"),
+    # 1.1 / 1.1.1（排除「3.5万元」「2.5%」这类数值）
+    re.compile(r"^\d{1,2}(?:[.．]\d{1,2}){1,3}[.．、]?\s*(?=[^\d.．%万亿元千百米个年月日天])"),
+    re.compile(r"^\d{1,2}[.．、]\s*(?=[^\d.．])"),
+    re.compile(rf"^[（(][{_CN_NUM}]+[）)]"),
+    re.compile(rf"^[{_CN_NUM}]+[、.．]"),
+]
+
+_SENTENCE_END = re.compile(r"(?<=[。！？；!?;])")
+
+
+def is_heading(line: str) -> bool:
+    line = line.strip()
+    if not line or len(line) > _HEADING_MAX_CHARS:
+        return False
+    return any(p.match(line) for p in _HEADING_PATTERNS)
+
+
+def _sections(text: str) -> List[str]:
+    sections: List[str] = []
+    buf: List[str] = []
+    for raw in text.split("\n"):
+        line = raw.rstrip()
+        if not line.strip():
+            continue
+        if buf and is_heading(line):
+            sections.append("\n".join(buf))
+            buf = []
+        buf.append(line)
+    if buf:
+        sections.append("\n".join(buf))
+    return sections
+
+
+def _pieces(line: str, max_chars: int) -> List[str]:
+    if len(line) <= max_chars:
+        return [line]
+    return [sent for sent in _SENTENCE_END.split(line) if sent]
+
+
+def _bound(section: str, max_chars: int) -> List[str]:
+    if len(section) <= max_chars:
+        return [section]
+
+    chunks: List[str] = []
+    buf = ""
+    for line in section.split("\n"):
+        sep = "\n"
+        for piece in _pieces(line, max_chars):
+            if buf and len(buf) + len(sep) + len(piece) <= max_chars:
+                buf = f"{buf}{sep}{piece}"
+                sep = ""
+                continue
+            if len(piece) > max_chars:
+                # 超长且无句读的文本：先填满当前块，再定长切
+                if buf:
+                    room = max_chars - len(buf) - len(sep)
+                    if room > 0:
+                        buf = f"{buf}{sep}{piece[:room]}"
+                        piece = piece[room:]
+                    chunks.append(buf)
+                while len(piece) > max_chars:
+                    chunks.append(piece[:max_chars])
+                    piece = piece[max_chars:]
+            elif buf:
+                chunks.append(buf)
+            buf = piece
+            # 同一段落内的后续句子直接拼接，不插入换行
+            sep = ""
+    if buf:
+        chunks.append(buf)
+    return chunks
+
+
+class StructureTextSplitter:
+    @staticmethod
+    def split_text(
+            text: str,
+            min_chars: int = DEFAULT_MIN_CHARS,
+            max_chars: int = DEFAULT_MAX_CHARS,
+    ) -> List[str]:
+        """
+        按标题 / 编号结构切分，结果确定（同样的输入总是得到同样的切片）。
+        """
+        if not text or not text.strip():
+            return []
+        max_chars = max(int(max_chars), 1)
+        min_chars = min(max(int(min_chars), 0), max_chars)
+
+        chunks: List[str] = []
+        buf = ""
+        for section in _sections(text):
+            if buf and len(buf) >= min_chars:
+                chunks.extend(_bound(buf, max_chars))
+                buf = section
+            elif buf and len(buf) + 1 + len(section) > max_chars \
+                    and chunks and len(chunks[-1]) + 1 + len(buf) <= max_chars:
+                # 碎块与后一节合并会超限：改为并入上一块，避免被拆成孤立的小块
+                chunks[-1] = f"{chunks[-1]}\n{buf}"
+                buf = section
+            else:
+                buf = f"{buf}\n{section}" if buf else section
+
+        if buf:
+            # 末尾碎块并入上一块（不超过上限时）
+            if chunks and len(buf) < min_chars and len(chunks[-1]) + 1 + len(buf) <= max_chars:
+                chunks[-1] = f"{chunks[-1]}\n{buf}"
+            else:
+                chunks.extend(_bound(buf, max_chars))
+        return chunks
@@ -0,0 +1,138 @@
+# domain/kb/term_index.py
+from __future__ import annotations
+
+import re
+from typing import Iterable, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select
+
+from app.extensions import db
+from app.models import KbBlock, KbBlockTerm
+from domain.kb import search_cache
+
+# 知识库基本是中文，按字符 bigram 建倒排：
+#   入库时把每个切片的所有 bigram 写入 kb_block_terms；
+#   检索时要求 query 的全部 bigram 都命中（AND），得到候选集，再用原 LIKE 精确校验。
+# 候选集一定是 LIKE 结果的超集，所以检索结果与原来的全表扫描一致。
+# 例外：检索词里的 % / _ 在 LIKE 里是通配符，bigram 却会把它们当普通字符，
+# 这类检索词不走倒排，保持原来的 LIKE 全表扫描（通配语义不变）。
+
+_WS_RE = re.compile(r"\s+")
+_LIKE_WILDCARDS = ("%", "_")
+
+# 单次 executemany 的行数，避免一次性拼出过大的参数列表
+_INSERT_BATCH = 5000
+
+
+def _segments(text: str) -> List[str]:
+    # 统一小写，按空白切段（LIKE 校验仍使用原文，这里只负责召回）
+    return [s for s in _WS_RE.split((text or "").lower()) if s]
+
+
+def block_terms(text: str) -> Set[str]:
+    """
+    切片内容 -> bigram 集合
+    """
+    terms: Set[str] = set()
+    for seg in _segments(text):
+        for i in range(len(seg) - 1):
+            terms.add(seg[i:i + 2])
+    return terms
+
+
+def query_terms(query: str) -> List[str]:
+    """
+    检索词 -> bigram 列表（去重、排序）。
+    检索词不足两个字符时返回空列表，调用方需要回退到 LIKE 扫描。
+    """
+    return sorted(block_terms(query))
+
+
+def has_like_wildcard(query: str) -> bool:
+    return any(ch in (query or "") for ch in _LIKE_WILDCARDS)
+
+
+def match_block_ids(query: str):
+    """
+    返回「包含 query 全部 bigram 的 block_id」子查询；无法使用索引时返回 None
+    （不足两个字符，或含 LIKE 通配符 % / _）。
+    注意：这里用 count() >= n 而不是 count(distinct term) == n，
+    MySQL 的 *_ci 排序规则可能把不同写法的 term 视为相等，>= 保证不会漏召回。
+    """
+    if has_like_wildcard(query):
+        # LIKE 通配：命中的切片不一定包含这些 bigram，走倒排会漏召回
+        return None
+    terms = query_terms(query)
+    if not terms:
+        return None
+    return (
+        select(KbBlockTerm.block_id)
+        .where(KbBlockTerm.term.in_(terms))
+        .group_by(KbBlockTerm.block_id)
+        .having(func.count() >= len(terms))
+    )
+
+
+def index_blocks(blocks: Iterable[Tuple[str, str, str]]) -> int:
+    """
+    为切片写入倒排行（不提交事务，由调用方统一 commit）。
+    blocks: (block_id, file_id, content_text)
+    返回写入的行数。
+    """
+    # 切片变化：提交后让检索缓存换代次
+    search_cache.mark_dirty()
+    rows = []
+    written = 0
+    for block_id, file_id, content_text in blocks:
+        for term in block_terms(content_text):
+            rows.append({"term": term, "block_id": block_id, "file_id": file_id})
+        if len(rows) >= _INSERT_BATCH:
+            db.session.execute(insert(KbBlockTerm), rows)
+            written += len(rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(KbBlockTerm), rows)
+        written += len(rows)
+    return written
+
+
+def delete_file_terms(file_id: str) -> None:
+    search_cache.mark_dirty()
+    db.session.execute(delete(KbBlockTerm).where(KbBlockTerm.file_id == file_id))
+
+
+def delete_block_terms(block_ids: Sequence[str]) -> None:
+    if not block_ids:
+        return
+    search_cache.mark_dirty()
+    db.session.execute(delete(KbBlockTerm).where(KbBlockTerm.block_id.in_(list(block_ids))))
+
+
+def rebuild_index(file_id: Optional[str] = None) -> int:
+    """
+    全量（或按文件）重建倒排（`flask kb-rebuild-terms`）：迁移已回填历史切片，
+    这里用于绕过 ORM 批量写入切片之后的重建。
+    """
+    if file_id:
+        delete_file_terms(file_id)
+    else:
+        search_cache.mark_dirty()
+        db.session.execute(delete(KbBlockTerm))
+
+    id_q = db.session.query(KbBlock.id)
+    if file_id:
+        id_q = id_q.filter(KbBlock.file_id == file_id)
+    block_ids = [r.id for r in id_q.all()]
+
+    # 分批读取内容（不用流式游标：MySQL 下流式读取期间不能在同一连接上写入）
+    written = 0
+    for i in range(0, len(block_ids), 500):
+        batch = block_ids[i:i + 500]
+        rows = (
+            db.session.query(KbBlock.id, KbBlock.file_id, KbBlock.content_text)
+            .filter(KbBlock.id.in_(batch))
+            .all()
+        )
+        written += index_blocks((r.id, r.file_id, r.content_text or "") for r in rows)
+    db.session.commit()
+    return written
@@ -1,17 +1,90 @@
 import os
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional, Tuple
 
-from sqlalchemy import func, desc
 from flask import current_app
 
 from app.extensions import db
-from app.models import KbBlock, Job, File
+from app.models import Job
+from domain.kb.batch_retriever import search_blocks_batch
 from domain.templates.renderer import render_docx_template
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_RETRIEVE_CONCURRENCY = 4
+DEFAULT_RETRIEVE_BATCH = 200
+
+
+def _generator_setting(name: str, default: int) -> int:
+    try:
+        return int(current_app.config.get(name, default))
+    except (RuntimeError, TypeError, ValueError):
+        return default
+
+
+# 解析后的招标需求缓存：key = result.json 绝对路径，按 (mtime_ns, size) 判断文件是否变化。
+# 缓存里的行是共享的，调用方需要修改时先复制（load_requirements 返回逐行副本）
+DEFAULT_REQUIREMENTS_CACHE_SIZE = 32
+
+_requirements_lock = threading.Lock()
+_requirements_cache: "OrderedDict[str, Tuple[Tuple[int, int], List[Dict[str, Any]]]]" = OrderedDict()
+
+
+def _parse_requirements(json_path: str) -> List[Dict[str, Any]]:
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    raw_rows = []
+    if isinstance(data, dict) and "tables" in data:
+        for t in data["tables"]:
+            if "rows" in t: raw_rows.extend(t["rows"])
+    elif isinstance(data, list):
+        raw_rows = data
+
+    final_rows = []
+    default_headers = ["category", "item", "value", "source"]
+    for r in raw_rows:
+        if isinstance(r, dict):
+            final_rows.append(r)
+        elif isinstance(r, list):
+            new_row = {}
+            for i, val in enumerate(r):
+                if i < len(default_headers): new_row[default_headers[i]] = val
+            final_rows.append(new_row)
+    return final_rows
+
+
+def cached_requirements(json_path: str) -> List[Dict[str, Any]]:
+    """
+    读取并缓存解析后的需求行（文件 mtime / 大小变化后重新解析）；返回的列表不要修改
+    """
+    st = os.stat(json_path)
+    signature = (st.st_mtime_ns, st.st_size)
+    with _requirements_lock:
+        hit = _requirements_cache.get(json_path)
+        if hit is not None and hit[0] == signature:
+            _requirements_cache.move_to_end(json_path)
+            return hit[1]
+
+    rows = _parse_requirements(json_path)
+    maxsize = _generator_setting("REVIEW_INDEX_REQUIREMENTS_CACHE_SIZE", DEFAULT_REQUIREMENTS_CACHE_SIZE)
+    if maxsize > 0:
+        with _requirements_lock:
+            _requirements_cache[json_path] = (signature, rows)
+            _requirements_cache.move_to_end(json_path)
+            while len(_requirements_cache) > maxsize:
+                _requirements_cache.popitem(last=False)
+    return rows
+
+
+def _shares_one_connection() -> bool:
+    # SQLite 内存库所有 session 共用同一个连接（StaticPool），不能多线程并发查询
+    url = db.engine.url
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
 
 class BiddingDocumentGenerator:
     def __init__(self, job_id: str):
@@ -23,86 +96,143 @@ class BiddingDocumentGenerator:
     def _get_project_root(self) -> str:
         return os.path.dirname(current_app.root_path)
 
-    def load_requirements(self) -> List[Dict[str, Any]]:
-        """加载解析出的招标需求"""
+    def _requirements_path(self) -> Optional[str]:
         if not self.job.artifact_json_path:
-            return []
+            return None
         json_path = os.path.join(self._get_project_root(), self.job.artifact_json_path)
         if not os.path.exists(json_path):
+            return None
+        return json_path
+
+    def _cached_requirements(self) -> List[Dict[str, Any]]:
+        json_path = self._requirements_path()
+        if json_path is None:
             return []
         try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            raw_rows = []
-            if isinstance(data, dict) and "tables" in data:
-                for t in data["tables"]:
-                    if "rows" in t: raw_rows.extend(t["rows"])
-            elif isinstance(data, list):
-                raw_rows = data
-
-            final_rows = []
-            default_headers = ["category", "item", "value", "source"]
-            for r in raw_rows:
-                if isinstance(r, dict):
-                    final_rows.append(r)
-                elif isinstance(r, list):
-                    new_row = {}
-                    for i, val in enumerate(r):
-                        if i < len(default_headers): new_row[default_headers[i]] = val
-                    final_rows.append(new_row)
-            return final_rows
+            return cached_requirements(json_path)
         except Exception as e:
             logger.error(f"Failed to load json: {e}")
             return []
 
+    def load_requirements(self) -> List[Dict[str, Any]]:
+        """加载解析出的招标需求（逐行副本，可直接修改）"""
+        return [dict(r) for r in self._cached_requirements()]
+
+    def requirements_page(self, offset: int = 0, limit: int = 200) -> Tuple[List[Dict[str, Any]], int]:
+        """预览分页：只复制当前页的行，返回 (rows, total)"""
+        rows = self._cached_requirements()
+        offset = max(int(offset), 0)
+        limit = max(int(limit), 0)
+        return [dict(r) for r in rows[offset:offset + limit]], len(rows)
+
     def search_evidence(self, query: str, tag: str = None, top_k: int = 3) -> List[Dict[str, Any]]:
-        """在知识库中进行语义检索"""
+        """在知识库中检索单个 query（内容包含 query 的切片，按长度倒序）"""
         if not query: return []
-        q = db.session.query(KbBlock, File).join(File, KbBlock.file_id == File.id)
-        if tag: q = q.filter(KbBlock.tag == tag)
-        q = q.filter(KbBlock.content_text.like(f"%{query}%"))
-        q = q.order_by(desc(KbBlock.content_len)).limit(top_k)
-
-        results = []
-        for block, file_rec in q.all():
-            results.append({
-                "content": block.content_text,
-                "source_file": file_rec.filename
-            })
-        return results
-
-    def generate_full_document(self, kb_tag: str, top_n: int, template_path: str = None) -> str:
+        return self.search_evidence_batch([query], tag=tag, top_k=top_k)[0]
+
+    def search_evidence_batch(
+            self,
+            queries: List[str],
+            tag: str = None,
+            top_k: int = 3,
+            concurrency: Optional[int] = None,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        检索多个 query，结果与 queries 一一对应（每个 query 的结果单独走 KB 检索缓存）。
+        去重后的 query 按 REVIEW_INDEX_RETRIEVE_BATCH 分组，每组一次批量检索；
+        多组时用最多 concurrency（默认 REVIEW_INDEX_RETRIEVE_CONCURRENCY）个线程并发，
+        每个线程在自己的 app context 里使用独立的 session，结果按原顺序合并。
+        """
+        if not queries: return []
+        if concurrency is None:
+            concurrency = _generator_setting("REVIEW_INDEX_RETRIEVE_CONCURRENCY", DEFAULT_RETRIEVE_CONCURRENCY)
+        batch_size = max(_generator_setting("REVIEW_INDEX_RETRIEVE_BATCH", DEFAULT_RETRIEVE_BATCH), 1)
+
+        distinct = list(dict.fromkeys(q for q in queries if q))
+        groups = [distinct[i:i + batch_size] for i in range(0, len(distinct), batch_size)]
+
+        def retrieve(group: List[str]) -> List[Dict[str, Any]]:
+            return search_blocks_batch(
+                group, by_tag=tag, top_k=top_k, order="longest", fields=["filename", "content_text"]
+            )
+
+        if concurrency <= 1 or len(groups) <= 1 or _shares_one_connection():
+            results = [r for group in groups for r in retrieve(group)]
+        else:
+            app = current_app._get_current_object()
+
+            def retrieve_in_context(group: List[str]) -> List[Dict[str, Any]]:
+                with app.app_context():
+                    return retrieve(group)
+
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(groups))) as pool:
+                results = [r for rs in pool.map(retrieve_in_context, groups) for r in rs]
+
+        by_query = {
+            q: [{"content": item["content_text"], "source_file": item["filename"]} for item in r["items"]]
+            for q, r in zip(distinct, results)
+        }
+        return [list(by_query.get(q, [])) for q in queries]
+
+    def generate_full_document(
+            self,
+            kb_tag: str,
+            top_n: int,
+            template_path: str = None,
+            output_path: str = None,
+            progress: Optional[Callable[[str, int], None]] = None,
+    ) -> str:
         """
         组装完整的标书数据字典并触发渲染
+        progress(stage, percent)：后台任务上报进度（LOAD_REQUIREMENTS / RETRIEVE / RENDER）
         """
+        def report(stage: str, percent: int) -> None:
+            if progress is not None:
+                progress(stage, percent)
+
         context_data = {}
 
-        # 1. 预先检索固定章节内容（从知识库提取科讯嘉联的核心材料）
+        # 1. 固定章节（从知识库提取科讯嘉联的核心材料）
         standard_sections = {
             "company_profile": "企业简介 综合实力 资质 CMMI5 ISO",
             "tech_solution": "智能客服 核心技术 ASR OCR 系统架构",
             "implementation": "项目实施 培训计划 交付周期",
             "after_sales": "售后服务 应急响应 故障修复"
         }
+        section_top_k = 2
+
+        # 2. 招标文件具体的点对点需求
+        report("LOAD_REQUIREMENTS", 10)
+        requirements = self.load_requirements()
+        search_terms = {}
+        for i, req in enumerate(requirements):
+            if not isinstance(req, dict): continue
+            search_term = req.get("item") or req.get("评审项") or req.get("desc") or ""
+            if search_term:
+                search_terms[i] = str(search_term)
+
+        # 固定章节与全部需求的检索合并成一次批量查询（按最大 top_k 取，再按各自的 top_k 截断）
+        queries = list(standard_sections.values()) + list(search_terms.values())
+        report("RETRIEVE", 30)
+        answers = self.search_evidence_batch(queries, tag=kb_tag, top_k=max(section_top_k, int(top_n or 0)))
+        by_query = dict(zip(queries, answers))
 
         for key, query in standard_sections.items():
-            evidences = self.search_evidence(query, tag=kb_tag, top_k=2)
+            evidences = by_query.get(query, [])[:section_top_k]
             if evidences:
                 paragraphs = [e['content'].replace("\n", " ").strip() for e in evidences]
                 context_data[key] = "\n\n".join(paragraphs)
             else:
                 context_data[key] = f"（知识库中暂无关于【{query}】的详细说明，请人工补充）"
 
-        # 2. 检索招标文件具体的点对点需求
-        requirements = self.load_requirements()
-        for req in requirements:
+        for i, req in enumerate(requirements):
             if not isinstance(req, dict): continue
-            search_term = req.get("item") or req.get("评审项") or req.get("desc") or ""
+            search_term = search_terms.get(i)
             if not search_term:
                 req["response_text"] = "【系统提示：未解析到明确的招标参数要求】"
                 continue
 
-            evidences = self.search_evidence(search_term, tag=kb_tag, top_k=top_n)
+            evidences = by_query.get(search_term, [])[:top_n]
             if evidences:
                 # 拼接AI自动写标书的响应话术
                 paragraphs = [f"我方完全响应并满足该项要求。关于【{search_term}】，我方实施方案及参数如下："]
@@ -114,7 +244,8 @@ class BiddingDocumentGenerator:
         context_data["requirements"] = requirements
 
         # 将准备好的内容交给渲染器直接写 Word
-        return render_docx_template(context_data, template_path)
+        report("RENDER", 80)
+        return render_docx_template(context_data, template_path, output_path=output_path)
 
 
 # ---------------------------------------------------------
@@ -128,11 +259,15 @@ def generate_review_index_docx(
         kb_tag: str,
         evidence_top_n: int = 3,
         template_docx_path: str = None,
-        xlsx_path: str = None
+        xlsx_path: str = None,
+        output_path: str = None,
+        progress: Optional[Callable[[str, int], None]] = None,
 ) -> str:
     generator = BiddingDocumentGenerator(job_id)
     return generator.generate_full_document(
         kb_tag=kb_tag,
         top_n=evidence_top_n,
-        template_path=template_docx_path
+        template_path=template_docx_path,
+        output_path=output_path,
+        progress=progress,
     )
\ No newline at end of file
@@ -2,11 +2,14 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Optional
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
-from sqlalchemy import or_, case, desc, func
+from sqlalchemy import func, or_
 
-from app.models import KbBlock
+from app.extensions import db
+from app.models import KbBlock, File
+from domain.kb.batch_retriever import load_block_details, match_blocks_batch
 
 
 def _clean(s: str) -> str:
@@ -72,57 +75,144 @@ def retrieve_evidence_blocks(
 ) -> List[Dict[str, Any]]:
     """
     从 kb_blocks 中召回证据块，并返回 excerpt（内容摘录），让生成 docx 时可直接写入内容。
+    整个评分模板检索时请用 retrieve_evidence_blocks_batch / EvidenceTermIndex，只准备一次倒排。
     """
-    top_n = max(1, min(int(top_n or 3), 10))
-    excerpt_len = max(200, min(int(excerpt_len or 800), 5000))
+    return retrieve_evidence_blocks_batch(
+        score_rows=[score_row], tag=tag, top_n=top_n, excerpt_len=excerpt_len
+    )[0]
 
-    terms = _extract_terms(score_row)
-    if not terms:
-        return []
 
-    q = KbBlock.query
-    if tag:
-        q = q.filter(KbBlock.tag == tag)
+def retrieve_evidence_blocks_batch(
+    *,
+    score_rows: Sequence[Dict[str, str]],
+    tag: Optional[str],
+    top_n: int = 3,
+    excerpt_len: int = 800,
+) -> List[List[Dict[str, Any]]]:
+    """
+    多行评审项一次召回，结果与 score_rows 一一对应。
+    """
+    index = EvidenceTermIndex.prepare(score_rows, tag=tag)
+    return index.retrieve_all(score_rows, top_n=top_n, excerpt_len=excerpt_len)
 
-    like_filters = []
-    score_parts = []
 
-    for t in terms:
-        pat = f"%{t.lower()}%"
-        like_filters.append(func.lower(KbBlock.section_title).like(pat))
-        like_filters.append(func.lower(KbBlock.content_text).like(pat))
-
-        score_parts.append(case((func.lower(KbBlock.section_title).like(pat), 5), else_=0))
-        score_parts.append(case((func.lower(KbBlock.content_text).like(pat), 1), else_=0))
-
-    score_expr = sum(score_parts)
-
-    rows = (
-        q.filter(or_(*like_filters))
-        .with_entities(KbBlock, score_expr.label("score"))
-        .order_by(desc("score"), desc(KbBlock.created_at))
-        .limit(top_n)
-        .all()
-    )
-
-    out: List[Dict[str, Any]] = []
-    for block, score in rows:
-        text = (block.content_text or "").strip()
-        excerpt = text[:excerpt_len] if text else ""
-
-        out.append(
-            {
-                "block_id": block.id,
-                "doc_id": block.doc_id,
-                "section_title": block.section_title,
-                "section_path": block.section_path,
-                "score": int(score or 0),
-                "start_idx": int(block.start_idx or 0),
-                "end_idx": int(block.end_idx or 0),
-                "block_docx_path": block.block_docx_path,
-                # ✅ 关键：返回内容摘录
-                "excerpt": excerpt,
-            }
-        )
+class EvidenceTermIndex:
+    """
+    为整个评分模板准备一次的检索词倒排：
+      - 所有行的检索词（小写）去重后一次性匹配内容（domain/kb/batch_retriever.py，走 bigram 倒排）
+      - 文件名匹配：每批 50 个检索词一条查询，再取命中文件下的切片
+    每行的得分在内存里按 postings 累加：文件名命中 +5、内容命中 +1（按检索词），
+    按 score、入库时间倒序取 top_n，与原先逐行 SQL（LIKE + CASE）的结果一致。
+    """
 
+    def __init__(self, tag: Optional[str]):
+        self.tag = tag
+        self.content_postings: Dict[str, Set[str]] = {}
+        self.title_postings: Dict[str, List[str]] = {}
+        self.created: Dict[str, Optional[datetime]] = {}
+
+    @classmethod
+    def prepare(cls, score_rows: Iterable[Dict[str, str]], tag: Optional[str] = None) -> "EvidenceTermIndex":
+        index = cls(tag)
+        terms = list(dict.fromkeys(t.lower() for row in score_rows for t in _extract_terms(row)))
+        if terms:
+            index._load(terms)
+        return index
+
+    def _load(self, terms: List[str]) -> None:
+        matches, hits = match_blocks_batch(terms, tag=self.tag)
+        self.content_postings = {t: set(ids) for t, ids in matches.items()}
+        self.created = {b: h.created_at for b, h in hits.items()}
+
+        # 标题匹配：文件名命中的文件下的全部切片
+        title_files = _title_matches(terms)
+        blocks_by_file: Dict[str, List[str]] = {}
+        file_ids = sorted(title_files)
+        for i in range(0, len(file_ids), 500):
+            q = db.session.query(KbBlock.id, KbBlock.file_id, KbBlock.created_at).filter(
+                KbBlock.file_id.in_(file_ids[i:i + 500])
+            )
+            if self.tag:
+                q = q.filter(KbBlock.tag == self.tag)
+            for block_id, file_id, created_at in q.all():
+                blocks_by_file.setdefault(file_id, []).append(block_id)
+                self.created[block_id] = created_at
+
+        for file_id, matched_terms in title_files.items():
+            for t in matched_terms:
+                self.title_postings.setdefault(t, []).extend(blocks_by_file.get(file_id, ()))
+
+    def rank(self, score_row: Dict[str, str], top_n: int = 3) -> List[Tuple[str, int]]:
+        """
+        某一行的 (block_id, score) 排名，不查库
+        """
+        scores: Dict[str, int] = {}
+        for t in _extract_terms(score_row):
+            lt = t.lower()
+            for block_id in self.content_postings.get(lt, ()):
+                scores[block_id] = scores.get(block_id, 0) + 1
+            for block_id in self.title_postings.get(lt, ()):
+                scores[block_id] = scores.get(block_id, 0) + 5
+        ranked = sorted(
+            scores.items(),
+            key=lambda kv: (kv[1], self.created.get(kv[0]) or datetime.min, kv[0]),
+            reverse=True,
+        )
+        return ranked[:top_n]
+
+    def retrieve_all(
+        self,
+        score_rows: Sequence[Dict[str, str]],
+        top_n: int = 3,
+        excerpt_len: int = 800,
+    ) -> List[List[Dict[str, Any]]]:
+        top_n = max(1, min(int(top_n or 3), 10))
+        excerpt_len = max(200, min(int(excerpt_len or 800), 5000))
+
+        ranked_rows = [self.rank(row, top_n) for row in score_rows]
+        # 入选切片的正文一次读出
+        details = load_block_details(b for ranked in ranked_rows for b, _ in ranked)
+
+        results: List[List[Dict[str, Any]]] = []
+        for ranked in ranked_rows:
+            out: List[Dict[str, Any]] = []
+            for block_id, score in ranked:
+                d = details.get(block_id)
+                if d is None:
+                    continue
+                text = (d["content_text"] or "").strip()
+                excerpt = text[:excerpt_len] if text else ""
+
+                out.append(
+                    {
+                        "block_id": block_id,
+                        "file_id": d["file_id"],
+                        "filename": d["filename"],
+                        "score": int(score or 0),
+                        "meta": d["meta"],
+                        # ✅ 关键：返回内容摘录
+                        "excerpt": excerpt,
+                    }
+                )
+            results.append(out)
+
+        return results
+
+
+def _title_matches(terms: Sequence[str]) -> Dict[str, Set[str]]:
+    """
+    文件名命中任一检索词的文件：file_id -> 命中的检索词（小写）
+    """
+    out: Dict[str, Set[str]] = {}
+    lowered = sorted({t.lower() for t in terms})
+    for i in range(0, len(lowered), 50):
+        chunk = lowered[i:i + 50]
+        rows = (
+            db.session.query(File.id, File.filename)
+            .filter(or_(*[func.lower(File.filename).like(f"%{t}%") for t in chunk]))
+            .all()
+        )
+        for file_id, filename in rows:
+            name = (filename or "").lower()
+            out.setdefault(file_id, set()).update(t for t in chunk if t in name)
     return out
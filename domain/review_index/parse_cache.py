@@ -0,0 +1,63 @@
+# domain/review_index/parse_cache.py
+"""
+按文件路径 + mtime 缓存解析结果（招标需求 xlsx / 评分模板 docx）。
+
+- key = (绝对路径, 额外参数)，文件 (mtime_ns, size) 变化后重新解析
+- LRU 淘汰，容量取 REVIEW_INDEX_PARSE_CACHE_SIZE（0 关闭缓存）
+- 缓存里的列表是共享的：get() 返回浅拷贝，行对象本身不要修改
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Tuple
+
+from flask import current_app
+
+DEFAULT_PARSE_CACHE_SIZE = 16
+
+
+def _cache_size() -> int:
+    try:
+        return int(current_app.config.get("REVIEW_INDEX_PARSE_CACHE_SIZE", DEFAULT_PARSE_CACHE_SIZE))
+    except (RuntimeError, TypeError, ValueError):
+        return DEFAULT_PARSE_CACHE_SIZE
+
+
+class ParseCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[Tuple[str, Hashable], Tuple[Tuple[int, int], List[Any]]]" = OrderedDict()
+
+    def get(self, path: str, loader: Callable[[], List[Any]], *extra: Hashable) -> List[Any]:
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+        key = (path, extra)
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None and hit[0] == signature:
+                self._items.move_to_end(key)
+                return list(hit[1])
+
+        # 解析在锁外进行：大文件解析不阻塞其它路径的命中
+        rows = list(loader())
+        maxsize = _cache_size()
+        if maxsize > 0:
+            with self._lock:
+                self._items[key] = (signature, rows)
+                self._items.move_to_end(key)
+                while len(self._items) > maxsize:
+                    self._items.popitem(last=False)
+        return list(rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_cache = ParseCache()
+
+
+def get_cache() -> ParseCache:
+    return _cache
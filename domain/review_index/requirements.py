@@ -4,10 +4,12 @@ from __future__ import annotations
 import re
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 
 from flask import current_app
 
+from domain.review_index.parse_cache import get_cache
+
 
 @dataclass
 class RequirementRow:
@@ -31,56 +33,73 @@ def _repo_root() -> Path:
     return Path(current_app.root_path).parent
 
 
-def load_requirements_xlsx(xlsx_path: str, sheet_name: str = "Result") -> List[RequirementRow]:
-    try:
-        import openpyxl
-    except Exception as exc:
-        raise RuntimeError("openpyxl is required") from exc
-
+def _resolve_xlsx(xlsx_path: str) -> Path:
     abs_path = Path(xlsx_path)
     if not abs_path.is_absolute():
         abs_path = (_repo_root() / abs_path).resolve()
     if not abs_path.exists():
         raise FileNotFoundError(f"xlsx not found: {abs_path}")
+    return abs_path
+
+
+def iter_requirements_xlsx(xlsx_path: str, sheet_name: str = "Result") -> Iterator[RequirementRow]:
+    """
+    流式读取需求表：openpyxl 只读模式逐行解析，按需产出 RequirementRow，整张表不会同时驻留内存。
+    生成器关闭（或读完）时释放工作簿文件句柄。
+    """
+    try:
+        import openpyxl
+    except Exception as exc:
+        raise RuntimeError("openpyxl is required") from exc
+
+    abs_path = _resolve_xlsx(xlsx_path)
+    wb = openpyxl.load_workbook(str(abs_path), read_only=True, data_only=True)
+    try:
+        if sheet_name not in wb.sheetnames:
+            sheet_name = wb.sheetnames[0]
+
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        first = next(rows, None)
+        if first is None:
+            return
+
+        header = [str(x or "").strip().lower() for x in first]
+        col = {name: header.index(name) for name in ["category", "item", "value", "source"] if name in header}
+
+        # 稍微放宽限制，允许只有3列的情况（兼容性）
+        if len(col) < 3:
+            # 如果实在找不到 header，尝试按默认顺序
+            col = {"category": 0, "item": 1, "value": 2, "source": 3}
+
+        for r in rows:
+            # 确保行有内容
+            if not r or not any(r):
+                continue
+
+            def _get(k, default_idx):
+                idx = col.get(k, default_idx)
+                if idx < len(r):
+                    return str(r[idx] or "").strip()
+                return ""
 
-    wb = openpyxl.load_workbook(str(abs_path), data_only=True)
-    if sheet_name not in wb.sheetnames:
-        sheet_name = wb.sheetnames[0]
-
-    ws = wb[sheet_name]
-    rows = list(ws.iter_rows(values_only=True))
-    if not rows:
-        return []
-
-    header = [str(x or "").strip().lower() for x in rows[0]]
-    col = {name: header.index(name) for name in ["category", "item", "value", "source"] if name in header}
-
-    # 稍微放宽限制，允许只有3列的情况（兼容性）
-    if len(col) < 3:
-        # 如果实在找不到 header，尝试按默认顺序
-        col = {"category": 0, "item": 1, "value": 2, "source": 3}
-
-    out: List[RequirementRow] = []
-    for r in rows[1:]:
-        # 确保行有内容
-        if not r or not any(r):
-            continue
-
-        def _get(k, default_idx):
-            idx = col.get(k, default_idx)
-            if idx < len(r):
-                return str(r[idx] or "").strip()
-            return ""
-
-        out.append(
-            RequirementRow(
+            yield RequirementRow(
                 category=_get("category", 0),
                 item=_get("item", 1),
                 value=_get("value", 2),
                 source=_get("source", 3),
             )
-        )
-    return out
+    finally:
+        wb.close()
+
+
+def load_requirements_xlsx(xlsx_path: str, sheet_name: str = "Result") -> List[RequirementRow]:
+    """
+    读取需求表（流式解析，结果按路径 + mtime 缓存；返回列表可修改，行对象不要修改）
+    """
+    abs_path = _resolve_xlsx(xlsx_path)
+    return get_cache().get(
+        str(abs_path), lambda: iter_requirements_xlsx(str(abs_path), sheet_name), "requirements_xlsx", sheet_name
+    )
 
 
 def _clean_source_to_page(source_text: str) -> str:
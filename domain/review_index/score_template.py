@@ -1,12 +1,15 @@
 # domain/review_index/score_template.py
 from __future__ import annotations
 
+import zipfile
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
 from flask import current_app
 
+from domain.review_index.parse_cache import get_cache
+
 
 @dataclass
 class ScoreTemplateRow:
@@ -28,16 +31,6 @@ def _resolve(p: str) -> Path:
     return (_repo_root() / pp).resolve()
 
 
-def _cell_text(cell) -> str:
-    # 兼容合并单元格：把 cell 里所有段落拼起来
-    lines = []
-    for p in cell.paragraphs:
-        t = (p.text or "").strip()
-        if t:
-            lines.append(t)
-    return "\n".join(lines).strip()
-
-
 def _norm_header(s: str) -> str:
     s = (s or "").strip().lower()
     s = s.replace("（", "(").replace("）", ")")
@@ -83,12 +76,65 @@ def _map_header_indices(header_cells: List[str]) -> Dict[str, int]:
     return m
 
 
-def load_score_template_docx(template_path: str) -> List[ScoreTemplateRow]:
+def _main_document_xml(zf) -> str:
+    # 主文档部件一般是 word/document.xml，以 _rels/.rels 里的 officeDocument 关系为准
+    from docx.opc.constants import RELATIONSHIP_TYPE as RT
+    from docx.oxml import parse_xml
+
+    try:
+        rels = parse_xml(zf.read("_rels/.rels"))
+    except KeyError:
+        return "word/document.xml"
+    for rel in rels:
+        if rel.get("Type") == RT.OFFICE_DOCUMENT:
+            return rel.get("Target", "").lstrip("/")
+    return "word/document.xml"
+
+
+def _iter_table_cells(tbl) -> Iterator[List[str]]:
     """
-    读取评分模板 docx（第一个表格），按表头映射列，兼容合并单元格。
+    逐行产出表格的单元格文本（与 python-docx 的 row.cells 展开规则一致）：
+      - 横向合并（gridSpan=n）的单元格重复 n 次
+      - 纵向合并的延续格（vMerge=continue）取上一行同一网格列的文本
+    直接遍历 w:tr / w:tc 元素，上一行的网格文本随行传递，避免 row.cells 对每个延续格向上回溯。
+    """
+    above: Dict[int, str] = {}
+    for tr in tbl.tr_lst:
+        texts: List[str] = []
+        current: Dict[int, str] = {}
+        offset = tr.grid_before
+        for tc in tr.tc_lst:
+            span = tc.grid_span
+            if tc.vMerge == "continue":
+                spanned = [above.get(offset + i, "") for i in range(span)]
+            else:
+                spanned = [_tc_text(tc)] * span
+            for i, text in enumerate(spanned):
+                current[offset + i] = text
+            texts.extend(spanned)
+            offset += span
+        above = current
+        yield texts
+
+
+def _tc_text(tc) -> str:
+    # 兼容合并单元格：单元格内段落（不含嵌套表格）去空后按行拼接
+    lines = []
+    for p in tc.p_lst:
+        t = (p.text or "").strip()
+        if t:
+            lines.append(t)
+    return "\n".join(lines).strip()
+
+
+def iter_score_template_docx(template_path: str) -> Iterator[ScoreTemplateRow]:
+    """
+    流式读取评分模板 docx（第一个表格）：只解析主文档 XML，不加载图片等其它部件，
+    按表头映射列后逐行产出 ScoreTemplateRow（跳过全空行）。
     """
     try:
-        from docx import Document
+        from docx.oxml import parse_xml
+        from docx.oxml.ns import qn
     except Exception as exc:
         raise RuntimeError("python-docx is required to parse docx") from exc
 
@@ -96,15 +142,19 @@ def load_score_template_docx(template_path: str) -> List[ScoreTemplateRow]:
     if not abs_path.exists():
         raise FileNotFoundError(f"template docx not found: {abs_path}")
 
-    doc = Document(str(abs_path))
-    if not doc.tables:
+    with zipfile.ZipFile(str(abs_path)) as zf:
+        document = parse_xml(zf.read(_main_document_xml(zf)))
+
+    body = document.find(qn("w:body"))
+    table = body.find(qn("w:tbl")) if body is not None else None
+    if table is None:
         raise ValueError("template docx has no table")
 
-    table = doc.tables[0]
-    if len(table.rows) < 2:
-        return []
+    rows = _iter_table_cells(table)
+    header_cells = next(rows, None)
+    if header_cells is None or len(table.tr_lst) < 2:
+        return
 
-    header_cells = [_cell_text(c) for c in table.rows[0].cells]
     col_map = _map_header_indices(header_cells)
 
     # 最少要能定位到“评分大类”
@@ -117,20 +167,25 @@ def load_score_template_docx(template_path: str) -> List[ScoreTemplateRow]:
             return ""
         return cells[idx] if idx < len(cells) else ""
 
-    rows: List[ScoreTemplateRow] = []
-    for r in table.rows[1:]:
-        cells = [_cell_text(c) for c in r.cells]
-
-        rows.append(
-            ScoreTemplateRow(
-                score_major=get_cell(cells, "score_major").strip(),
-                score_minor=get_cell(cells, "score_minor").strip(),
-                score_rule=get_cell(cells, "score_rule").strip(),
-                evidence_materials=get_cell(cells, "evidence").strip(),
-                pages=get_cell(cells, "pages").strip(),
-            )
+    for cells in rows:
+        row = ScoreTemplateRow(
+            score_major=get_cell(cells, "score_major").strip(),
+            score_minor=get_cell(cells, "score_minor").strip(),
+            score_rule=get_cell(cells, "score_rule").strip(),
+            evidence_materials=get_cell(cells, "evidence").strip(),
+            pages=get_cell(cells, "pages").strip(),
         )
+        # 过滤掉全空行
+        if row.score_major or row.score_minor or row.score_rule or row.evidence_materials or row.pages:
+            yield row
 
-    # 过滤掉全空行
-    rows = [x for x in rows if (x.score_major or x.score_minor or x.score_rule or x.evidence_materials or x.pages)]
-    return rows
+
+def load_score_template_docx(template_path: str) -> List[ScoreTemplateRow]:
+    """
+    读取评分模板 docx（第一个表格），按表头映射列，兼容合并单元格。
+    结果按路径 + mtime 缓存（返回列表可修改，行对象不要修改）。
+    """
+    abs_path = _resolve(template_path)
+    if not abs_path.exists():
+        raise FileNotFoundError(f"template docx not found: {abs_path}")
+    return get_cache().get(str(abs_path), lambda: iter_score_template_docx(str(abs_path)), "score_template_docx")
@@ -1,39 +1,86 @@
 import os
+import re
 import uuid
 import logging
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Sequence, Union
 from pathlib import Path
+from xml.sax.saxutils import escape
 
 try:
     from docx import Document
     from docx.shared import Pt
-    from docx.oxml.ns import qn
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls, qn
 except ImportError:
     raise ImportError("Please install python-docx: pip install python-docx")
 
+from domain.templates.template_cache import fill_slot, get_template_cache
+
 logger = logging.getLogger(__name__)
 
+_RUN_BREAKS = re.compile(r"([\t\r\n])")
+
 
-def render_docx_template(data: Union[List[Dict[str, Any]], Dict[str, Any]], template_path: str = None) -> str:
+def _run_xml(text: str) -> str:
     """
-    智能标书与表格渲染引擎
+    与 cell.text = text 生成的 w:r 一致：\t -> w:tab，\r / \n -> w:br，
+    其余连续字符放进一个 w:t（首尾有空白时加 xml:space="preserve"）
     """
-    if template_path and os.path.exists(template_path):
-        try:
-            doc = Document(template_path)
-            logger.info(f"Loaded template: {template_path}")
-        except Exception as e:
-            logger.warning(f"Failed to load template, creating new doc. Error: {e}")
-            doc = Document()
-    else:
-        doc = Document()
+    parts = []
+    for seg in _RUN_BREAKS.split(text):
+        if not seg:
+            continue
+        if seg == "\t":
+            parts.append("<w:tab/>")
+        elif seg in "\r\n":
+            parts.append("<w:br/>")
+        elif len(seg.strip()) < len(seg):
+            parts.append(f'<w:t xml:space="preserve">{escape(seg)}</w:t>')
+        else:
+            parts.append(f"<w:t>{escape(seg)}</w:t>")
+    return f"<w:r>{''.join(parts)}</w:r>" if parts else "<w:r/>"
 
-    # 尝试设置全局中文字体支持
-    try:
-        doc.styles['Normal'].font.name = 'Times New Roman'
-        doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
-    except Exception:
-        pass
+
+def append_table_rows(table, rows: Sequence[Sequence[str]]) -> None:
+    """
+    批量追加表格行：直接拼出全部 w:tr 的 XML，一次解析后挂到表格末尾。
+    输出与逐行 table.add_row().cells[i].text = ... 完全相同（单元格宽度取自 tblGrid），
+    但不会每行 / 每格都让 python-docx 重新遍历表格 XML。
+    """
+    if not rows:
+        return
+    tbl = table._tbl
+    tc_open = []
+    for grid_col in tbl.tblGrid.gridCol_lst:
+        if grid_col.w is None:
+            tc_open.append("<w:tc>")
+        else:
+            tc_open.append(f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{grid_col.w.twips}"/></w:tcPr>')
+
+    xml = []
+    for values in rows:
+        xml.append("<w:tr>")
+        for i, head in enumerate(tc_open):
+            body = f"<w:p>{_run_xml(values[i])}</w:p>" if i < len(values) else "<w:p/>"
+            xml.append(f"{head}{body}</w:tc>")
+        xml.append("</w:tr>")
+
+    fragment = parse_xml(f"<w:tbl {nsdecls('w')}>{''.join(xml)}</w:tbl>")
+    for tr in list(fragment):
+        tbl.append(tr)
+
+
+def render_docx_template(
+        data: Union[List[Dict[str, Any]], Dict[str, Any]],
+        template_path: str = None,
+        output_path: str = None,
+) -> str:
+    """
+    智能标书与表格渲染引擎
+    output_path：指定输出文件（后台任务写到自己的 artifacts 目录）；为空时写到 storage/artifacts/review_index/
+    """
+    # 模板按路径 + mtime 缓存，字体设置与占位符登记只在首次解析时做一次，这里拿到的是母本的副本
+    doc, slots = get_template_cache().get(template_path).clone()
 
     # 兼容旧版本：如果传进来的是个列表，说明是旧版单纯生成表格的逻辑
     if isinstance(data, list):
@@ -49,34 +96,46 @@ def render_docx_template(data: Union[List[Dict[str, Any]], Dict[str, Any]], temp
     # ==========================================
     # 模块 A：写入标书标准正文章节
     # ==========================================
+    # 模板里的 {{name}} 占位符：有同名字符串数据的就地填充，对应章节不再追加到文末
+    filled = set()
+    for name, paragraphs in slots.items():
+        value = context_data.get(name)
+        if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+            fill_slot(paragraphs, name, str(value))
+            filled.add(name)
+
+    def section(key):
+        return None if key in filled else context_data.get(key)
+
     if is_full_doc:
         if not template_path:
             doc.add_heading('投标文件 (系统智能生成)', 0)
 
         # 1. 商务响应部分
-        if context_data.get("company_profile"):
+        if section("company_profile"):
             doc.add_heading('第一部分 商务响应', 1)
             doc.add_heading('1.1 企业简介与综合实力', 2)
-            doc.add_paragraph(context_data.get("company_profile"))
+            doc.add_paragraph(section("company_profile"))
 
         # 2. 技术响应部分
-        if context_data.get("tech_solution"):
+        if section("tech_solution"):
             doc.add_heading('第二部分 技术方案响应', 1)
             doc.add_heading('2.1 核心技术与系统架构', 2)
-            doc.add_paragraph(context_data.get("tech_solution"))
+            doc.add_paragraph(section("tech_solution"))
 
         # 3. 实施与售后部分
-        if context_data.get("implementation") or context_data.get("after_sales"):
+        if section("implementation") or section("after_sales"):
             doc.add_heading('第三部分 项目实施与售后服务', 1)
-            if context_data.get("implementation"):
+            if section("implementation"):
                 doc.add_heading('3.1 实施与培训计划', 2)
-                doc.add_paragraph(context_data.get("implementation"))
-            if context_data.get("after_sales"):
+                doc.add_paragraph(section("implementation"))
+            if section("after_sales"):
                 doc.add_heading('3.2 售后服务与故障响应', 2)
-                doc.add_paragraph(context_data.get("after_sales"))
+                doc.add_paragraph(section("after_sales"))
 
-        # 准备写入表格
-        doc.add_heading('第四部分 招标需求点对点响应表', 1)
+        # 准备写入表格（模板里有 {{requirements}} 占位时表格放在占位处）
+        if "requirements" not in slots:
+            doc.add_heading('第四部分 招标需求点对点响应表', 1)
     else:
         if not template_path:
             doc.add_heading('评审办法索引表', 0)
@@ -106,10 +165,9 @@ def render_docx_template(data: Union[List[Dict[str, Any]], Dict[str, Any]], temp
                 if hasattr(item, k) and getattr(item, k): return str(getattr(item, k))
         return ''
 
-    # 填充表格内容
+    # 填充表格内容（先整理成行，再一次性写入表格）
+    rows = []
     for idx, req in enumerate(requirements):
-        row_cells = table.add_row().cells
-
         cat = get_val(req, ['category', '评审大类', '大类']) or str(idx + 1)
         item = get_val(req, ['item', '评审项', 'desc', 'description', 'content'])
 
@@ -119,27 +177,35 @@ def render_docx_template(data: Union[List[Dict[str, Any]], Dict[str, Any]], temp
         else:
             val = get_val(req, ['evidence', 'value', '响应内容'])  # 旧版简短索引
 
-        row_cells[0].text = cat
-        row_cells[1].text = item
-        row_cells[2].text = val
         # 作为正式标书，偏离情况默认自动填写“无偏离”，代表完全满足要求
-        row_cells[3].text = '无偏离'
+        rows.append((cat, item, val, '无偏离'))
+
+    append_table_rows(table, rows)
+
+    if "requirements" in slots:
+        anchor = slots["requirements"][0]._p
+        anchor.addnext(table._tbl)
+        anchor.getparent().remove(anchor)
 
     # ==========================================
     # 模块 C：保存文件
     # ==========================================
-    try:
-        from flask import current_app
-        root = Path(current_app.root_path).parent
-    except:
-        root = Path(os.getcwd())
+    if output_path:
+        out_path = Path(output_path)
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+    else:
+        try:
+            from flask import current_app
+            root = Path(current_app.root_path).parent
+        except:
+            root = Path(os.getcwd())
 
-    out_dir = root / "storage" / "artifacts" / "review_index"
-    out_dir.mkdir(parents=True, exist_ok=True)
+        out_dir = root / "storage" / "artifacts" / "review_index"
+        out_dir.mkdir(parents=True, exist_ok=True)
 
-    prefix = "bidding_document" if is_full_doc else "review_index"
-    filename = f"{prefix}_{uuid.uuid4().hex[:8]}.docx"
-    out_path = out_dir / filename
+        prefix = "bidding_document" if is_full_doc else "review_index"
+        filename = f"{prefix}_{uuid.uuid4().hex[:8]}.docx"
+        out_path = out_dir / filename
 
     doc.save(str(out_path))
     logger.info(f"Generated docx at: {out_path}")
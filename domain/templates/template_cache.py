@@ -0,0 +1,151 @@
+# domain/templates/template_cache.py
+"""
+docx 模板缓存：每个模板只解析一次（key = 路径，按 mtime / 大小判断是否变化），
+解析时统一设置正文字体、登记 {{name}} 占位符所在的段落；每次渲染从内存里的母本深拷贝一份，
+不再重新读盘、解压、解析 XML，也不再重复设置样式。
+
+占位符只识别正文（body 直属）段落里的 {{name}}，name 为字母 / 数字 / 下划线。
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from docx import Document
+from docx.oxml.ns import qn
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPLATE_CACHE_SIZE = 8
+
+PLACEHOLDER = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+_BLANK_KEY = ""
+
+
+def _cache_size() -> int:
+    try:
+        from flask import current_app
+
+        return int(current_app.config.get("DOCX_TEMPLATE_CACHE_SIZE", DEFAULT_TEMPLATE_CACHE_SIZE))
+    except (ImportError, RuntimeError, TypeError, ValueError):
+        return DEFAULT_TEMPLATE_CACHE_SIZE
+
+
+def apply_default_fonts(doc) -> None:
+    # 尝试设置全局中文字体支持
+    try:
+        doc.styles['Normal'].font.name = 'Times New Roman'
+        doc.styles['Normal']._element.rPr.rFonts.set(qn('w:eastAsia'), '宋体')
+    except Exception:
+        pass
+
+
+@dataclass
+class CompiledTemplate:
+    """解析好的模板母本（不直接修改，clone() 后再写）"""
+    path: Optional[str]
+    document: Any
+    slots: Dict[str, List[int]] = field(default_factory=dict)  # 占位符名 -> 正文段落下标
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def clone(self) -> Tuple[Any, Dict[str, List[Any]]]:
+        """返回 (新文档, 占位符名 -> 新文档里对应的段落)"""
+        # 拷贝整个包（part 图），再从拷贝的 part 取一个新的 Document 代理：
+        # 代理对象上缓存的 body 等子元素引用不会被带进副本
+        with self._lock:
+            part = copy.deepcopy(self.document.part)
+        doc = part.document
+        paragraphs = doc.paragraphs if self.slots else []
+        return doc, {name: [paragraphs[i] for i in idx] for name, idx in self.slots.items()}
+
+
+def _find_slots(doc) -> Dict[str, List[int]]:
+    # 只看 body 直属的 w:p，下标与 doc.paragraphs 一致
+    slots: Dict[str, List[int]] = {}
+    for i, p in enumerate(doc.element.body.iterchildren(qn("w:p"))):
+        text = p.text or ""
+        if "{{" not in text:
+            continue
+        for name in PLACEHOLDER.findall(text):
+            idx = slots.setdefault(name, [])
+            if not idx or idx[-1] != i:
+                idx.append(i)
+    return slots
+
+
+def compile_template(template_path: Optional[str]) -> CompiledTemplate:
+    if template_path:
+        try:
+            doc = Document(template_path)
+            logger.info(f"Loaded template: {template_path}")
+        except Exception as e:
+            logger.warning(f"Failed to load template, creating new doc. Error: {e}")
+            doc = Document()
+            template_path = None
+    else:
+        doc = Document()
+    apply_default_fonts(doc)
+    return CompiledTemplate(path=template_path, document=doc, slots=_find_slots(doc) if template_path else {})
+
+
+class TemplateCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[str, Tuple[Tuple[int, int], CompiledTemplate]]" = OrderedDict()
+
+    def get(self, template_path: Optional[str]) -> CompiledTemplate:
+        """template_path 为空或不存在时返回空白文档母本（同样缓存）"""
+        if template_path and os.path.exists(template_path):
+            key = os.path.abspath(template_path)
+            st = os.stat(key)
+            signature = (st.st_mtime_ns, st.st_size)
+        else:
+            key, signature, template_path = _BLANK_KEY, (0, 0), None
+
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None and hit[0] == signature:
+                self._items.move_to_end(key)
+                return hit[1]
+
+        compiled = compile_template(template_path)
+        maxsize = _cache_size()
+        # 解析失败退回空白文档的不缓存，下次重试
+        if maxsize > 0 and compiled.path == template_path:
+            with self._lock:
+                self._items[key] = (signature, compiled)
+                self._items.move_to_end(key)
+                while len(self._items) > maxsize:
+                    self._items.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+_cache = TemplateCache()
+
+
+def get_template_cache() -> TemplateCache:
+    return _cache
+
+
+def fill_slot(paragraphs: List[Any], name: str, value: str) -> None:
+    """把段落里的 {{name}} 替换为 value：占位符在单个 run 内时只改该 run（保留格式），否则整段重写"""
+    pattern = re.compile(r"\{\{\s*" + re.escape(name) + r"\s*\}\}")
+    for p in paragraphs:
+        replaced = False
+        for run in p.runs:
+            if pattern.search(run.text or ""):
+                run.text = pattern.sub(lambda _: value, run.text)
+                replaced = True
+        if not replaced and pattern.search(p.text or ""):
+            p.text = pattern.sub(lambda _: value, p.text)
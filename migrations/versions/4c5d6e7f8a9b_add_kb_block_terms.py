@@ -0,0 +1,77 @@
+"""add kb block bigram term index
+
+Revision ID: 4c5d6e7f8a9b
+Revises: ff9e9ea3f721
+Create Date: 2026-02-02 10:00:00.000000
+
+升级时按现有 kb_blocks 分批回填倒排；之后如有绕过 ORM 的批量写入，执行 `flask kb-rebuild-terms` 重建。
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "4c5d6e7f8a9b"
+down_revision = "ff9e9ea3f721"
+branch_labels = None
+depends_on = None
+
+# 每批读取的切片数
+_BACKFILL_BATCH = 500
+
+
+def _backfill(bind):
+    # 与入库时同一套切词（term_index.block_terms），按 id 分批读取，避免一次把全部正文读进内存
+    from domain.kb.term_index import block_terms
+
+    last_id = ""
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, file_id, content_text FROM kb_blocks WHERE id > :last_id ORDER BY id LIMIT :n"),
+            {"last_id": last_id, "n": _BACKFILL_BATCH},
+        ).all()
+        if not rows:
+            break
+        values = [
+            {"term": term, "block_id": block_id, "file_id": file_id}
+            for block_id, file_id, content_text in rows
+            for term in block_terms(content_text or "")
+        ]
+        if values:
+            bind.execute(
+                sa.text("INSERT INTO kb_block_terms (term, block_id, file_id) VALUES (:term, :block_id, :file_id)"),
+                values,
+            )
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "kb_block_terms" not in insp.get_table_names():
+        op.create_table(
+            "kb_block_terms",
+            sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True, autoincrement=True),
+            sa.Column("term", sa.String(length=8), nullable=False),
+            sa.Column("block_id", sa.String(length=36), nullable=False),
+            sa.Column("file_id", sa.String(length=36), nullable=False),
+            mysql_engine="InnoDB",
+            mysql_charset="utf8mb4",
+        )
+        op.create_index("idx_kb_block_terms_term_block", "kb_block_terms", ["term", "block_id"], unique=False)
+        op.create_index("idx_kb_block_terms_block", "kb_block_terms", ["block_id"], unique=False)
+        op.create_index("idx_kb_block_terms_file", "kb_block_terms", ["file_id"], unique=False)
+        _backfill(bind)
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "kb_block_terms" not in insp.get_table_names():
+        return
+
+    op.drop_index("idx_kb_block_terms_file", table_name="kb_block_terms")
+    op.drop_index("idx_kb_block_terms_block", table_name="kb_block_terms")
+    op.drop_index("idx_kb_block_terms_term_block", table_name="kb_block_terms")
+    op.drop_table("kb_block_terms")
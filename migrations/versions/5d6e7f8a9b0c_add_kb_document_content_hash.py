@@ -0,0 +1,39 @@
+"""add content hash to kb documents
+
+Revision ID: 5d6e7f8a9b0c
+Revises: 4c5d6e7f8a9b
+Create Date: 2026-02-03 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "5d6e7f8a9b0c"
+down_revision = "4c5d6e7f8a9b"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "kb_documents" not in insp.get_table_names():
+        raise RuntimeError("kb_documents table does not exist; please run add_kb_tables migration first")
+
+    cols = [c["name"] for c in insp.get_columns("kb_documents")]
+    if "content_hash" not in cols:
+        op.add_column("kb_documents", sa.Column("content_hash", sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "kb_documents" not in insp.get_table_names():
+        return
+
+    cols = [c["name"] for c in insp.get_columns("kb_documents")]
+    if "content_hash" in cols:
+        op.drop_column("kb_documents", "content_hash")
@@ -0,0 +1,106 @@
+"""add kb document summary columns and tag table
+
+Revision ID: 6e7f8a9b0c1d
+Revises: 5d6e7f8a9b0c
+Create Date: 2026-02-05 10:00:00.000000
+
+升级时按 kb_blocks 回填已有文档的汇总与标签（每项一条集合语句）；
+之后若需校正，可执行 `flask kb-rebuild-summary`。
+"""
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "6e7f8a9b0c1d"
+down_revision = "5d6e7f8a9b0c"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "kb_documents" not in insp.get_table_names():
+        raise RuntimeError("kb_documents table does not exist; please run add_kb_tables migration first")
+
+    cols = [c["name"] for c in insp.get_columns("kb_documents")]
+    if "chunk_count" not in cols:
+        op.add_column("kb_documents", sa.Column("chunk_count", sa.Integer(), nullable=False, server_default="0"))
+    if "total_chars" not in cols:
+        op.add_column("kb_documents", sa.Column("total_chars", sa.BigInteger(), nullable=False, server_default="0"))
+    if "last_ingest_at" not in cols:
+        op.add_column("kb_documents", sa.Column("last_ingest_at", sa.DateTime(), nullable=True))
+
+    existing_indexes = {idx["name"] for idx in insp.get_indexes("kb_documents")}
+    if "ix_kb_documents_last_ingest_at" not in existing_indexes:
+        op.create_index("ix_kb_documents_last_ingest_at", "kb_documents", ["last_ingest_at"])
+
+    if "kb_document_tags" not in insp.get_table_names():
+        op.create_table(
+            "kb_document_tags",
+            sa.Column("file_id", sa.String(length=36), nullable=False),
+            sa.Column("tag", sa.String(length=50), nullable=False),
+            sa.Column("chunk_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("total_chars", sa.BigInteger(), nullable=False, server_default="0"),
+            sa.PrimaryKeyConstraint("file_id", "tag"),
+        )
+        op.create_index("idx_kb_document_tags_tag_file", "kb_document_tags", ["tag", "file_id"])
+
+    _backfill(bind)
+
+
+def _backfill(bind):
+    # 1. 有切片但没有 kb_documents 记录的文件（旧的文档列表直接对 kb_blocks GROUP BY，也会列出它们）
+    missing = bind.execute(sa.text(
+        "SELECT b.file_id, MAX(f.filename) FROM kb_blocks b "
+        "LEFT JOIN files f ON f.id = b.file_id "
+        "WHERE NOT EXISTS (SELECT 1 FROM kb_documents d WHERE d.file_id = b.file_id) "
+        "GROUP BY b.file_id"
+    )).all()
+    if missing:
+        bind.execute(
+            sa.text("INSERT INTO kb_documents (id, file_id, title, chunk_count, total_chars) "
+                    "VALUES (:id, :file_id, :title, 0, 0)"),
+            [{"id": str(uuid.uuid4()), "file_id": file_id, "title": title} for file_id, title in missing],
+        )
+
+    # 2. 汇总：按 file_id 聚合 kb_blocks（与 doc_summary.refresh_summary 的口径一致）
+    bind.execute(sa.text(
+        "UPDATE kb_documents SET "
+        "chunk_count = (SELECT COUNT(*) FROM kb_blocks b WHERE b.file_id = kb_documents.file_id), "
+        "total_chars = (SELECT COALESCE(SUM(b.content_len), 0) FROM kb_blocks b WHERE b.file_id = kb_documents.file_id), "
+        "last_ingest_at = (SELECT MAX(b.created_at) FROM kb_blocks b WHERE b.file_id = kb_documents.file_id)"
+    ))
+
+    # 3. 标签集合及每个 tag 的切片汇总
+    bind.execute(sa.text(
+        "INSERT INTO kb_document_tags (file_id, tag, chunk_count, total_chars) "
+        "SELECT b.file_id, b.tag, COUNT(*), COALESCE(SUM(b.content_len), 0) FROM kb_blocks b "
+        "WHERE b.tag IS NOT NULL AND b.tag <> '' "
+        "AND NOT EXISTS (SELECT 1 FROM kb_document_tags t WHERE t.file_id = b.file_id AND t.tag = b.tag) "
+        "GROUP BY b.file_id, b.tag"
+    ))
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "kb_document_tags" in insp.get_table_names():
+        op.drop_index("idx_kb_document_tags_tag_file", table_name="kb_document_tags")
+        op.drop_table("kb_document_tags")
+
+    if "kb_documents" not in insp.get_table_names():
+        return
+
+    existing_indexes = {idx["name"] for idx in insp.get_indexes("kb_documents")}
+    if "ix_kb_documents_last_ingest_at" in existing_indexes:
+        op.drop_index("ix_kb_documents_last_ingest_at", table_name="kb_documents")
+
+    cols = [c["name"] for c in insp.get_columns("kb_documents")]
+    for col in ("last_ingest_at", "total_chars", "chunk_count"):
+        if col in cols:
+            op.drop_column("kb_documents", col)
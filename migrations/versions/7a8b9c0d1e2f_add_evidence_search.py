@@ -0,0 +1,106 @@
+"""add evidence_search table with full-text index
+
+Revision ID: 7a8b9c0d1e2f
+Revises: 6e7f8a9b0c1d
+Create Date: 2026-03-02 10:00:00.000000
+
+升级时会按现有 evidences 回填；之后如有绕过 ORM 的批量写入，执行 `flask index-rebuild-search` 重建。
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "7a8b9c0d1e2f"
+down_revision = "6e7f8a9b0c1d"
+branch_labels = None
+depends_on = None
+
+FTS_TABLE = "evidence_search_fts"
+
+
+def _backfill(bind):
+    rows = bind.execute(sa.text(
+        "SELECT e.id, dt.name, dt.code, e.cert_no, e.issuer, e.tags, p.name, c.name "
+        "FROM evidences e "
+        "LEFT JOIN document_types dt ON e.document_type_id = dt.id "
+        "LEFT JOIN persons p ON e.scope = 'PERSON' AND e.owner_id = p.id "
+        "LEFT JOIN companies c ON e.scope = 'COMPANY' AND e.owner_id = c.id"
+    )).fetchall()
+    values = [
+        {"evidence_id": r[0], "search_text": "\n".join(p.strip().lower() for p in r[1:] if p and p.strip())}
+        for r in rows
+    ]
+    if values:
+        bind.execute(
+            sa.text("INSERT INTO evidence_search (evidence_id, search_text, updated_at) "
+                    "VALUES (:evidence_id, :search_text, CURRENT_TIMESTAMP)"),
+            values,
+        )
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "evidence_search" in insp.get_table_names():
+        return
+
+    op.create_table(
+        "evidence_search",
+        sa.Column("evidence_id", sa.String(length=36), nullable=False),
+        sa.Column("search_text", sa.Text(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("evidence_id"),
+        mysql_engine="InnoDB",
+        mysql_charset="utf8mb4",
+    )
+    _backfill(bind)
+
+    if bind.dialect.name == "mysql":
+        op.create_index(
+            "ft_evidence_search_text",
+            "evidence_search",
+            ["search_text"],
+            unique=False,
+            mysql_prefix="FULLTEXT",
+            mysql_with_parser="ngram",
+        )
+    elif bind.dialect.name == "sqlite":
+        # 与 domain/index/search_table.py 中的 DDL 一致；SQLite 不支持 FTS5 / trigram 时检索退回 LIKE
+        try:
+            op.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                f"search_text, content='evidence_search', content_rowid='rowid', tokenize='trigram')"
+            )
+        except sa.exc.DBAPIError:
+            return
+        op.execute(
+            f"CREATE TRIGGER evidence_search_ai AFTER INSERT ON evidence_search BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.rowid, new.search_text); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER evidence_search_ad AFTER DELETE ON evidence_search BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) "
+            f"VALUES ('delete', old.rowid, old.search_text); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER evidence_search_au AFTER UPDATE ON evidence_search BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, search_text) "
+            f"VALUES ('delete', old.rowid, old.search_text); "
+            f"INSERT INTO {FTS_TABLE}(rowid, search_text) VALUES (new.rowid, new.search_text); END"
+        )
+        op.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if "evidence_search" not in insp.get_table_names():
+        return
+
+    if bind.dialect.name == "sqlite":
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif bind.dialect.name == "mysql":
+        op.drop_index("ft_evidence_search_text", table_name="evidence_search")
+    op.drop_table("evidence_search")
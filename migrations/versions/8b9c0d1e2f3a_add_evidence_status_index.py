@@ -0,0 +1,80 @@
+"""materialize evidence validity status and add owner/doc/status index
+
+Revision ID: 8b9c0d1e2f3a
+Revises: 7a8b9c0d1e2f
+Create Date: 2026-03-09 10:00:00.000000
+
+升级时按当天回填 status；之后由进程内定时任务（或 `flask index-refresh-status`）刷新。
+"""
+from datetime import date, datetime, time, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import inspect
+
+revision = "8b9c0d1e2f3a"
+down_revision = "7a8b9c0d1e2f"
+branch_labels = None
+depends_on = None
+
+OLD_STATUS = sa.Enum("VALID", "EXPIRED", "UNKNOWN", name="evidence_status_enum")
+NEW_STATUS = sa.Enum("VALID", "EXPIRED", "EXPIRING_SOON", "UNKNOWN", name="evidence_status_enum")
+
+# 与 EVIDENCE_EXPIRING_SOON_DAYS 的默认值一致；配置了其它值时首轮定时刷新会修正
+EXPIRING_SOON_DAYS = 30
+
+
+def upgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    if bind.dialect.name == "mysql":
+        op.alter_column(
+            "evidences",
+            "status",
+            existing_type=OLD_STATUS,
+            type_=NEW_STATUS,
+            existing_nullable=False,
+            existing_server_default="UNKNOWN",
+        )
+
+    start = datetime.combine(date.today(), time.min)
+    soon_end = start + timedelta(days=EXPIRING_SOON_DAYS + 1)
+    bind.execute(sa.text("UPDATE evidences SET status = 'EXPIRED' WHERE expires_at < :start"), {"start": start})
+    bind.execute(
+        sa.text("UPDATE evidences SET status = 'EXPIRING_SOON' WHERE expires_at >= :start AND expires_at < :soon_end"),
+        {"start": start, "soon_end": soon_end},
+    )
+    bind.execute(
+        sa.text("UPDATE evidences SET status = 'VALID' WHERE expires_at IS NULL OR expires_at >= :soon_end"),
+        {"soon_end": soon_end},
+    )
+
+    existing_indexes = {idx["name"] for idx in insp.get_indexes("evidences")}
+    if "idx_owner_doc_status" not in existing_indexes:
+        op.create_index(
+            "idx_owner_doc_status",
+            "evidences",
+            ["scope", "owner_id", "document_type_id", "status", "expires_at"],
+            unique=False,
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    insp = inspect(bind)
+
+    existing_indexes = {idx["name"] for idx in insp.get_indexes("evidences")}
+    if "idx_owner_doc_status" in existing_indexes:
+        op.drop_index("idx_owner_doc_status", table_name="evidences")
+
+    bind.execute(sa.text("UPDATE evidences SET status = 'VALID' WHERE status = 'EXPIRING_SOON'"))
+    if bind.dialect.name == "mysql":
+        op.alter_column(
+            "evidences",
+            "status",
+            existing_type=NEW_STATUS,
+            type_=OLD_STATUS,
+            existing_nullable=False,
+            existing_server_default="UNKNOWN",
+        )
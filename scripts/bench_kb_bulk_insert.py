@@ -0,0 +1,153 @@
+# scripts/bench_kb_bulk_insert.py
+"""
+对比 KB 切片写入方式的吞吐（rows/sec）：
+  - orm:  逐个构造 KbBlock ORM 对象 + add_all + commit（旧入库路径）
+  - bulk: domain.kb.block_writer.bulk_insert_blocks（Core executemany，分批）
+默认使用临时 SQLite 文件库，可用 --db-uri 指向 MySQL 测试库（会建表并清空 kb_blocks / kb_block_terms）。
+
+用法：
+  python scripts/bench_kb_bulk_insert.py --rows 5000 --chunk-chars 800
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from flask import Flask
+
+from app.extensions import db
+from app.models import KbBlock, KbBlockTerm
+from domain.kb import term_index
+from domain.kb.block_writer import build_block_row, bulk_insert_blocks
+
+_SAMPLE = "我方具备完善的项目实施方案与售后服务体系，智能客服系统支持语音识别、语义理解和多轮对话。"
+
+
+def _make_app(db_uri: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def _fake_chunks(n: int, chunk_chars: int):
+    rnd = random.Random(42)
+    for _ in range(n):
+        start = rnd.randrange(len(_SAMPLE))
+        text = (_SAMPLE[start:] + _SAMPLE * (chunk_chars // len(_SAMPLE) + 1))[:chunk_chars]
+        yield text
+
+
+def _reset():
+    db.session.query(KbBlockTerm).delete()
+    db.session.query(KbBlock).delete()
+    db.session.commit()
+
+
+def bench_orm(n: int, chunk_chars: int, with_terms: bool) -> float:
+    _reset()
+    file_id = str(uuid.uuid4())
+    t0 = time.perf_counter()
+    blocks = []
+    for idx, text in enumerate(_fake_chunks(n, chunk_chars)):
+        blocks.append(
+            KbBlock(
+                id=str(uuid.uuid4()),
+                file_id=file_id,
+                content_text=text,
+                content_len=len(text),
+                tag="bench",
+                meta_json=f'{{"chunk_index": {idx}, "source": "bench.docx"}}',
+                created_at=datetime.now(),
+            )
+        )
+    db.session.add_all(blocks)
+    if with_terms:
+        term_index.index_blocks((b.id, b.file_id, b.content_text) for b in blocks)
+    db.session.commit()
+    return time.perf_counter() - t0
+
+
+def bench_bulk(n: int, chunk_chars: int, with_terms: bool, batch_size: int) -> float:
+    _reset()
+    file_id = str(uuid.uuid4())
+    t0 = time.perf_counter()
+    now = datetime.now()
+    rows = (
+        build_block_row(
+            file_id=file_id,
+            content_text=text,
+            tag="bench",
+            meta={"chunk_index": idx, "source": "bench.docx"},
+            created_at=now,
+        )
+        for idx, text in enumerate(_fake_chunks(n, chunk_chars))
+    )
+    if with_terms:
+        bulk_insert_blocks(rows, batch_size=batch_size)
+    else:
+        from sqlalchemy import insert
+
+        batch = []
+        for r in rows:
+            batch.append(r)
+            if len(batch) >= batch_size:
+                db.session.execute(insert(KbBlock), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(KbBlock), batch)
+    db.session.commit()
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark KB block insertion (ORM vs Core bulk)")
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--chunk-chars", type=int, default=800)
+    ap.add_argument("--batch-size", type=int, default=1000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--db-uri", default=None, help="默认使用临时 SQLite 文件")
+    args = ap.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    db_uri = args.db_uri or f"sqlite:///{Path(tmp_dir.name) / 'bench.db'}"
+    app = _make_app(db_uri)
+
+    results = []
+    with app.app_context():
+        db.create_all()
+        for with_terms in (False, True):
+            for name in ("orm", "bulk"):
+                best = None
+                for _ in range(max(args.repeat, 1)):
+                    if name == "orm":
+                        dt = bench_orm(args.rows, args.chunk_chars, with_terms)
+                    else:
+                        dt = bench_bulk(args.rows, args.chunk_chars, with_terms, args.batch_size)
+                    best = dt if best is None else min(best, dt)
+                results.append({
+                    "mode": name,
+                    "with_terms": with_terms,
+                    "rows": args.rows,
+                    "seconds": round(best, 4),
+                    "rows_per_sec": round(args.rows / best, 1),
+                })
+        _reset()
+
+    for r in results:
+        print(json.dumps(r, ensure_ascii=False))
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# scripts/bench_kb_evidence.py
+"""
+评分模板证据召回耗时（整份模板）：
+  - per_row:  每行一条 SQL，检索词各生成 lower(...) LIKE + CASE 打分（改造前的 retrieve_evidence_blocks）
+  - prepared: EvidenceTermIndex 为整份模板准备一次倒排，逐行在内存里按 postings 算分
+同时校验两种方式每行的得分序列一致。
+默认使用临时 SQLite 文件库，可用 --db-uri 指向 MySQL 测试库。
+
+用法：
+  python scripts/bench_kb_evidence.py --rows 60 --blocks 20000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from flask import Flask
+from sqlalchemy import case, desc, func, or_, select, union
+
+from app.extensions import db
+from app.models import File, KbBlock
+from domain.kb.block_writer import build_block_row, bulk_insert_blocks
+from domain.kb.term_index import match_block_ids
+from domain.review_index.kb_evidence import EvidenceTermIndex, _extract_terms
+
+_MATERIALS = [
+    "营业执照", "ISO9001质量管理体系认证", "ISO27001信息安全管理体系认证", "CMMI5级证书", "高新技术企业证书",
+    "软件著作权登记证书", "类似项目合同", "验收报告", "社保缴纳证明", "财务审计报告", "纳税证明", "信用中国查询截图",
+    "项目经理资格证书", "技术人员职称证书", "售后服务承诺函", "应急响应方案", "培训方案", "系统架构设计说明",
+]
+_FILLER = "投标人提供的证明材料须真实有效，加盖公章，复印件清晰可辨。"
+
+
+def _make_app(db_uri: str) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["KB_SEARCH_CACHE_SIZE"] = 0
+    db.init_app(app)
+    return app
+
+
+def _seed(n_blocks: int, n_files: int) -> None:
+    rnd = random.Random(11)
+    file_ids = []
+    for i in range(n_files):
+        file_id = str(uuid.uuid4())
+        file_ids.append(file_id)
+        name = f"{rnd.choice(_MATERIALS)}_{i}.docx" if i % 4 == 0 else f"资料汇编_{i}.docx"
+        db.session.add(File(id=file_id, filename=name, ext="docx", size=1, storage_path="x"))
+    db.session.commit()
+
+    rows = []
+    for i in range(n_blocks):
+        text = "；".join(rnd.sample(_MATERIALS, 2)) + "。" + _FILLER * rnd.randint(1, 8)
+        rows.append(build_block_row(file_id=rnd.choice(file_ids), content_text=text, tag="bench",
+                                    meta={"chunk_index": i}))
+    bulk_insert_blocks(rows)
+    db.session.commit()
+
+
+def _template(n_rows: int):
+    rnd = random.Random(5)
+    rows = []
+    for i in range(n_rows):
+        major, *materials = rnd.sample(_MATERIALS, rnd.randint(2, 3))
+        rows.append({
+            "score_major": f"{major}（{rnd.randint(1, 10)}分）",
+            "score_minor": rnd.choice(["资质", "业绩", "人员", "服务", "技术 ASR OCR"]),
+            "score_rule": rnd.choice(["提供 ISO9001、ISO27001 证书得分", "具备 CMMI5 资质得分", "提供有效证明材料得分"]),
+            "evidence_materials": "；".join(materials),
+        })
+    return rows
+
+
+def per_row(score_row, tag, top_n=3):
+    """改造前的逐行查询（保留在这里作对照）"""
+    terms = _extract_terms(score_row)
+    if not terms:
+        return []
+    q = db.session.query(KbBlock, File).join(File, KbBlock.file_id == File.id)
+    if tag:
+        q = q.filter(KbBlock.tag == tag)
+    like_filters, score_parts, title_filters, candidate_sqs = [], [], [], []
+    indexable = True
+    for t in terms:
+        pat = f"%{t.lower()}%"
+        title_like = func.lower(File.filename).like(pat)
+        content_like = func.lower(KbBlock.content_text).like(pat)
+        like_filters += [title_like, content_like]
+        title_filters.append(title_like)
+        score_parts += [case((title_like, 5), else_=0), case((content_like, 1), else_=0)]
+        sq = match_block_ids(t)
+        if sq is None:
+            indexable = False
+        else:
+            candidate_sqs.append(sq)
+    if indexable:
+        content_ids = candidate_sqs[0] if len(candidate_sqs) == 1 else union(*candidate_sqs)
+        title_file_ids = select(File.id).where(or_(*title_filters))
+        q = q.filter(or_(KbBlock.id.in_(content_ids), KbBlock.file_id.in_(title_file_ids)))
+    rows = (
+        q.filter(or_(*like_filters))
+        .with_entities(KbBlock, File, sum(score_parts).label("score"))
+        .order_by(desc("score"), desc(KbBlock.created_at))
+        .limit(top_n)
+        .all()
+    )
+    return [{"block_id": b.id, "score": int(s or 0), "excerpt": (b.content_text or "")[:800]} for b, _, s in rows]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark score-template evidence retrieval")
+    ap.add_argument("--rows", type=int, default=60, help="评分模板行数")
+    ap.add_argument("--blocks", type=int, default=20000)
+    ap.add_argument("--files", type=int, default=400)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--db-uri", default=None, help="默认使用临时 SQLite 文件")
+    args = ap.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    db_uri = args.db_uri or f"sqlite:///{Path(tmp_dir.name) / 'bench.db'}"
+    app = _make_app(db_uri)
+
+    with app.app_context():
+        db.create_all()
+        _seed(args.blocks, args.files)
+        template = _template(args.rows)
+
+        timings = {}
+        outputs = {}
+        for mode in ("per_row", "prepared"):
+            best = None
+            for _ in range(max(args.repeat, 1)):
+                t0 = time.perf_counter()
+                if mode == "per_row":
+                    out = [per_row(row, "bench") for row in template]
+                else:
+                    out = EvidenceTermIndex.prepare(template, tag="bench").retrieve_all(template)
+                dt = time.perf_counter() - t0
+                best = dt if best is None else min(best, dt)
+            timings[mode] = best
+            outputs[mode] = [[e["score"] for e in r] for r in out]
+
+        for mode, seconds in timings.items():
+            print(json.dumps({
+                "mode": mode,
+                "template_rows": args.rows,
+                "blocks": args.blocks,
+                "seconds": round(seconds, 4),
+                "rows_per_sec": round(args.rows / max(seconds, 1e-9), 1),
+            }, ensure_ascii=False))
+        print(json.dumps({"scores_match": outputs["per_row"] == outputs["prepared"]}))
+
+        if args.db_uri is None:
+            db.session.remove()
+            db.engine.dispose()
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
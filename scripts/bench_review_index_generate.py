@@ -0,0 +1,142 @@
+# scripts/bench_review_index_generate.py
+"""
+标书生成端到端耗时（加载评审要求 + 证据检索 + 渲染 docx）：
+  - per_query:  每个固定章节 / 每行需求各查一次库（批量检索之前的做法）
+  - batch:      所有 query 合并成批量检索，串行执行（concurrency=1）
+  - concurrent: 批量检索分组后并发执行（--concurrency 个线程，各自独立 session）
+默认使用临时 SQLite 文件库（内存库多线程共用一个连接，无法体现并发），可用 --db-uri 指向 MySQL 测试库。
+检索缓存关闭，每轮都真实查库。
+
+用法：
+  python scripts/bench_review_index_generate.py --requirements 300 --blocks 5000
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from flask import Flask
+
+from app.extensions import db
+from app.models import File, Job
+from domain.kb.block_writer import build_block_row, bulk_insert_blocks
+from domain.review_index import generator as generator_module
+from domain.review_index.generator import BiddingDocumentGenerator
+
+_TOPICS = [
+    "智能客服", "语音识别", "语义理解", "多轮对话", "售后服务", "应急响应", "故障修复", "培训计划",
+    "交付周期", "系统架构", "数据安全", "等级保护", "质量管理", "项目实施", "运维监控", "知识库",
+    "工单系统", "坐席管理", "质检分析", "报表统计",
+]
+_FILLER = "我方具备完善的实施方案与服务体系，相关能力已在多个同类项目中落地验证。"
+
+
+def _make_app(db_uri: str, batch: int) -> Flask:
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = db_uri
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["KB_SEARCH_CACHE_SIZE"] = 0
+    app.config["REVIEW_INDEX_RETRIEVE_BATCH"] = batch
+    db.init_app(app)
+    return app
+
+
+def _seed(n_blocks: int, n_requirements: int, tmp: Path) -> str:
+    rnd = random.Random(7)
+    file_id = str(uuid.uuid4())
+    db.session.add(File(id=file_id, filename="bench.docx", ext="docx", size=1, storage_path="x"))
+
+    rows = []
+    for i in range(n_blocks):
+        topics = rnd.sample(_TOPICS, 3)
+        text = "，".join(topics) + "。" + _FILLER * rnd.randint(2, 12) + f"（编号{i}）"
+        rows.append(build_block_row(file_id=file_id, content_text=text, tag="bench", meta={"chunk_index": i}))
+    bulk_insert_blocks(rows)
+
+    requirements = []
+    for i in range(n_requirements):
+        a, b = rnd.sample(_TOPICS, 2)
+        # 一部分需求是两个主题的组合（多数查不到），一部分是单个主题
+        item = f"{a}，{b}" if i % 3 == 0 else a if i % 3 == 1 else f"{a}（{i}）"
+        requirements.append({"category": f"第{i // 20 + 1}类", "item": item, "value": "", "source": ""})
+    result_path = tmp / "result.json"
+    result_path.write_text(json.dumps({"tables": [{"rows": requirements}]}, ensure_ascii=False), encoding="utf-8")
+
+    job_id = str(uuid.uuid4())
+    db.session.add(Job(id=job_id, file_id=file_id, script_id="BENCH", model_id="bench",
+                       status="SUCCEEDED", artifact_json_path=str(result_path)))
+    db.session.commit()
+    return job_id
+
+
+def _run(job_id: str, out: Path, mode: str, concurrency: int) -> float:
+    generator = BiddingDocumentGenerator(job_id)
+    original = BiddingDocumentGenerator.search_evidence_batch
+    if mode == "per_query":
+        def per_query(self, queries, tag=None, top_k=3, concurrency=None):
+            return [original(self, [q], tag=tag, top_k=top_k, concurrency=1)[0] if q else [] for q in queries]
+        BiddingDocumentGenerator.search_evidence_batch = per_query
+    elif mode == "batch":
+        concurrency = 1
+
+    setting = generator_module._generator_setting
+    generator_module._generator_setting = (
+        lambda name, default: concurrency if name == "REVIEW_INDEX_RETRIEVE_CONCURRENCY" else setting(name, default)
+    )
+    try:
+        t0 = time.perf_counter()
+        generator.generate_full_document(kb_tag="bench", top_n=3, output_path=str(out))
+        return time.perf_counter() - t0
+    finally:
+        BiddingDocumentGenerator.search_evidence_batch = original
+        generator_module._generator_setting = setting
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark end-to-end bid document generation")
+    ap.add_argument("--requirements", type=int, default=300)
+    ap.add_argument("--blocks", type=int, default=5000)
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--batch", type=int, default=200, help="REVIEW_INDEX_RETRIEVE_BATCH")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--db-uri", default=None, help="默认使用临时 SQLite 文件")
+    args = ap.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    tmp = Path(tmp_dir.name)
+    db_uri = args.db_uri or f"sqlite:///{tmp / 'bench.db'}"
+    app = _make_app(db_uri, args.batch)
+
+    with app.app_context():
+        db.create_all()
+        job_id = _seed(args.blocks, args.requirements, tmp)
+
+        for mode in ("per_query", "batch", "concurrent"):
+            best = None
+            for i in range(max(args.repeat, 1)):
+                dt = _run(job_id, tmp / f"{mode}_{i}.docx", mode, args.concurrency)
+                best = dt if best is None else min(best, dt)
+            print(json.dumps({
+                "mode": mode,
+                "requirements": args.requirements,
+                "blocks": args.blocks,
+                "concurrency": args.concurrency if mode == "concurrent" else 1,
+                "seconds": round(best, 4),
+            }, ensure_ascii=False))
+
+        if args.db_uri is None:
+            db.session.remove()
+            db.engine.dispose()
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import argparse
 import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Dict, Any, Tuple
 
@@ -35,18 +37,50 @@ def upload_file(
     return file_id
 
 
-def ingest_kb(
+def submit_kb_ingest(
     session: requests.Session,
     kb_ingest_url: str,
     file_id: str,
-    title: Optional[str] = None,
+    tag: Optional[str] = None,
+    strategy: Optional[str] = None,
     timeout: int = 60,
-) -> Dict[str, Any]:
-    payload = {"file_id": file_id, "title": title}
+) -> str:
+    """
+    提交异步入库任务，返回 job_id
+    """
+    payload = {"file_id": file_id, "tag": tag}
+    if strategy:
+        payload["strategy"] = strategy
     resp = session.post(kb_ingest_url, json=payload, timeout=timeout)
-    if resp.status_code != 200:
+    if resp.status_code not in (200, 201, 202):
         raise RuntimeError(f"kb ingest failed: {resp.status_code} {resp.text}")
-    return resp.json()
+    job_id = resp.json().get("job_id")
+    if not job_id:
+        raise RuntimeError(f"kb ingest response missing job_id: {resp.text}")
+    return job_id
+
+
+def wait_job(
+    session: requests.Session,
+    job_url: str,
+    poll_interval: float = 2.0,
+    job_timeout: float = 3600,
+    timeout: int = 60,
+) -> Dict[str, Any]:
+    """
+    轮询任务直到 SUCCEEDED / FAILED，返回最终任务状态
+    """
+    deadline = time.monotonic() + job_timeout
+    while True:
+        resp = session.get(job_url, timeout=timeout)
+        if resp.status_code != 200:
+            raise RuntimeError(f"poll job failed: {resp.status_code} {resp.text}")
+        job = resp.json()
+        if job.get("status") in ("SUCCEEDED", "FAILED"):
+            return job
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"job timeout: stage={job.get('stage')} progress={job.get('progress')}")
+        time.sleep(poll_interval)
 
 
 def guess_title(file_path: Path) -> str:
@@ -54,6 +88,58 @@ def guess_title(file_path: Path) -> str:
     return file_path.stem
 
 
+def process_one(p: Path, args, server: str) -> Dict[str, Any]:
+    """
+    单个文件：上传 -> 提交入库任务 -> 等待完成（在线程池里并发执行）
+    """
+    record: Dict[str, Any] = {"path": str(p)}
+    try:
+        title = guess_title(p)
+        record["title"] = title
+
+        if args.dry_run:
+            record["dry_run"] = True
+            return record
+
+        # requests.Session 不是线程安全的，每个任务单独建一个
+        with requests.Session() as session:
+            file_id = upload_file(
+                session=session,
+                upload_url=server + args.upload_url,
+                file_path=p,
+                field_name=args.upload_field,
+            )
+            record["file_id"] = file_id
+
+            job_id = submit_kb_ingest(
+                session=session,
+                kb_ingest_url=server + args.kb_ingest_url,
+                file_id=file_id,
+                tag=args.tag,
+                strategy=args.strategy,
+            )
+            record["job_id"] = job_id
+
+            job = wait_job(
+                session=session,
+                job_url=f"{server}{args.job_url}/{job_id}",
+                poll_interval=args.poll_interval,
+                job_timeout=args.job_timeout,
+            )
+        record["job"] = job
+        if job.get("status") == "SUCCEEDED":
+            record["status"] = "ok"
+        else:
+            record["status"] = "failed"
+            record["error"] = job.get("error")
+
+    except Exception as e:
+        record["status"] = "failed"
+        record["error"] = str(e)
+
+    return record
+
+
 def main():
     ap = argparse.ArgumentParser(description="Bulk upload files and ingest into KB")
     ap.add_argument("--root", required=True, help="本地文件夹路径（递归扫描）")
@@ -62,6 +148,12 @@ def main():
     ap.add_argument("--upload-url", default="/api/v1/files/upload", help="上传接口路径（相对 server）")
     ap.add_argument("--upload-field", default="file", help="上传表单字段名（默认 file）")
     ap.add_argument("--kb-ingest-url", default="/api/v1/kb/ingest", help="KB ingest 接口路径（相对 server）")
+    ap.add_argument("--job-url", default="/api/v1/jobs", help="任务查询接口路径（相对 server）")
+    ap.add_argument("--tag", default="general", help="知识库标签")
+    ap.add_argument("--strategy", default=None, choices=["semantic", "structure"], help="切片策略（默认取服务端配置）")
+    ap.add_argument("--concurrency", type=int, default=4, help="同时在途的入库任务数")
+    ap.add_argument("--poll-interval", type=float, default=2.0, help="任务轮询间隔（秒）")
+    ap.add_argument("--job-timeout", type=float, default=3600, help="单个任务最长等待时间（秒）")
     ap.add_argument("--dry-run", action="store_true", help="只打印不执行")
     ap.add_argument("--out", default="bulk_kb_result.jsonl", help="输出结果（jsonl）")
     args = ap.parse_args()
@@ -71,57 +163,27 @@ def main():
         raise SystemExit(f"root not found: {root}")
 
     server = args.server.rstrip("/")
-    upload_url = server + args.upload_url
-    kb_ingest_url = server + args.kb_ingest_url
 
     files = sorted(root.rglob(args.pattern))
     if not files:
         print(f"No files matched: {root} / {args.pattern}")
         return
 
-    session = requests.Session()
-
     out_path = Path(args.out).resolve()
     ok = 0
     fail = 0
 
-    with out_path.open("w", encoding="utf-8") as out_f:
-        for p in tqdm(files, desc="ingesting"):
-            record: Dict[str, Any] = {"path": str(p)}
-            try:
-                title = guess_title(p)
-                record["title"] = title
-
-                if args.dry_run:
-                    record["dry_run"] = True
-                    out_f.write(json.dumps(record, ensure_ascii=False) + "\n")
-                    ok += 1
-                    continue
-
-                file_id = upload_file(
-                    session=session,
-                    upload_url=upload_url,
-                    file_path=p,
-                    field_name=args.upload_field,
-                )
-                record["file_id"] = file_id
-
-                kb_result = ingest_kb(
-                    session=session,
-                    kb_ingest_url=kb_ingest_url,
-                    file_id=file_id,
-                    title=title,
-                )
-                record["kb_result"] = kb_result
-                record["status"] = "ok"
-                ok += 1
-
-            except Exception as e:
-                record["status"] = "failed"
-                record["error"] = str(e)
+    with out_path.open("w", encoding="utf-8") as out_f, \
+            ThreadPoolExecutor(max_workers=max(args.concurrency, 1)) as pool:
+        futures = [pool.submit(process_one, p, args, server) for p in files]
+        for fut in tqdm(as_completed(futures), total=len(futures), desc="ingesting"):
+            record = fut.result()
+            if record.get("status") == "failed":
                 fail += 1
-
+            else:
+                ok += 1
             out_f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out_f.flush()
 
     print(f"Done. ok={ok} fail={fail}. results -> {out_path}")
 
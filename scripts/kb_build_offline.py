@@ -1,6 +1,5 @@
-# scripts/kb_ingest_offline.py
+# scripts/kb_build_offline.py
 import argparse
-import json
 import sys
 from pathlib import Path
 
@@ -9,8 +8,7 @@ if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from app import create_app
-from app.extensions import db
-from domain.kb.ingest import ingest_kb_from_path
+from domain.kb.offline_builder import ingest_dir_offline
 
 
 def main():
@@ -24,45 +22,35 @@ def main():
         default=["storage/kb/blocks", r"storage\kb\blocks", "instance/kb_storage", r"instance\kb_storage"],
         help="排除目录（相对 root）。可多次传入：--exclude xxx",
     )
-    ap.add_argument("--out", default="kb_ingest_offline.jsonl")
+    ap.add_argument("--chunk-chars", type=int, default=1500)
+    ap.add_argument("--overlap", type=int, default=200)
+    ap.add_argument("--workers", type=int, default=1, help="读取/切片进程数（>1 时启用并发流水线，写库始终单进程）")
+    ap.add_argument("--fresh", action="store_true", help="忽略已有检查点，从头开始（会清空 --out）")
+    ap.add_argument("--out", default="kb_offline_build.jsonl", help="结果日志（jsonl），同时作为断点续跑的检查点")
     args = ap.parse_args()
 
     root = Path(args.root).expanduser().resolve()
     if not root.exists():
         raise SystemExit(f"root not found: {root}")
 
-    exclude_paths = [(root / x).resolve() for x in (args.exclude or [])]
-
     app = create_app()
     out_path = Path(args.out).expanduser().resolve()
 
-    ok = 0
-    fail = 0
-    results = []
-
     with app.app_context():
-        for p in root.rglob(args.pattern):
-            rp = p.resolve()
-
-            # ✅ 排除切片产物目录，避免递归把生成的 blocks 再次当输入
-            if any(str(rp).startswith(str(ex)) for ex in exclude_paths):
-                continue
-
-            try:
-                res = ingest_kb_from_path(str(rp), title=rp.stem, tag=args.tag)
-                res["status"] = "ok"
-                res["path"] = str(rp)
-                results.append(res)
-                ok += 1
-            except Exception as e:
-                db.session.rollback()
-                results.append({"status": "failed", "path": str(rp), "error": str(e)})
-                fail += 1
-
-    with out_path.open("w", encoding="utf-8") as f:
-        for r in results:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
-
+        results = ingest_dir_offline(
+            str(root),
+            pattern=args.pattern,
+            tag=args.tag,
+            chunk_chars=args.chunk_chars,
+            overlap=args.overlap,
+            exclude_subdirs=args.exclude,
+            workers=args.workers,
+            checkpoint=str(out_path),
+            fresh=args.fresh,
+        )
+
+    ok = sum(1 for r in results if r.get("status") == "ok")
+    fail = sum(1 for r in results if r.get("status") == "failed")
     print(f"Done. ok={ok} fail={fail}. results -> {out_path}")
 
 
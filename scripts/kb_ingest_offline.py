@@ -3,7 +3,6 @@ import json
 import sys
 import uuid
 from datetime import datetime  # 【核心修改】引入 datetime
-import mimetypes
 from pathlib import Path
 
 # 添加项目根目录到 sys.path
@@ -13,8 +12,9 @@ if str(ROOT) not in sys.path:
 
 from app import create_app
 from app.extensions import db
-from app.models import File
-from domain.kb.ingest import IngestLogic
+from app.models import File, KbDocument
+from domain.kb.ingest import chunk_settings, file_chunker, prepare_file_chunks, write_prepared_file
+from domain.kb.pipeline import CheckpointLog, load_checkpoint, run_pipeline
 
 
 def main():
@@ -28,7 +28,16 @@ def main():
         default=["storage/kb/blocks", r"storage\kb\blocks", "instance", ".git", "__pycache__"],
         help="排除目录（相对 root 或 绝对路径部分匹配）。可多次传入：--exclude xxx",
     )
-    ap.add_argument("--out", default="kb_ingest_offline.jsonl")
+    ap.add_argument("--out", default="kb_ingest_offline.jsonl", help="结果日志（jsonl），同时作为断点续跑的检查点")
+    ap.add_argument("--workers", type=int, default=1, help="解析/切片进程数（>1 时启用并发流水线，写库始终单进程）")
+    ap.add_argument("--fresh", action="store_true", help="忽略已有检查点，从头开始（会清空 --out）")
+    ap.add_argument("--report-every", type=float, default=10.0, help="吞吐统计输出间隔（秒）")
+    ap.add_argument(
+        "--strategy",
+        default=None,
+        choices=["semantic", "structure"],
+        help="切片策略：semantic 语义切分（需加载模型）/ structure 按标题编号结构切分（无模型，快）；默认取配置 KB_CHUNK_STRATEGY",
+    )
     args = ap.parse_args()
 
     root = Path(args.root).expanduser().resolve()
@@ -41,78 +50,81 @@ def main():
     app = create_app()
     out_path = Path(args.out).expanduser().resolve()
 
-    ok = 0
-    fail = 0
-    results = []
-
-    print(f"Start scanning: {root} pattern={args.pattern}")
-
+    # 切片配置（KB_CHUNK_STRATEGY / KB_CHUNK_MIN_CHARS / KB_CHUNK_MAX_CHARS）在主进程解析，子进程读不到 app config
     with app.app_context():
-        # 递归查找文件
-        files_to_process = list(root.rglob(args.pattern))
-        total_files = len(files_to_process)
-        print(f"Found {total_files} files.")
-
-        for idx, p in enumerate(files_to_process, 1):
-            rp = p.resolve()
-            str_rp = str(rp)
-
-            # 1. 排除检查
-            if any(ex in str_rp for ex in exclude_paths):
-                print(f"[{idx}/{total_files}] Skipped (excluded): {p.name}")
-                continue
-
-            # 忽略临时文件
-            if p.name.startswith("~$"):
-                continue
-
-            try:
-                print(f"[{idx}/{total_files}] Processing: {p.name} ...")
-
-                file_id = str(uuid.uuid4())
-                stat = p.stat()
-                ext = p.suffix.lstrip(".").lower()
-
-                # 【核心修复】创建 File 记录，注意 created_at 必须是 datetime 对象
-                file_rec = File(
-                    id=file_id,
-                    filename=p.name,
-                    ext=ext,
-                    size=int(stat.st_size),
-                    storage_path=str_rp,
-                    created_at=datetime.now()  # 这里修正为 datetime 对象
-                )
-
-                db.session.add(file_rec)
-                db.session.commit()
-
-                # 3. 调用语义切分入库逻辑
-                chunk_count = IngestLogic.ingest_file(file_id, tag=args.tag)
-
-                res = {
-                    "status": "ok",
-                    "path": str_rp,
-                    "file_id": file_id,
-                    "chunks": chunk_count
-                }
-                results.append(res)
-                ok += 1
-                print(f"   -> OK. ID: {file_id}, Chunks: {chunk_count}")
-
-            except Exception as e:
-                db.session.rollback()
-                err_msg = str(e)
-                results.append({"status": "failed", "path": str(rp), "error": err_msg})
-                fail += 1
-                print(f"   -> FAILED: {err_msg}")
-
-    # 输出结果日志
-    with out_path.open("w", encoding="utf-8") as f:
-        for r in results:
-            f.write(json.dumps(r, ensure_ascii=False) + "\n")
-
-    print(f"\nDone. ok={ok} fail={fail}. Log saved to -> {out_path}")
+        prepare_kwargs = chunk_settings(args.strategy)
+
+    print(f"Start scanning: {root} pattern={args.pattern} chunking={prepare_kwargs}")
+
+    # 递归查找文件
+    files_to_process = []
+    for p in root.rglob(args.pattern):
+        str_rp = str(p.resolve())
+        # 1. 排除检查
+        if any(ex in str_rp for ex in exclude_paths):
+            continue
+        # 忽略临时文件
+        if p.name.startswith("~$"):
+            continue
+        files_to_process.append(str_rp)
+
+    # 2. 断点续跑：跳过检查点中已成功的文件
+    done = set() if args.fresh else load_checkpoint(out_path)
+    pending = [p for p in files_to_process if p not in done]
+    print(f"Found {len(files_to_process)} files, {len(done & set(files_to_process))} already done, "
+          f"{len(pending)} to process (workers={args.workers}).")
+
+    def _write(prepared):
+        str_rp = prepared["path"]
+        p = Path(str_rp)
+
+        # 同一路径已入库且内容未变：跳过（覆盖「写库成功但检查点未落盘」的情况）
+        file_rec = db.session.query(File).filter(File.storage_path == str_rp).first()
+        if file_rec is not None:
+            kb_doc = db.session.query(KbDocument).filter(KbDocument.file_id == file_rec.id).first()
+            if kb_doc is not None and kb_doc.content_hash == prepared["content_hash"] \
+                    and file_chunker(file_rec.id) == prepared["chunker"]:
+                return {"status": "skipped", "path": str_rp, "file_id": file_rec.id, "chunks": 0}
+        else:
+            # 【核心修复】创建 File 记录，注意 created_at 必须是 datetime 对象
+            file_rec = File(
+                id=str(uuid.uuid4()),
+                filename=p.name,
+                ext=prepared["ext"],
+                size=int(prepared["size"]),
+                storage_path=str_rp,
+                created_at=datetime.now()  # 这里修正为 datetime 对象
+            )
+            db.session.add(file_rec)
+            db.session.flush()
+
+        # 3. 批量写入语义切片
+        chunk_count = write_prepared_file(file_rec.id, p.name, args.tag, prepared)
+        return {"status": "ok", "path": str_rp, "file_id": file_rec.id, "chunks": chunk_count}
+
+    log = CheckpointLog(out_path, fresh=args.fresh)
+
+    def _on_result(res):
+        log.append(res)
+        if res.get("status") == "failed":
+            print(f"   -> FAILED: {Path(res.get('path') or '').name}: {res.get('error')}")
+
+    try:
+        with app.app_context():
+            stats = run_pipeline(
+                pending,
+                prepare_file_chunks,
+                _write,
+                workers=args.workers,
+                prepare_kwargs=prepare_kwargs,
+                on_result=_on_result,
+                report_every=args.report_every,
+            )
+    finally:
+        log.close()
+
+    print(f"\nDone. {json.dumps(stats, ensure_ascii=False)}. Log saved to -> {out_path}")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,127 @@
+import itertools
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+# 证照索引（domain/index）测试共用：app + 持有人 / 证照类型种子数据，以及证照工厂。
+# 各测试文件只需在自己的 fixture 里用 make_evidence 造本文件需要的证照。
+# 知识库（domain/kb）测试共用：空库 app（kb_app）和切片工厂（add_kb_blocks），
+# KB_SEARCH_CACHE_SIZE 等配置由需要的测试自己设置（检索缓存在首次检索时才按配置创建）。
+
+INDEX_PERSON_ID = "p1"
+INDEX_COMPANY_ID = "c1"
+INDEX_DOC_TYPES = [
+    ("PERSON", "ID_CARD", "身份证", "证件"),
+    ("PERSON", "PE_CERT", "职业资格证书", "资格"),
+    ("COMPANY", "ISO9001", "质量管理体系认证证书", "资质"),
+]
+
+
+def _testing_app():
+    from app import create_app
+
+    os.environ["FLASK_ENV"] = "testing"
+    app = create_app("testing")
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture()
+def index_app():
+    pytest.importorskip("flask")
+    from app.extensions import db
+    from app.models import Company, DocumentType, Person
+
+    app = _testing_app()
+
+    with app.app_context():
+        db.create_all()
+        db.session.add_all([
+            Person(id=INDEX_PERSON_ID, name="张三"),
+            Company(id=INDEX_COMPANY_ID, name="某某科技有限公司"),
+        ])
+        db.session.add_all([
+            DocumentType(scope=scope, code=code, name=name, category=category)
+            for scope, code, name, category in INDEX_DOC_TYPES
+        ])
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def make_evidence(index_app):
+    """
+    make_evidence(doc_type_code, **fields)：建一个 StoredFile 和挂在它上面的 Evidence（不提交）。
+    scope 取证照类型的 scope，owner_id 默认是对应的种子持有人（p1 / c1）。
+    """
+    from app.extensions import db
+    from app.models import DocumentType, Evidence, StoredFile
+
+    types = {dt.code: dt for dt in DocumentType.query.all()}
+    counter = itertools.count()
+
+    def _make(doc_type_code: str, **fields) -> Evidence:
+        i = next(counter)
+        doc_type = types[doc_type_code]
+        sf = StoredFile(
+            original_name=f"{i}.png", ext="png", mime_type="image/png",
+            size_bytes=1, sha256=uuid.uuid4().hex + uuid.uuid4().hex, storage_rel_path=f"x/{i}.png",
+        )
+        db.session.add(sf)
+        db.session.flush()
+        fields.setdefault("owner_id", INDEX_PERSON_ID if doc_type.scope == "PERSON" else INDEX_COMPANY_ID)
+        ev = Evidence(scope=doc_type.scope, document_type_id=doc_type.id, file_id=sf.id, **fields)
+        db.session.add(ev)
+        return ev
+
+    return _make
+
+
+@pytest.fixture()
+def kb_app():
+    pytest.importorskip("flask")
+    from app.extensions import db
+
+    app = _testing_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture()
+def add_kb_blocks(kb_app):
+    """
+    add_kb_blocks(texts, tag="general", filename="demo.docx", created_at=None, index=True)：
+    建一个 File 和它的切片并提交，返回 (file_id, blocks)。
+    created_at 为与 texts 等长的列表；index=False 时不写倒排（模拟升级前的历史切片）。
+    """
+    from app.extensions import db
+    from app.models import File, KbBlock
+    from domain.kb import term_index
+
+    def _add(texts, tag="general", filename="demo.docx", created_at=None, index=True):
+        file_id = str(uuid.uuid4())
+        db.session.add(File(id=file_id, filename=filename, ext="docx", size=1, storage_path="x"))
+        blocks = [
+            KbBlock(id=str(uuid.uuid4()), file_id=file_id, content_text=t, content_len=len(t), tag=tag)
+            for t in texts
+        ]
+        for block, ts in zip(blocks, created_at or []):
+            block.created_at = ts
+        db.session.add_all(blocks)
+        if index:
+            term_index.index_blocks((b.id, b.file_id, b.content_text) for b in blocks)
+        db.session.commit()
+        return file_id, blocks
+
+    return _add
@@ -0,0 +1,82 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+if not (_has_module("flask") and _has_module("docx")):
+    pytest.skip("flask and python-docx are required for block docx cache tests", allow_module_level=True)
+
+from docx import Document  # noqa: E402
+
+from domain.exports.word import _block_docx_path  # noqa: E402
+from domain.kb.block_docx_cache import BlockDocxCache  # noqa: E402
+from domain.kb.offline_builder import prepare_docx_offline  # noqa: E402
+
+
+def _age(path: Path, seconds: int) -> None:
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - seconds * 10 ** 9))
+
+
+def test_generates_on_first_use_and_counts_hits(tmp_path):
+    cache = BlockDocxCache(str(tmp_path / "cache"), max_bytes=10 * 1024 * 1024)
+
+    path = cache.get("b1", "标题", "第一行\n第二行")
+    assert [p.text for p in Document(str(path)).paragraphs] == ["标题", "第一行", "第二行"]
+    assert cache.get("b1", "标题", "第一行\n第二行") == path
+    assert cache.stats()["files"] == 1
+    assert cache.usage() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_evicts_least_recently_used(tmp_path):
+    probe = BlockDocxCache(str(tmp_path / "probe"), max_bytes=0)
+    size = probe.get("x", "t", "内容").stat().st_size
+
+    cache = BlockDocxCache(str(tmp_path / "cache"), max_bytes=int(size * 3.5))
+    for i, name in enumerate(["a", "b", "c"]):
+        _age(cache.get(name, "t", "内容"), 100 - i)
+    # 命中刷新 mtime：a 变成最新，b 最旧
+    cache.get("a", "t", "内容")
+    cache.get("d", "t", "内容")
+
+    names = sorted(p.stem for p in (tmp_path / "cache").glob("*.docx"))
+    assert names == ["a", "c", "d"]
+    assert cache.stats()["evictions"] == 1
+
+
+def test_usage_from_detached_handles_is_recorded(tmp_path):
+    cache = BlockDocxCache(str(tmp_path / "cache"), max_bytes=0)
+    worker = cache.detached()
+    worker.get("b1", "", "正文")
+    worker.get("b1", "", "正文")
+    cache.record(worker.usage())
+    assert cache.usage() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_offline_prepare_defers_block_docx(tmp_path):
+    source = tmp_path / "source.docx"
+    doc = Document()
+    for i in range(20):
+        doc.add_paragraph(f"第{i}段：" + "投标文件内容。" * 30)
+    doc.save(str(source))
+
+    prepared = prepare_docx_offline(str(source), chunk_chars=500, overlap=50)
+    assert len(prepared["blocks"]) > 1
+    assert [p.name for p in tmp_path.rglob("*.docx")] == ["source.docx"]
+
+    cache = BlockDocxCache(str(tmp_path / "cache"), max_bytes=0)
+    block = dict(prepared["blocks"][0], block_docx_lazy=True)
+    path = _block_docx_path(tmp_path, block, cache)
+    assert Document(str(path)).paragraphs[0].text == block["section_title"]
+    # 没有标记为按需生成、也没有现成文件的切片走纯文本
+    assert _block_docx_path(tmp_path, dict(block, block_docx_lazy=False), cache) is None
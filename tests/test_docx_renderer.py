@@ -0,0 +1,114 @@
+import importlib.util
+import io
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+if not _has_module("docx"):
+    pytest.skip("python-docx is required for renderer tests", allow_module_level=True)
+
+from docx import Document  # noqa: E402
+
+from domain.templates.renderer import append_table_rows, render_docx_template  # noqa: E402
+
+ROWS = [
+    ("技术", "智能客服", "第一段\n\n第二段\r\n\t缩进 <ASR> & \"OCR\"", "无偏离"),
+    (" 前导空格", "尾随空格 ", "", "无偏离"),
+    ("　全角空格", "a\tb\tc", "\n", "无偏离"),
+    ("只有两列", "x"),
+]
+
+
+def _document_xml(doc) -> bytes:
+    buf = io.BytesIO()
+    doc.save(buf)
+    with zipfile.ZipFile(buf) as zf:
+        return zf.read("word/document.xml")
+
+
+def _table():
+    doc = Document()
+    table = doc.add_table(rows=1, cols=4)
+    table.style = "Table Grid"
+    return doc, table
+
+
+def test_bulk_rows_match_per_cell_text():
+    expected_doc, table = _table()
+    for values in ROWS:
+        for cell, text in zip(table.add_row().cells, values):
+            cell.text = text
+
+    doc, table = _table()
+    append_table_rows(table, ROWS)
+    append_table_rows(table, [])
+
+    assert _document_xml(doc) == _document_xml(expected_doc)
+    assert [c.text for c in table.rows[4].cells] == ["只有两列", "x", "", ""]
+
+
+def test_render_fills_response_table(tmp_path):
+    out = render_docx_template(
+        {"requirements": [{"category": "技术", "item": "智能客服", "response_text": "我方满足"}, {"item": "售后"}]},
+        output_path=str(tmp_path / "out.docx"),
+    )
+    table = Document(out).tables[0]
+    assert [c.text for c in table.rows[1].cells] == ["技术", "智能客服", "我方满足", "无偏离"]
+    assert [c.text for c in table.rows[2].cells] == ["2", "售后", "", "无偏离"]
+
+
+def test_template_parsed_once_and_slots_filled(tmp_path, monkeypatch):
+    from domain.templates import template_cache
+
+    template = tmp_path / "company.docx"
+    doc = Document()
+    doc.add_paragraph("公司模板封面")
+    doc.add_paragraph("项目：{{ project_name }}")
+    doc.add_paragraph("{{company_profile}}")
+    doc.add_paragraph("{{requirements}}")
+    doc.add_paragraph("附件")
+    doc.save(str(template))
+
+    loads = []
+    load = template_cache.Document
+    monkeypatch.setattr(template_cache, "Document", lambda *a: loads.append(a) or load(*a))
+    template_cache.get_template_cache().clear()
+
+    data = {
+        "project_name": "智能客服",
+        "company_profile": "企业简介正文",
+        "tech_solution": "技术方案正文",
+        "requirements": [{"category": "技术", "item": "ASR"}],
+    }
+    first = Document(render_docx_template(data, str(template), output_path=str(tmp_path / "a.docx")))
+    render_docx_template(data, str(template), output_path=str(tmp_path / "b.docx"))
+    assert len(loads) == 1
+
+    texts = [p.text for p in first.paragraphs]
+    assert texts[:3] == ["公司模板封面", "项目：智能客服", "企业简介正文"]
+    assert "第一部分 商务响应" not in texts and "第四部分 招标需求点对点响应表" not in texts
+    assert "技术方案正文" in texts
+    # 表格放在 {{requirements}} 占位处，位于“附件”段落之前
+    body = [child.tag.rsplit("}", 1)[1] for child in first.element.body]
+    assert body[3] == "tbl" and first.paragraphs[3].text == "附件"
+
+    # 母本未被渲染修改
+    compiled = template_cache.get_template_cache().get(str(template))
+    assert compiled.document.paragraphs[2].text == "{{company_profile}}"
+
+    st = template.stat()
+    import os
+    os.utime(template, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    render_docx_template(data, str(template), output_path=str(tmp_path / "c.docx"))
+    assert len(loads) == 2
+    template_cache.get_template_cache().clear()
@@ -0,0 +1,97 @@
+import pytest
+
+pytest.importorskip("flask")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from app.models import DocumentType, Evidence, EvidenceSearch, Person  # noqa: E402
+from domain.index.search_table import rebuild_search_table  # noqa: E402
+from domain.index.service import IndexSearchParams, search_index  # noqa: E402
+
+
+@pytest.fixture()
+def app_ctx(index_app, make_evidence):
+    for i in range(12):
+        make_evidence(
+            "ID_CARD" if i % 3 == 0 else "ISO9001",
+            id=f"e{i:02d}",
+            cert_no=f"No-{i % 4}_X" if i % 2 else f"AB%{i}",
+            issuer="质量认证中心" if i % 2 else "公安局",
+            tags="年审 证书" if i % 4 == 1 else None,
+        )
+    db.session.commit()
+    return index_app
+
+
+def _search(q, **kw):
+    params = dict(q=q, scope=None, owner_id=None, doc_type_code=None, valid_on=None,
+                  page="1", page_size="100", sort="relevance_desc")
+    params.update(kw)
+    res = search_index(IndexSearchParams(**params))
+    return [(item["evidence_id"]) for item in res["items"]], res["total"]
+
+
+def _texts():
+    return {r.evidence_id: r.search_text for r in db.session.query(EvidenceSearch).all()}
+
+
+def test_rows_follow_writes(app_ctx):
+    texts = _texts()
+    assert len(texts) == 12
+    assert texts["e01"] == "质量管理体系认证证书\niso9001\nno-1_x\n质量认证中心\n年审 证书\n某某科技有限公司"
+
+    ev = db.session.get(Evidence, "e01")
+    ev.tags = "新标签"
+    db.session.get(Person, "p1").name = "李四"
+    db.session.delete(db.session.get(Evidence, "e02"))
+    db.session.commit()
+
+    texts = _texts()
+    assert "e02" not in texts
+    assert texts["e01"].endswith("新标签\n某某科技有限公司")
+    assert all(texts[f"e{i:02d}"].endswith("李四") for i in (0, 3, 6, 9))
+
+    db.session.query(DocumentType).filter(DocumentType.code == "ID_CARD").one().name = "居民身份证"
+    db.session.commit()
+    texts = _texts()
+    assert all(texts[f"e{i:02d}"].startswith("居民身份证\n") for i in (0, 3, 6, 9))
+
+    db.session.query(EvidenceSearch).delete()
+    db.session.commit()
+    assert rebuild_search_table() == 11
+    assert _texts() == texts
+
+
+@pytest.mark.parametrize("q", ["证书", "质量管理", "ISO9001", "no-1", "no-1_x", "公安", "ab%", "不存在的词"])
+def test_table_matches_like_search(app_ctx, q):
+    app_ctx.config["INDEX_SEARCH_USE_TABLE"] = False
+    expected = _search(q)
+    app_ctx.config["INDEX_SEARCH_USE_TABLE"] = True
+
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _capture)
+    try:
+        assert _search(q) == expected
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _capture)
+
+    searches = [s for s in statements if "evidence_search" in s]
+    assert len(searches) == 2
+    if len(q) >= 3:
+        assert all("evidence_search_fts MATCH" in s for s in searches)
+
+
+def test_owner_name_is_searchable(app_ctx):
+    ids, total = _search("张三")
+    assert total == 4 and sorted(ids) == ["e00", "e03", "e06", "e09"]
+    assert _search("张三", scope="COMPANY") == ([], 0)
+
+
+def test_like_wildcards_are_literal(app_ctx):
+    ids, _ = _search("%")
+    assert sorted(ids) == [f"e{i:02d}" for i in range(0, 12, 2)]
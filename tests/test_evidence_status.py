@@ -0,0 +1,121 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+pytest.importorskip("flask")
+
+from sqlalchemy import text  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from app.models import Evidence  # noqa: E402
+from domain.index.evidence_status import (  # noqa: E402
+    EvidenceStatusJob,
+    compute_status,
+    refresh_statuses,
+    start_status_job,
+)
+
+TODAY = datetime.combine(date.today(), datetime.min.time())
+# 到期时间：无、昨天、今天、10 天后、30 天后最后一刻、31 天后、一年后
+EXPIRES = [None, -1, 0, 10, 30.99, 31, 365]
+EXPECTED = ["VALID", "EXPIRED", "EXPIRING_SOON", "EXPIRING_SOON", "EXPIRING_SOON", "VALID", "VALID"]
+
+
+def _expires(offset):
+    return None if offset is None else TODAY + timedelta(days=offset)
+
+
+@pytest.fixture()
+def app_ctx(index_app, make_evidence):
+    for i, offset in enumerate(EXPIRES):
+        make_evidence("ISO9001", id=f"e{i}", cert_no=f"NO-{i}", expires_at=_expires(offset))
+    db.session.commit()
+    return index_app
+
+
+def _statuses():
+    return [db.session.get(Evidence, f"e{i}").status for i in range(len(EXPIRES))]
+
+
+def test_compute_status_boundaries():
+    assert [compute_status(_expires(o), soon_days=30) for o in EXPIRES] == EXPECTED
+
+
+def test_status_written_on_insert_and_update(app_ctx):
+    assert _statuses() == EXPECTED
+
+    ev = db.session.get(Evidence, "e1")
+    ev.expires_at = TODAY + timedelta(days=400)
+    db.session.commit()
+    assert db.session.get(Evidence, "e1").status == "VALID"
+
+
+def test_refresh_follows_the_calendar(app_ctx):
+    assert refresh_statuses() == {"EXPIRED": 0, "EXPIRING_SOON": 0, "VALID": 0}
+
+    changed = refresh_statuses(today=date.today() + timedelta(days=40))
+    db.session.expire_all()
+    assert _statuses() == ["VALID", "EXPIRED", "EXPIRED", "EXPIRED", "EXPIRED", "EXPIRED", "VALID"]
+    assert changed == {"EXPIRED": 4, "EXPIRING_SOON": 0, "VALID": 0}
+
+    db.session.execute(text("UPDATE evidences SET status = 'UNKNOWN'"))
+    db.session.commit()
+    job = EvidenceStatusJob(app_ctx, interval=60)
+    assert sum(job.run_once().values()) == len(EXPIRES)
+    db.session.expire_all()
+    assert _statuses() == EXPECTED
+    assert start_status_job(app_ctx) is None
+
+
+def test_valid_for_owner_and_type_is_an_index_range(app_ctx):
+    plan = db.session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM evidences "
+        "WHERE scope = 'COMPANY' AND owner_id = 'c1' AND document_type_id = 1 "
+        "AND status IN ('VALID', 'EXPIRING_SOON')"
+    )).all()
+    detail = " ".join(str(row[-1]) for row in plan)
+    assert "USING INDEX idx_owner_doc_status (scope=? AND owner_id=? AND document_type_id=? AND status=?)" in detail
+
+
+def test_valid_on_search_uses_status(app_ctx):
+    client = app_ctx.test_client()
+    today = date.today().isoformat()
+    ids = {it["evidence_id"] for it in client.get(f"/api/v1/index/search?valid_on={today}").get_json()["items"]}
+    assert ids == {f"e{i}" for i, s in enumerate(EXPECTED) if s != "EXPIRED"}
+
+
+def test_expiring_endpoint(app_ctx):
+    client = app_ctx.test_client()
+    body = client.get("/api/v1/index/expiring?days=30").get_json()
+    assert [it["evidence_id"] for it in body["items"]] == ["e2", "e3", "e4"]
+    assert body["total"] == 3 and body["from"] == date.today().isoformat()
+
+    body = client.get("/api/v1/index/expiring?days=0&scope=COMPANY&doc_type_code=ISO9001").get_json()
+    assert [it["evidence_id"] for it in body["items"]] == ["e2"]
+
+    assert client.get("/api/v1/index/expiring?days=-1").status_code == 400
+    assert client.get("/api/v1/index/expiring?days=abc").status_code == 400
+
+
+def test_status_job_starts_from_create_app_only_when_serving(app_ctx, monkeypatch):
+    # 测试环境不会启动
+    assert "evidence_status_job" not in app_ctx.extensions
+
+    app_ctx.config["TESTING"] = False
+    app_ctx.config["EVIDENCE_STATUS_JOB_ENABLED"] = False
+    assert start_status_job(app_ctx) is None
+
+    # debug reloader 的父进程不启动，子进程（WERKZEUG_RUN_MAIN=true）才启动
+    app_ctx.config["EVIDENCE_STATUS_JOB_ENABLED"] = True
+    app_ctx.debug = True
+    monkeypatch.delenv("WERKZEUG_RUN_MAIN", raising=False)
+    assert start_status_job(app_ctx) is None
+
+    # 不真正起线程，只看是否走到 start()
+    started = []
+    monkeypatch.setattr(EvidenceStatusJob, "start", lambda self: started.append(self))
+    monkeypatch.setenv("WERKZEUG_RUN_MAIN", "true")
+    job = start_status_job(app_ctx)
+    assert job is not None and app_ctx.extensions["evidence_status_job"] is job
+    assert start_status_job(app_ctx) is job
+    assert started == [job, job]
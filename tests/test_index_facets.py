@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("flask")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from app.models import Evidence  # noqa: E402
+from domain.index.service import IndexSearchParams, index_facets, search_index  # noqa: E402
+
+
+def _add_evidence(make_evidence, i, doc_type_code, expires_at):
+    make_evidence(
+        doc_type_code,
+        cert_no=f"NO-{i}", issuer="认证中心" if i % 2 else "公安局", expires_at=expires_at,
+    )
+
+
+@pytest.fixture()
+def app_ctx(index_app, make_evidence):
+    now = datetime.now()
+    for i in range(20):
+        doc_type_code = ["ID_CARD", "PE_CERT", "ISO9001"][i % 3]
+        expires_at = [None, now - timedelta(days=30), now + timedelta(days=30)][i % 4 % 3]
+        _add_evidence(make_evidence, i, doc_type_code, expires_at)
+    db.session.commit()
+    return index_app
+
+
+def _params(**kw):
+    base = dict(q="", scope=None, owner_id=None, doc_type_code=None, valid_on=None,
+                page="1", page_size="1", sort="created_at_desc")
+    base.update(kw)
+    return IndexSearchParams(**base)
+
+
+def _capture():
+    statements = []
+
+    def _listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _listener)
+    return statements, lambda: event.remove(db.engine, "before_cursor_execute", _listener)
+
+
+@pytest.mark.parametrize("filters", [{}, {"q": "证书"}, {"scope": "PERSON"}, {"q": "公安"}])
+def test_counts_match_filtered_searches(app_ctx, filters):
+    statements, stop = _capture()
+    try:
+        res = index_facets(_params(**filters))
+    finally:
+        stop()
+    assert len(statements) == 1
+
+    assert res["total"] == search_index(_params(**filters))["total"]
+    for item in res["facets"]["scope"]:
+        assert item["count"] == search_index(_params(**dict(filters, scope=item["value"])))["total"]
+    for item in res["facets"]["doc_type"]:
+        assert item["count"] == search_index(_params(**dict(filters, doc_type_code=item["value"])))["total"]
+    assert sum(i["count"] for i in res["facets"]["category"]) == res["total"]
+
+    validity = {i["value"]: i["count"] for i in res["facets"]["validity"]}
+    today = datetime.now().strftime("%Y-%m-%d")
+    not_expired = search_index(_params(**dict(filters, valid_on=today)))["total"]
+    # 与 evidences.status 同一套取值：到期时间为空算 VALID，30 天内到期算 EXPIRING_SOON
+    assert set(validity) <= {"VALID", "EXPIRING_SOON", "EXPIRED"}
+    assert validity.get("VALID", 0) + validity.get("EXPIRING_SOON", 0) == not_expired
+    assert sum(validity.values()) == res["total"]
+
+    statuses = {}
+    for ev in Evidence.query.all():
+        statuses[ev.status] = statuses.get(ev.status, 0) + 1
+    if not filters:
+        assert validity == statuses
+
+
+def test_cached_until_evidence_write(app_ctx, make_evidence):
+    first = index_facets(_params())
+    assert {i["value"]: i["label"] for i in first["facets"]["doc_type"]}["ISO9001"] == "质量管理体系认证证书"
+
+    statements, stop = _capture()
+    try:
+        assert index_facets(_params()) == first
+    finally:
+        stop()
+    assert statements == []
+
+    _add_evidence(make_evidence, 99, "ISO9001", None)
+    db.session.commit()
+    assert index_facets(_params())["total"] == first["total"] + 1
+
+
+def test_facets_endpoint(app_ctx):
+    client = app_ctx.test_client()
+    resp = client.get("/api/v1/index/facets?scope=company")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [i["value"] for i in body["facets"]["scope"]] == ["COMPANY"]
+
+    assert client.get("/api/v1/index/facets?valid_on=bad").status_code == 400
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("flask")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from domain.index.service import IndexSearchParams, search_index  # noqa: E402
+
+
+@pytest.fixture()
+def app_ctx(index_app, make_evidence):
+    base = datetime(2024, 1, 1)
+    for i in range(37):
+        make_evidence(
+            "ID_CARD" if i % 3 == 0 else "ISO9001",
+            cert_no=f"NO-{i % 4}",
+            issuer="质量认证中心" if i % 2 else "公安局",
+            # 有并列的入库时间和到期时间，部分证照没有到期时间
+            expires_at=None if i % 5 == 0 else base + timedelta(days=i % 7),
+            tags="证书" if i % 2 else None,
+            created_at=base + timedelta(hours=i // 3),
+        )
+    db.session.commit()
+    return index_app
+
+
+def _params(**kw):
+    base = dict(q="", scope=None, owner_id=None, doc_type_code=None, valid_on=None,
+                page="1", page_size="5", sort="relevance_desc")
+    base.update(kw)
+    return IndexSearchParams(**base)
+
+
+def _ids(result):
+    return [item["evidence_id"] for item in result["items"]]
+
+
+@pytest.mark.parametrize("sort", ["created_at_desc", "expires_at_asc", "relevance_desc"])
+@pytest.mark.parametrize("q", ["", "证书", "no-1"])
+def test_cursor_pages_match_offset_pages(app_ctx, sort, q):
+    by_offset = []
+    page = 1
+    while True:
+        res = search_index(_params(q=q, sort=sort, page=str(page)))
+        if not res["items"]:
+            break
+        by_offset.extend(_ids(res))
+        page += 1
+
+    by_cursor = []
+    cursor = None
+    while True:
+        res = search_index(_params(q=q, sort=sort, cursor=cursor, count="none"))
+        by_cursor.extend(_ids(res))
+        cursor = res["next_cursor"]
+        if cursor is None:
+            break
+
+    assert by_cursor == by_offset
+    assert len(set(by_offset)) == search_index(_params(q=q, sort=sort))["total"]
+
+
+def test_count_modes(app_ctx):
+    assert search_index(_params(count="none"))["total"] is None
+
+    app_ctx.config["INDEX_SEARCH_COUNT_CAP"] = 10
+    res = search_index(_params(count="estimate"))
+    assert res["total"] == 10 and res["total_capped"] is True
+
+    res = search_index(_params(q="no-1", count="estimate", page_size="100"))
+    assert res["total"] == len(res["items"]) and res["total_capped"] is False
+
+
+def test_count_query_skips_owner_joins(app_ctx):
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _capture)
+    try:
+        search_index(_params(q="证书"))
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _capture)
+
+    count_sql = [s for s in statements if "count(" in s.lower()]
+    assert len(count_sql) == 1
+    assert "persons" not in count_sql[0] and "companies" not in count_sql[0]
+
+
+def test_invalid_cursor(app_ctx):
+    first = search_index(_params(sort="created_at_desc", q="证书"))
+    with pytest.raises(ValueError):
+        search_index(_params(sort="expires_at_asc", q="证书", cursor=first["next_cursor"]))
+    with pytest.raises(ValueError):
+        search_index(_params(cursor="not-a-cursor"))
+    with pytest.raises(ValueError):
+        search_index(_params(count="maybe"))
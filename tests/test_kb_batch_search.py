@@ -0,0 +1,181 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("flask")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from app.models import KbBlock  # noqa: E402
+from domain.kb import term_index  # noqa: E402
+from domain.kb.batch_retriever import _candidates, search_blocks_batch  # noqa: E402
+from domain.kb.retriever import KbSearchError, search_blocks  # noqa: E402
+from domain.review_index.generator import BiddingDocumentGenerator  # noqa: E402
+from domain.review_index.kb_evidence import (  # noqa: E402
+    EvidenceTermIndex,
+    retrieve_evidence_blocks,
+    retrieve_evidence_blocks_batch,
+)
+
+TEXTS = [
+    "我方提供智能客服系统，支持 ASR 语音识别。",
+    "售后服务：7x24 小时应急响应，故障修复不超过 4 小时。",
+    "公司通过 ISO9001 质量管理体系认证，智能客服项目业绩丰富。",
+    "项目实施计划：需求调研、系统部署、培训计划与交付周期。",
+    "智能客服平台采用微服务架构，支持语音和文本双通道接入，覆盖售后服务场景。",
+]
+
+
+@pytest.fixture()
+def app_ctx(kb_app, add_kb_blocks):
+    kb_app.config["KB_SEARCH_CACHE_SIZE"] = 0
+    times = [datetime(2024, 1, 1) + timedelta(minutes=i) for i in range(len(TEXTS))]
+    add_kb_blocks(TEXTS[:3], filename="案例集.docx", created_at=times[:3])
+    add_kb_blocks(TEXTS[3:4], filename="ISO认证证书.docx", created_at=times[3:4])
+    add_kb_blocks(TEXTS[4:], tag="other", filename="其他.docx", created_at=times[4:])
+    return kb_app
+
+
+QUERIES = ["智能客服", "售后服务", "iso9001", "不存在的内容", "客"]
+
+
+def _single(query, **kw):
+    params = dict(
+        query=query, top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20,
+        fields=["block_id", "filename", "content_text"],
+    )
+    params.update(kw)
+    return search_blocks(**params)
+
+
+def test_batch_matches_single_queries(app_ctx):
+    results = search_blocks_batch(QUERIES, top_k=10, fields=["block_id", "filename", "content_text"])
+
+    assert [r["query"] for r in results] == QUERIES
+    for r in results:
+        single = _single(r["query"])
+        assert [i["block_id"] for i in r["items"]] == [i["block_id"] for i in single["items"]]
+        assert r["total"] == single["total"]
+
+    tagged = search_blocks_batch(["智能客服"], by_tag="general", top_k=10)
+    assert [i["block_id"] for i in tagged[0]["items"]] == [
+        i["block_id"] for i in _single("智能客服", by_tag="general")["items"]
+    ]
+
+
+def test_batch_uses_constant_number_of_statements(app_ctx):
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        search_blocks_batch(["智能客服"], top_k=3)
+        small = len(statements)
+        statements.clear()
+        search_blocks_batch(["智能客服", "售后服务", "语音识别", "系统部署", "微服务架构"], top_k=3)
+        large = len(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert large == small
+
+
+def test_candidates_require_every_bigram(app_ctx):
+    # 只含「服系」「系统」、不含「客服」的切片：只按最稀有的两个 bigram 召回会混进来
+    file_id = KbBlock.query.first().file_id
+    decoy = KbBlock(id=str(uuid.uuid4()), file_id=file_id, content_text="微服系统", content_len=4, tag="general")
+    db.session.add(decoy)
+    term_index.index_blocks([(decoy.id, file_id, decoy.content_text)])
+    db.session.commit()
+
+    expected = {b.id for b in KbBlock.query.all() if "客服系统" in b.content_text}
+    cands = _candidates({"客服系统": term_index.query_terms("客服系统"), "客": []})
+    assert set(cands) == expected
+    assert all(qs == ["客服系统"] for qs in cands.values())
+
+
+def test_batch_wildcards_match_like_search(app_ctx):
+    # % / _ 与 /kb/search 一样是 LIKE 通配符，不按字面匹配
+    queries = ["智能_服", "iso%认证", "7x24_小时", "项目%交付"]
+    results = search_blocks_batch(queries, top_k=10, fields=["block_id"])
+    for r in results:
+        single = _single(r["query"])
+        assert r["total"] == single["total"] > 0, r["query"]
+        assert [i["block_id"] for i in r["items"]] == [i["block_id"] for i in single["items"]]
+
+
+def test_batch_longest_order_and_duplicates(app_ctx):
+    results = search_blocks_batch(["智能客服", "智能客服", ""], top_k=2, order="longest", fields=["content_len"])
+    lens = [i["content_len"] for i in results[0]["items"]]
+    assert lens == sorted(lens, reverse=True) and len(lens) == 2
+    assert results[0] == results[1]
+    assert results[2]["items"] == []
+
+    with pytest.raises(KbSearchError):
+        search_blocks_batch("智能客服")
+    with pytest.raises(KbSearchError):
+        search_blocks_batch(["x"], order="nope")
+
+
+def test_generator_search_evidence_batch(app_ctx):
+    generator = BiddingDocumentGenerator.__new__(BiddingDocumentGenerator)
+    answers = generator.search_evidence_batch(["智能客服", "不存在的内容"], tag="general", top_k=2)
+
+    assert len(answers) == 2 and answers[1] == []
+    assert [e["source_file"] for e in answers[0]] == ["案例集.docx", "案例集.docx"]
+    assert generator.search_evidence("智能客服", tag="general", top_k=2) == answers[0]
+
+
+def test_evidence_batch_scores_title_and_content(app_ctx):
+    rows = [
+        {"score_major": "ISO认证（5分）", "evidence_materials": "1、ISO9001"},
+        {"score_major": "售后服务", "evidence_materials": ""},
+        {"score_major": "", "evidence_materials": ""},
+    ]
+    batch = retrieve_evidence_blocks_batch(score_rows=rows, tag=None, top_n=3)
+
+    assert len(batch) == 3
+    # 文件名命中 "ISO认证"（+5）的切片排在仅内容命中 "ISO9001"（+1）的切片之前
+    assert batch[0][0]["filename"] == "ISO认证证书.docx" and batch[0][0]["score"] == 5
+    assert batch[0][1]["score"] == 1 and "ISO9001" in batch[0][1]["excerpt"]
+    assert {e["score"] for e in batch[1]} == {1} and len(batch[1]) == 2
+    assert batch[2] == []
+
+    assert retrieve_evidence_blocks(score_row=rows[1], tag=None, top_n=3) == batch[1]
+
+
+def test_evidence_index_prepared_once(app_ctx):
+    rows = [{"score_major": "智能客服"}, {"score_major": "售后服务"}, {"score_major": "智能客服"}]
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    index = EvidenceTermIndex.prepare(rows, tag=None)
+    event.listen(db.engine, "before_cursor_execute", _capture)
+    try:
+        ranked = [index.rank(row, top_n=5) for row in rows]
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _capture)
+
+    # 逐行打分只用内存里的 postings，不再查库
+    assert statements == []
+    assert len(ranked[0]) == 3 and ranked[0] == ranked[2]
+    assert {score for _, score in ranked[1]} == {1}
+
+
+def test_batch_api(app_ctx):
+    client = app_ctx.test_client()
+    resp = client.post("/api/v1/kb/search/batch", json={"queries": ["智能客服", "售后服务"], "top_k": 1})
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["query"] for r in results] == ["智能客服", "售后服务"]
+    item = results[0]["items"][0]
+    assert "content_text" not in item and item["snippet"] and item["highlights"]
+
+    assert client.post("/api/v1/kb/search/batch", json={"queries": "智能客服"}).status_code == 400
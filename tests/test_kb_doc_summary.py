@@ -0,0 +1,103 @@
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("flask")
+
+from app.extensions import db  # noqa: E402
+from app.models import File, KbBlock, KbDocument, KbDocumentTag  # noqa: E402
+from domain.kb import doc_summary  # noqa: E402
+from domain.kb.ingest import IngestLogic, delete_doc, list_docs  # noqa: E402
+
+
+def _ingest(tmp_path: Path, name: str, text: str, tag: str) -> str:
+    path = tmp_path / name
+    path.write_text(text, encoding="utf-8")
+    file_id = str(uuid.uuid4())
+    db.session.add(File(id=file_id, filename=name, ext="txt", size=1, storage_path=str(path)))
+    db.session.commit()
+    IngestLogic.ingest_file(file_id, tag=tag, strategy="structure")
+    return file_id
+
+
+def _text(n: int) -> str:
+    return "\n".join(f"第{i}章 标题\n" + "投标内容说明。" * 60 for i in range(1, n + 1))
+
+
+def test_summary_maintained_at_ingest_and_listed(kb_app, tmp_path):
+    a = _ingest(tmp_path, "a.txt", _text(3), "product")
+    b = _ingest(tmp_path, "b.txt", _text(2), "qualification")
+
+    items, total = list_docs()
+    assert total == 2
+    by_id = {i["file_id"]: i for i in items}
+
+    blocks = KbBlock.query.filter_by(file_id=a).all()
+    assert by_id[a]["chunk_count"] == len(blocks)
+    assert by_id[a]["total_chars"] == sum(len(x.content_text) for x in blocks)
+    assert by_id[a]["tags"] == ["product"]
+    assert by_id[a]["file_name"] == "a.txt"
+    assert by_id[b]["tag"] == "qualification"
+    assert by_id[a]["created_at"] is not None
+
+    items, total = list_docs(tag="qualification")
+    assert total == 1 and items[0]["file_id"] == b
+
+
+def test_tag_filter_counts_only_tagged_blocks(kb_app, tmp_path):
+    file_id = _ingest(tmp_path, "a.txt", _text(3), "t1")
+    extra = ["补充材料甲", "补充材料乙"]
+    db.session.add_all([
+        KbBlock(id=str(uuid.uuid4()), file_id=file_id, content_text=t, content_len=len(t), tag="t2") for t in extra
+    ])
+    doc_summary.refresh_summary(file_id)
+    db.session.commit()
+
+    t1_blocks = KbBlock.query.filter_by(file_id=file_id, tag="t1").all()
+    (whole,), _ = list_docs()
+    (t1,), _ = list_docs(tag="t1")
+    (t2,), _ = list_docs(tag="t2")
+
+    assert whole["chunk_count"] == len(t1_blocks) + 2 and whole["tag"] == "mixed"
+    assert t1["chunk_count"] == len(t1_blocks)
+    assert t1["total_chars"] == sum(b.content_len for b in t1_blocks)
+    assert (t2["chunk_count"], t2["total_chars"]) == (2, sum(len(t) for t in extra))
+    assert t1["tags"] == t2["tags"] == ["t1", "t2"]
+
+
+def test_tag_change_and_delete_update_summary(kb_app, tmp_path):
+    file_id = _ingest(tmp_path, "a.txt", _text(2), "t1")
+
+    # 文件未变，只改 tag
+    IngestLogic.ingest_file(file_id, tag="t2", strategy="structure")
+    assert list_docs(tag="t1")[1] == 0
+    assert list_docs(tag="t2")[1] == 1
+
+    delete_doc(file_id)
+    assert list_docs() == ([], 0)
+    assert KbDocumentTag.query.count() == 0
+    assert KbDocument.query.count() == 0
+
+
+def test_rebuild_summaries_backfills(kb_app, tmp_path):
+    file_id = _ingest(tmp_path, "a.txt", _text(2), "t1")
+    doc_summary.delete_summary(file_id)
+    db.session.commit()
+    assert list_docs()[1] == 0
+
+    assert doc_summary.rebuild_summaries() == 1
+    items, total = list_docs(tag="t1")
+    assert total == 1
+    assert items[0]["chunk_count"] == KbBlock.query.filter_by(file_id=file_id).count()
+
+
+def test_docs_api_tag_filter(kb_app, tmp_path):
+    _ingest(tmp_path, "a.txt", _text(1), "product")
+    _ingest(tmp_path, "b.txt", _text(1), "other")
+
+    resp = kb_app.test_client().get("/api/v1/kb/docs?tag=product")
+    assert resp.status_code == 200
+    items, total = resp.get_json()
+    assert total == 1
+    assert items[0]["tags"] == ["product"]
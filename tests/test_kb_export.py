@@ -1,4 +1,5 @@
 import importlib.util
+import json
 import os
 import shutil
 import sys
@@ -21,6 +22,7 @@ if not _has_module("flask") or not _has_module("docx"):
 from app import create_app  # noqa: E402
 from app.extensions import db  # noqa: E402
 from app.models import File, KbBlock, KbDocument  # noqa: E402
+from app.worker.runner import runner  # noqa: E402
 from domain.exports.word import WordExportError, export_by_template  # noqa: E402
 
 
@@ -59,6 +61,20 @@ def _write_template(registry_dir: Path, name: str, content: str):
     return template_path
 
 
+def _ingest_via_job(client, file_id: str, **payload) -> dict:
+    # 入库接口只建任务（202 + job_id），等 InProcessRunner 的线程跑完再看任务状态
+    resp = client.post("/api/v1/kb/ingest", json={"file_id": file_id, **payload})
+    assert resp.status_code == 202
+    data = resp.get_json()
+    assert data["job_id"] and data["status"] == "PENDING"
+
+    runner._threads[data["job_id"]].join(timeout=60)
+    job = client.get(f"/api/v1/jobs/{data['job_id']}").get_json()
+    assert job["status"] == "SUCCEEDED", job
+    assert job["stage"] == "DONE"
+    return job
+
+
 def test_kb_ingest_creates_blocks(app_ctx):
     app = app_ctx
     client = app.test_client()
@@ -82,19 +98,19 @@ def test_kb_ingest_creates_blocks(app_ctx):
         )
         db.session.commit()
 
-    resp = client.post("/api/v1/kb/ingest", json={"file_id": file_id, "title": "投标文件"})
-    assert resp.status_code == 200
-    data = resp.get_json()
-    assert data["doc_id"]
-    assert data["block_count"] >= 1
+    job = _ingest_via_job(client, file_id, tag="product_intro")
 
     with app.app_context():
-        doc = db.session.get(KbDocument, data["doc_id"])
-        assert doc is not None
-        blocks = KbBlock.query.filter_by(doc_id=data["doc_id"]).all()
+        doc = KbDocument.query.filter_by(file_id=file_id).one()
+        assert doc.content_hash
+        blocks = KbBlock.query.filter_by(file_id=file_id).all()
         assert blocks
-        for block in blocks:
-            assert (repo_root / block.block_docx_path).exists()
+        assert {block.tag for block in blocks} == {"product_intro"}
+        assert any("这是产品介绍内容" in (block.content_text or "") for block in blocks)
+
+    resp = client.get(f"/api/v1/jobs/{job['job_id']}/artifact?type=json")
+    assert resp.status_code == 200
+    assert json.loads(resp.data)["block_count"] == len(blocks)
 
 
 def test_export_by_template_outputs_docx(app_ctx):
@@ -120,16 +136,7 @@ def test_export_by_template_outputs_docx(app_ctx):
         )
         db.session.commit()
 
-    client = app.test_client()
-    resp = client.post("/api/v1/kb/ingest", json={"file_id": file_id, "title": "投标文件"})
-    assert resp.status_code == 200
-    doc_id = resp.get_json()["doc_id"]
-
-    with app.app_context():
-        block = KbBlock.query.filter_by(doc_id=doc_id).first()
-        assert block is not None
-        block.tag = "product_intro"
-        db.session.commit()
+    _ingest_via_job(app.test_client(), file_id, tag="product_intro")
 
     template_content = """id: export_demo
 version: v1
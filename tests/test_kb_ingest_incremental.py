@@ -0,0 +1,173 @@
+import importlib.util
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+if not _has_module("flask"):
+    pytest.skip("flask is required for KB ingest tests", allow_module_level=True)
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import File, KbBlock, KbDocument  # noqa: E402
+from domain.kb import ingest as ingest_mod  # noqa: E402
+from domain.kb.ingest import IngestLogic  # noqa: E402
+
+
+@pytest.fixture()
+def app_ctx(monkeypatch):
+    os.environ["FLASK_ENV"] = "testing"
+    app = create_app("testing")
+    app.config["TESTING"] = True
+
+    calls = []
+
+    def _fake_split(text):
+        # 按行切分，记录被切分的文本（用于断言哪些区域被重新切片）
+        calls.append(text)
+        return [line for line in text.split("\n") if line.strip()]
+
+    monkeypatch.setattr(ingest_mod.SemanticTextSplitter, "split_text", staticmethod(_fake_split))
+
+    with app.app_context():
+        db.create_all()
+        yield app, calls
+        db.session.remove()
+        db.drop_all()
+
+
+def _chapter(n: int) -> str:
+    return "\n".join(f"第{n}章 第{i}段 " + "投标内容" * 30 for i in range(20))
+
+
+def _make_file(tmp_path: Path, text: str) -> str:
+    path = tmp_path / "bid.txt"
+    path.write_text(text, encoding="utf-8")
+    file_id = str(uuid.uuid4())
+    db.session.add(File(id=file_id, filename="bid.txt", ext="txt", size=1, storage_path=str(path)))
+    db.session.commit()
+    return file_id
+
+
+def _block_ids(file_id: str):
+    return {b.id for b in KbBlock.query.filter_by(file_id=file_id).all()}
+
+
+def test_unchanged_file_is_skipped(app_ctx, tmp_path):
+    _, calls = app_ctx
+    file_id = _make_file(tmp_path, "\n".join(_chapter(n) for n in range(1, 4)))
+
+    count = IngestLogic.ingest_file(file_id, tag="t1")
+    assert count > 0
+    before = _block_ids(file_id)
+    assert db.session.query(KbDocument).filter_by(file_id=file_id).one().content_hash
+
+    calls.clear()
+    assert IngestLogic.ingest_file(file_id, tag="t2") == count
+    assert calls == []
+    assert _block_ids(file_id) == before
+    assert {b.tag for b in KbBlock.query.filter_by(file_id=file_id).all()} == {"t2"}
+
+
+def test_changed_chapter_only_rechunks_affected_regions(app_ctx, tmp_path):
+    _, calls = app_ctx
+    chapters = [_chapter(n) for n in range(1, 6)]
+    file_id = _make_file(tmp_path, "\n".join(chapters))
+
+    IngestLogic.ingest_file(file_id)
+    first_calls = len(calls)
+    before = _block_ids(file_id)
+
+    chapters[2] = chapters[2].replace("第3章 第5段", "第3章 第5段（修订）")
+    (tmp_path / "bid.txt").write_text("\n".join(chapters), encoding="utf-8")
+
+    calls.clear()
+    IngestLogic.ingest_file(file_id)
+    after = _block_ids(file_id)
+
+    assert 0 < len(calls) < first_calls
+    assert all("第1章" not in c for c in calls)
+    assert len(before & after) > 0
+    assert any("（修订）" in b.content_text for b in KbBlock.query.filter_by(file_id=file_id).all())
+
+
+def test_force_rebuilds_all_blocks(app_ctx, tmp_path):
+    file_id = _make_file(tmp_path, _chapter(1))
+    IngestLogic.ingest_file(file_id)
+    before = _block_ids(file_id)
+
+    IngestLogic.ingest_file(file_id, force=True)
+    assert not (before & _block_ids(file_id))
+
+
+def test_structure_strategy_does_not_call_semantic_splitter(app_ctx, tmp_path):
+    _, calls = app_ctx
+    file_id = _make_file(tmp_path, "\n".join(_chapter(n) for n in range(1, 4)))
+
+    IngestLogic.ingest_file(file_id, strategy="structure")
+    assert calls == []
+    assert ingest_mod.file_chunker(file_id) == "structure"
+    before = _block_ids(file_id)
+
+    # 文件未变但切换了策略：不能跳过，也不能复用旧区域
+    IngestLogic.ingest_file(file_id, strategy="semantic")
+    assert calls
+    assert ingest_mod.file_chunker(file_id) == "semantic"
+    assert not (before & _block_ids(file_id))
+
+
+def test_unknown_strategy_is_rejected(app_ctx, tmp_path):
+    file_id = _make_file(tmp_path, _chapter(1))
+    with pytest.raises(ValueError):
+        IngestLogic.ingest_file(file_id, strategy="nope")
+
+
+def test_semantic_failure_after_model_load_falls_back_to_structure(monkeypatch):
+    from domain.kb import splitter
+
+    class _FailingChunker:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def create_documents(self, texts):
+            raise RuntimeError("chunker failed")
+
+    # 模型加载成功，切分本身失败：不能再退回按空行切分
+    monkeypatch.setattr(splitter, "_get_embedding_model", lambda: object())
+    monkeypatch.setattr(splitter, "SemanticChunker", _FailingChunker)
+
+    text = "\n\n".join(_chapter(n) for n in range(1, 3))
+    with pytest.raises(RuntimeError):
+        splitter.SemanticTextSplitter.split_text(text)
+    assert ingest_mod._chunk_text(text, "semantic") == ingest_mod._structure_chunks(text)
+    assert ingest_mod._chunk_text(text, "semantic") != [t for t in text.split("\n\n") if t.strip()]
+
+
+
+def test_chunk_settings_reach_pipeline_workers(app_ctx, tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    app, _ = app_ctx
+    app.config.update(KB_CHUNK_STRATEGY="structure", KB_CHUNK_MIN_CHARS=50, KB_CHUNK_MAX_CHARS=300)
+    settings = ingest_mod.chunk_settings()
+    assert settings == {"strategy": "structure", "min_chars": 50, "max_chars": 300}
+
+    path = tmp_path / "bid.txt"
+    path.write_text(_chapter(1), encoding="utf-8")
+    # 新线程里没有 app context，与流水线子进程一样读不到配置，只能靠传入的参数
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        prepared = pool.submit(ingest_mod.prepare_file_chunks, str(path), **settings).result()
+        default = pool.submit(ingest_mod.prepare_file_chunks, str(path), strategy="structure").result()
+    assert prepared["chunker"] == "structure"
+    assert max(len(c) for r in prepared["regions"] for c in r["chunks"]) <= 300
+    assert prepared["regions"] != default["regions"]
@@ -0,0 +1,118 @@
+import os
+
+import pytest
+
+pytest.importorskip("flask")
+
+from app.extensions import db  # noqa: E402
+from domain.kb import search_cache, term_index  # noqa: E402
+from domain.kb.ingest import delete_doc  # noqa: E402
+from domain.kb.retriever import search_blocks  # noqa: E402
+from domain.kb.search_cache import SearchCache  # noqa: E402
+
+
+def _search(query="智能客服", **kw):
+    params = dict(query=query, top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    params.update(kw)
+    return search_blocks(**params)
+
+
+def test_repeated_search_hits_cache(kb_app, add_kb_blocks):
+    kb_app.config["KB_SEARCH_CACHE_SIZE"] = 8
+    add_kb_blocks(["我方提供智能客服系统"])
+
+    first = _search()
+    first["items"].clear()  # 调用方修改返回值不影响缓存
+    assert _search()["total"] == 1
+    assert _search(query="  智能客服 ")["items"]
+    assert _search(query="ASR", title_keywords=["Demo"])["total"] == 0
+    assert _search(query="asr", title_keywords=["demo"])["total"] == 0
+
+    stats = search_cache.stats()
+    assert stats["misses"] == 2
+    assert stats["hits"] == 3
+
+
+def test_ingest_and_delete_invalidate(kb_app, add_kb_blocks):
+    kb_app.config["KB_SEARCH_CACHE_SIZE"] = 8
+    add_kb_blocks(["我方提供智能客服系统"])
+    assert _search()["total"] == 1
+    gen = search_cache.stats()["generation"]
+
+    file_id, _ = add_kb_blocks(["智能客服二期"])
+    assert search_cache.stats()["generation"] != gen
+    assert _search()["total"] == 2
+
+    delete_doc(file_id)
+    assert _search()["total"] == 1
+
+
+def test_rollback_does_not_bump_generation(kb_app, add_kb_blocks):
+    kb_app.config["KB_SEARCH_CACHE_SIZE"] = 8
+    add_kb_blocks(["我方提供智能客服系统"])
+    gen = search_cache.stats()["generation"]
+
+    term_index.delete_block_terms(["x"])
+    db.session.rollback()
+    db.session.commit()
+    assert search_cache.stats()["generation"] == gen
+
+
+def test_lru_eviction():
+    cache = SearchCache(maxsize=2)
+    for i in range(3):
+        cache.put(("q", i), {"i": i})
+    assert cache.get(("q", 0)) is None
+    assert cache.get(("q", 2)) == {"i": 2}
+    assert cache.stats()["size"] == 2
+
+
+def test_disk_tier_is_shared_between_processes(tmp_path):
+    a = SearchCache(maxsize=4, disk_dir=str(tmp_path))
+    b = SearchCache(maxsize=4, disk_dir=str(tmp_path))
+
+    a.put(("q",), {"total": 1})
+    assert b.get(("q",)) == {"total": 1}
+    assert b.stats()["disk_hits"] == 1
+
+    # 任一进程换代次，其他进程的内存条目也随之失效
+    a.bump_generation()
+    assert b.get(("q",)) is None
+    assert a.stats()["generation"] == b.stats()["generation"]
+
+
+def test_put_with_stale_generation_is_not_served():
+    cache = SearchCache(maxsize=4)
+    gen = cache.generation()
+    cache.bump_generation()
+    cache.put(("q",), {"total": 1}, generation=gen)
+    assert cache.get(("q",)) is None
+
+
+def test_entries_expire_after_ttl(tmp_path, monkeypatch):
+    # 其它进程写库时本进程不会换代次，条目靠存活时间过期
+    now = [1000.0]
+    monkeypatch.setattr(search_cache.time, "time", lambda: now[0])
+
+    mem = SearchCache(maxsize=4, ttl=60)
+    disk = SearchCache(maxsize=0, disk_dir=str(tmp_path), ttl=60)
+    for cache in (mem, disk):
+        cache.put(("q",), {"total": 1})
+
+    now[0] += 30
+    assert mem.get(("q",)) == {"total": 1}
+
+    now[0] += 31
+    assert mem.get(("q",)) is None
+    assert mem.stats()["size"] == 0
+
+    # 磁盘条目按文件 mtime 计算存活时间
+    assert disk.get(("q",)) == {"total": 1}
+    for path in tmp_path.rglob("*.json"):
+        os.utime(path, (now[0] - 61, now[0] - 61))
+    assert disk.get(("q",)) is None
+
+    forever = SearchCache(maxsize=4, ttl=0)
+    forever.put(("q",), {"total": 1})
+    now[0] += 10 ** 6
+    assert forever.get(("q",)) == {"total": 1}
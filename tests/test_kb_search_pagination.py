@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip("flask")
+
+from app.extensions import db  # noqa: E402
+from domain.kb.retriever import KbSearchError, search_blocks  # noqa: E402
+
+
+def _texts_and_times(n: int):
+    base = datetime(2026, 1, 1)
+    # 每 3 条共用一个 created_at，覆盖 keyset 的 id 兜底排序
+    return [f"智能客服方案 {i}" for i in range(n)], [base + timedelta(minutes=i // 3) for i in range(n)]
+
+
+def _search(**kw):
+    params = dict(query="智能客服", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=7)
+    params.update(kw)
+    return search_blocks(**params)
+
+
+def _walk(**kw):
+    ids, cursor = [], None
+    while True:
+        res = _search(cursor=cursor, count="none", **kw)
+        ids.extend(it["block_id"] for it in res["items"])
+        cursor = res["next_cursor"]
+        if not cursor:
+            return ids
+
+
+def test_cursor_pages_match_offset_pages(add_kb_blocks):
+    texts, times = _texts_and_times(25)
+    add_kb_blocks(texts, created_at=times)
+    texts, times = _texts_and_times(5)
+    add_kb_blocks(texts, filename="智能客服.docx", created_at=times)
+
+    offset_ids = []
+    for page in range(1, 6):
+        offset_ids.extend(
+            it["block_id"] for it in _search(page=page, title_keywords=["智能客服"])["items"]
+        )
+
+    cursor_ids = _walk(title_keywords=["智能客服"])
+    assert cursor_ids == offset_ids
+    assert len(set(cursor_ids)) == 30
+
+
+def test_cursor_keeps_rows_without_created_at(add_kb_blocks):
+    texts, times = _texts_and_times(10)
+    _, blocks = add_kb_blocks(texts, created_at=times)
+    # 同分的行里一部分没有 created_at：降序时排在最后。
+    # 第一页（7 条）正好是有时间的行，游标停在非空 created_at 上，之后的 NULL 行不能丢
+    for b in blocks[:3]:
+        b.created_at = None
+    db.session.commit()
+
+    offset_ids = []
+    for page in range(1, 3):
+        offset_ids.extend(it["block_id"] for it in _search(page=page)["items"])
+
+    cursor_ids = _walk()
+    assert cursor_ids == offset_ids
+    assert len(set(cursor_ids)) == 10
+
+
+def test_cursor_respects_top_k(add_kb_blocks):
+    texts, times = _texts_and_times(25)
+    add_kb_blocks(texts, created_at=times)
+    ids = _walk(top_k=10)
+    assert len(ids) == 10
+    assert ids == _walk()[:10]
+
+
+def test_count_modes(add_kb_blocks):
+    texts, times = _texts_and_times(25)
+    add_kb_blocks(texts, created_at=times)
+    assert _search()["total"] == 25
+    assert _search(top_k=10)["total"] == 10
+
+    res = _search(count="capped", count_cap=20)
+    assert res["total"] == 20 and res["total_capped"] is True
+    res = _search(count="capped", count_cap=100)
+    assert res["total"] == 25 and res["total_capped"] is False
+
+    assert _search(count="none")["total"] is None
+
+    with pytest.raises(KbSearchError):
+        _search(count="bogus")
+    with pytest.raises(KbSearchError):
+        _search(cursor="not-a-cursor")
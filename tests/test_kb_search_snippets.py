@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("flask")
+
+from sqlalchemy import event  # noqa: E402
+
+from app.extensions import db  # noqa: E402
+from domain.kb.retriever import KbSearchError, search_blocks  # noqa: E402
+
+LONG_TEXT = "前言" * 300 + "我方提供智能客服系统，智能客服支持多轮对话。" + "结尾" * 300
+
+
+@pytest.fixture()
+def app_ctx(kb_app, add_kb_blocks):
+    kb_app.config["KB_SEARCH_CACHE_SIZE"] = 0
+    _, (block,) = add_kb_blocks([LONG_TEXT])
+    return kb_app, block.id
+
+
+def _search(**kw):
+    params = dict(query="智能客服", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    params.update(kw)
+    return search_blocks(**params)
+
+
+def test_snippet_window_and_highlights(app_ctx):
+    res = _search(fields=["snippet", "highlights", "content_len"], snippet_chars=60)
+    item = res["items"][0]
+
+    assert "content_text" not in item
+    assert len(item["snippet"]) <= 60 + len("智能客服")
+    assert LONG_TEXT[item["snippet_offset"]:].startswith(item["snippet"])
+    assert item["highlights"]
+    for start, end in item["highlights"]:
+        assert item["snippet"][start:end] == "智能客服"
+    assert item["content_len"] == len(LONG_TEXT)
+
+
+def test_projection_does_not_select_full_content(app_ctx):
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    engine = db.engine
+    event.listen(engine, "before_cursor_execute", _capture)
+    try:
+        res = _search(fields="block_id,score", count="none")
+    finally:
+        event.remove(engine, "before_cursor_execute", _capture)
+
+    assert set(res["items"][0]) == {"block_id", "score"}
+    select_sql = [s for s in statements if "ORDER BY" in s]
+    assert select_sql and "AS content_text" not in select_sql[-1]
+
+
+def test_default_keeps_full_content_and_rejects_unknown_fields(app_ctx):
+    item = _search()["items"][0]
+    assert item["content_text"] == LONG_TEXT
+    with pytest.raises(KbSearchError):
+        _search(fields=["nope"])
+
+
+def test_api_returns_snippets_and_block_endpoint_returns_full_text(app_ctx):
+    app, block_id = app_ctx
+    client = app.test_client()
+
+    resp = client.post("/api/v1/kb/search", json={"query": "智能客服"})
+    assert resp.status_code == 200
+    item = resp.get_json()["items"][0]
+    assert "content_text" not in item
+    assert item["snippet"] and item["highlights"]
+
+    resp = client.get(f"/api/v1/kb/blocks/{item['block_id']}")
+    assert resp.status_code == 200
+    assert resp.get_json()["content_text"] == LONG_TEXT
+
+    assert client.get("/api/v1/kb/blocks/missing").status_code == 404
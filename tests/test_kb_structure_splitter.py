@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+from domain.kb.structure_splitter import StructureTextSplitter, is_heading  # noqa: E402
+
+
+def test_heading_detection():
+    for line in ["第一章 总则", "第12条 付款", "1.1 项目概述", "2.3.4、技术要求", "（一）资格要求", "(二)商务", "三、评分办法"]:
+        assert is_heading(line), line
+    for line in ["3.5万元", "2.5%", "2023年完成交付", "投标人应具备独立承担民事责任的能力。", ""]:
+        assert not is_heading(line), line
+
+
+def test_splits_on_headings_and_merges_small_sections():
+    body = "投标内容说明。" * 40
+    text = "\n".join([
+        "第一章 总则",
+        "1.1 概述",
+        body,
+        "1.2 范围",
+        body,
+        "第二章 技术要求",
+        "（一）性能",
+        body,
+    ])
+    chunks = StructureTextSplitter.split_text(text, min_chars=100, max_chars=1000)
+
+    assert [c.split("\n", 1)[0] for c in chunks] == ["第一章 总则", "1.2 范围", "第二章 技术要求"]
+    # 只有标题的小节并入后续正文
+    assert chunks[0].startswith("第一章 总则\n1.1 概述\n")
+
+
+def test_respects_max_chars_without_losing_text():
+    long_para = "系统须支持语音识别、语义理解和多轮对话。" * 200
+    text = "\n".join(["第一章 技术", long_para, "x" * 3000])
+    chunks = StructureTextSplitter.split_text(text, min_chars=100, max_chars=500)
+
+    assert all(len(c) <= 500 for c in chunks)
+    assert "".join("".join(chunks).split()) == "".join(text.split())
+
+
+def test_is_deterministic_and_handles_empty_text():
+    text = "\n".join(f"{i}. 条款\n" + "内容" * 200 for i in range(1, 8))
+    assert StructureTextSplitter.split_text(text) == StructureTextSplitter.split_text(text)
+    assert StructureTextSplitter.split_text("  \n ") == []
@@ -0,0 +1,87 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("flask")
+
+from app.extensions import db  # noqa: E402
+from app.models import KbBlock, KbBlockTerm  # noqa: E402
+from domain.kb import term_index  # noqa: E402
+from domain.kb.ingest import delete_doc  # noqa: E402
+from domain.kb.retriever import search_blocks  # noqa: E402
+
+MIGRATION = Path(__file__).resolve().parents[1] / "migrations" / "versions" / "4c5d6e7f8a9b_add_kb_block_terms.py"
+
+
+def test_block_terms_are_lowercased_bigrams():
+    assert term_index.block_terms("智能客服 ASR") == {"智能", "能客", "客服", "as", "sr"}
+    assert term_index.query_terms("客") == []
+
+
+def test_search_blocks_uses_term_index(add_kb_blocks):
+    _, blocks = add_kb_blocks(["我方提供智能客服系统", "项目实施与培训计划", "售后服务响应"])
+
+    res = search_blocks(query="智能客服", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    assert res["total"] == 1
+    assert res["items"][0]["block_id"] == blocks[0].id
+
+    # 所有 bigram 都命中但原文不连续的切片，会被 LIKE 校验过滤掉
+    add_kb_blocks(["客服智能化，智能客"])
+    res = search_blocks(query="智能客服", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    assert [it["block_id"] for it in res["items"]] == [blocks[0].id]
+
+    # 单字检索无法走索引，回退到 LIKE
+    res = search_blocks(query="训", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    assert res["total"] == 1
+
+
+def test_like_wildcards_skip_term_index(add_kb_blocks):
+    _, blocks = add_kb_blocks(["我方提供智能客服系统", "项目实施与培训计划"])
+
+    # % / _ 仍按 LIKE 通配处理，与引入倒排前一致
+    assert term_index.match_block_ids("智能%系统") is None
+    for q in ("智能%系统", "智能_服", "项目%计划"):
+        res = search_blocks(query=q, top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+        assert res["total"] == 1, q
+    assert term_index.match_block_ids("智能客服") is not None
+
+
+def test_delete_doc_removes_terms(add_kb_blocks):
+    file_id, _ = add_kb_blocks(["我方提供智能客服系统"])
+    assert db.session.query(KbBlockTerm).filter(KbBlockTerm.file_id == file_id).count() > 0
+
+    delete_doc(file_id)
+    assert db.session.query(KbBlockTerm).filter(KbBlockTerm.file_id == file_id).count() == 0
+    res = search_blocks(query="智能客服", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    assert res["total"] == 0
+
+
+def test_rebuild_index_backfills_existing_blocks(add_kb_blocks):
+    # 模拟升级前的历史切片：有 kb_blocks，没有倒排
+    add_kb_blocks(["历史资质证书"], index=False)
+
+    assert term_index.rebuild_index() > 0
+    res = search_blocks(query="资质", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    assert res["total"] == 1
+
+
+def test_migration_backfills_existing_blocks(add_kb_blocks, monkeypatch):
+    spec = importlib.util.spec_from_file_location("kb_block_terms_migration", MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+
+    # 小批量，覆盖多批回填
+    monkeypatch.setattr(migration, "_BACKFILL_BATCH", 2)
+    file_ids = [
+        add_kb_blocks([t], index=False)[0] for t in ("历史资质证书", "ISO 认证证书", "售后服务承诺", "项目业绩")
+    ]
+    migration._backfill(db.session.connection())
+    db.session.commit()
+
+    for file_id in file_ids:
+        block = KbBlock.query.filter_by(file_id=file_id).one()
+        stored = {t.term for t in KbBlockTerm.query.filter_by(block_id=block.id)}
+        assert stored == term_index.block_terms(block.content_text)
+    res = search_blocks(query="证书", top_k=None, by_tag=None, title_keywords=None, page=1, page_size=20)
+    assert res["total"] == 2
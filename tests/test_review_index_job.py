@@ -0,0 +1,180 @@
+import importlib.util
+import json
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+if not (_has_module("flask") and _has_module("docx")):
+    pytest.skip("flask and python-docx are required for review index job tests", allow_module_level=True)
+
+from docx import Document  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import File, Job, KbBlock  # noqa: E402
+from app.worker import runner as runner_module  # noqa: E402
+from domain.kb import term_index  # noqa: E402
+
+
+@pytest.fixture()
+def app_ctx(tmp_path, monkeypatch):
+    os.environ["FLASK_ENV"] = "testing"
+    app = create_app("testing")
+    app.config["TESTING"] = True
+    app.config["KB_SEARCH_CACHE_SIZE"] = 0
+    app.config["ARTIFACT_STORAGE_DIR"] = str(tmp_path / "artifacts")
+
+    # 后台线程改为同步执行，便于断言
+    monkeypatch.setattr(runner_module.runner, "start", lambda job_id: runner_module.runner._run(app, job_id))
+
+    with app.app_context():
+        db.create_all()
+        file_id = str(uuid.uuid4())
+        db.session.add(File(id=file_id, filename="tender.docx", ext="docx", size=1, storage_path="x"))
+
+        requirements = tmp_path / "result.json"
+        requirements.write_text(json.dumps({"tables": [{"rows": [
+            {"category": "技术", "item": "智能客服"},
+            {"category": "商务", "item": "售后服务"},
+            {"category": "其他", "item": ""},
+        ]}]}, ensure_ascii=False), encoding="utf-8")
+        source_id = str(uuid.uuid4())
+        db.session.add(Job(
+            id=source_id, file_id=file_id, script_id="S", model_id="m", status="SUCCEEDED",
+            artifact_json_path=str(requirements),
+        ))
+
+        text = "我方智能客服系统支持多轮对话。"
+        block = KbBlock(id=str(uuid.uuid4()), file_id=file_id, content_text=text, content_len=len(text), tag="general")
+        db.session.add(block)
+        term_index.index_blocks([(block.id, file_id, text)])
+        db.session.commit()
+        yield app, source_id
+        db.session.remove()
+        db.drop_all()
+
+
+def test_generate_runs_as_job_and_downloads_docx(app_ctx, tmp_path):
+    app, source_id = app_ctx
+    client = app.test_client()
+    stages = []
+    original = runner_module.runner._set_job
+
+    def _record(job_id, **kw):
+        if kw.get("stage"):
+            stages.append(kw["stage"])
+        return original(job_id, **kw)
+
+    runner_module.runner._set_job = _record
+    try:
+        resp = client.post("/api/v1/review-index/generate", json={"job_id": source_id, "kb_tag": "general"})
+    finally:
+        runner_module.runner._set_job = original
+
+    assert resp.status_code == 202
+    job_id = resp.get_json()["job_id"]
+    assert [s for s in stages if s in ("LOAD_REQUIREMENTS", "RETRIEVE", "RENDER", "DONE")] == [
+        "LOAD_REQUIREMENTS", "RETRIEVE", "RENDER", "DONE",
+    ]
+
+    job = client.get(f"/api/v1/jobs/{job_id}").get_json()
+    assert job["status"] == "SUCCEEDED" and job["progress"] == 100
+
+    resp = client.get(f"/api/v1/jobs/{job_id}/artifact?type=docx")
+    assert resp.status_code == 200
+    out = tmp_path / "out.docx"
+    out.write_bytes(resp.data)
+    cells = [c.text for t in Document(str(out)).tables for row in t.rows for c in row.cells]
+    assert any("我方智能客服系统支持多轮对话" in c for c in cells)
+
+
+def test_generate_validates_source_job(app_ctx):
+    app, _ = app_ctx
+    client = app.test_client()
+    assert client.post("/api/v1/review-index/generate", json={}).status_code == 400
+    assert client.post("/api/v1/review-index/generate", json={"job_id": "missing"}).status_code == 404
+
+
+def test_concurrent_retrieval_keeps_requirement_order(tmp_path):
+    from flask import Flask
+
+    from domain.review_index.generator import BiddingDocumentGenerator
+
+    # 文件库：内存库所有 session 共用一个连接，会退回串行
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'kb.db'}"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["KB_SEARCH_CACHE_SIZE"] = 0
+    app.config["REVIEW_INDEX_RETRIEVE_BATCH"] = 2
+    db.init_app(app)
+
+    topics = ["智能客服", "售后服务", "语音识别", "系统架构", "培训计划", "应急响应", "交付周期"]
+    with app.app_context():
+        db.create_all()
+        file_id = str(uuid.uuid4())
+        db.session.add(File(id=file_id, filename="kb.docx", ext="docx", size=1, storage_path="x"))
+        rows = []
+        for i, topic in enumerate(topics * 3):
+            text = f"{topic}说明" + "。" * i
+            block = KbBlock(id=str(uuid.uuid4()), file_id=file_id, content_text=text, content_len=len(text), tag="t")
+            db.session.add(block)
+            rows.append((block.id, file_id, text))
+        term_index.index_blocks(rows)
+        db.session.commit()
+
+        generator = BiddingDocumentGenerator.__new__(BiddingDocumentGenerator)
+        queries = list(reversed(topics)) + ["不存在", topics[0]]
+        serial = generator.search_evidence_batch(queries, tag="t", top_k=2, concurrency=1)
+        parallel = generator.search_evidence_batch(queries, tag="t", top_k=2, concurrency=4)
+
+        assert parallel == serial
+        assert [e[0]["content"].startswith(q) for q, e in zip(queries, parallel) if e] == [True] * len(topics) + [True]
+        assert parallel[-2] == []
+
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+
+
+def test_preview_pages_cached_requirements(app_ctx, tmp_path, monkeypatch):
+    from domain.review_index import generator as generator_module
+
+    app, source_id = app_ctx
+    client = app.test_client()
+    calls = []
+    parse = generator_module._parse_requirements
+    monkeypatch.setattr(generator_module, "_parse_requirements", lambda path: calls.append(path) or parse(path))
+    generator_module._requirements_cache.clear()
+
+    first = client.get(f"/api/v1/review-index/preview?job_id={source_id}&offset=0&limit=2").get_json()
+    second = client.get(f"/api/v1/review-index/preview?job_id={source_id}&offset=2&limit=2").get_json()
+    assert first["total"] == second["total"] == 3
+    assert [r["item"] for r in first["items"]] == ["智能客服", "售后服务"]
+    assert [r["category"] for r in second["items"]] == ["其他"]
+    assert len(calls) == 1
+
+    # 生成时修改的是副本，不影响缓存
+    generator = generator_module.BiddingDocumentGenerator(source_id)
+    generator.load_requirements()[0]["response_text"] = "x"
+    assert "response_text" not in generator.requirements_page(0, 1)[0][0]
+
+    # 文件变化后重新解析
+    path = tmp_path / "result.json"
+    path.write_text(json.dumps([["c", "新需求", "", ""]], ensure_ascii=False), encoding="utf-8")
+    os.utime(path, ns=(path.stat().st_atime_ns, path.stat().st_mtime_ns + 10 ** 9))
+    third = client.get(f"/api/v1/review-index/preview?job_id={source_id}").get_json()
+    assert third["total"] == 1 and third["items"][0]["item"] == "新需求"
+    assert len(calls) == 2
+
+    assert client.get(f"/api/v1/review-index/preview?job_id={source_id}&limit=x").status_code == 400
@@ -0,0 +1,136 @@
+import importlib.util
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+if not (_has_module("flask") and _has_module("docx") and _has_module("openpyxl")):
+    pytest.skip("flask, python-docx and openpyxl are required for loader tests", allow_module_level=True)
+
+import openpyxl  # noqa: E402
+from docx import Document  # noqa: E402
+
+from app import create_app  # noqa: E402
+from domain.review_index import requirements, score_template  # noqa: E402
+from domain.review_index.parse_cache import get_cache  # noqa: E402
+
+
+@pytest.fixture()
+def app_ctx():
+    os.environ["FLASK_ENV"] = "testing"
+    app = create_app("testing")
+    get_cache().clear()
+    with app.app_context():
+        yield app
+    get_cache().clear()
+
+
+def _bump_mtime(path: Path) -> None:
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def _score_docx(path: Path) -> None:
+    doc = Document()
+    doc.add_paragraph("评分模板")
+    table = doc.add_table(rows=5, cols=5)
+    header = ["评分大类（分）", "评分小类", "评分标准", "有效证明材料", "证明材料页码"]
+    for cell, text in zip(table.rows[0].cells, header):
+        cell.text = text
+    data = [
+        ["资质（10分）", "ISO认证", "提供 ISO9001 得 5 分", "1、ISO9001\n2、ISO27001", "P1"],
+        ["", "CMMI", "提供 CMMI5 得 5 分", "CMMI5 证书", "P2"],
+        ["业绩（20分）", "类似项目", "每个 5 分", "合同", ""],
+        ["", "", "", "", ""],
+    ]
+    for row, values in zip(table.rows[1:], data):
+        for cell, text in zip(row.cells, values):
+            cell.text = text
+    # 纵向合并（评分大类跨两行）+ 横向合并（评分标准与材料合并）
+    table.cell(1, 0).merge(table.cell(2, 0))
+    table.cell(3, 2).merge(table.cell(3, 3))
+    doc.save(str(path))
+
+
+def _reference_rows(path: Path):
+    # 改造前的实现：python-docx row.cells 展开合并单元格
+    table = Document(str(path)).tables[0]
+
+    def text(cell):
+        return "\n".join(t for t in ((p.text or "").strip() for p in cell.paragraphs) if t).strip()
+
+    return [[text(c) for c in r.cells] for r in table.rows]
+
+
+def test_score_template_matches_python_docx_cells(app_ctx, tmp_path):
+    path = tmp_path / "score.docx"
+    _score_docx(path)
+
+    expected = _reference_rows(path)
+    rows = score_template.load_score_template_docx(str(path))
+
+    assert [r.score_major for r in rows] == [c[0] for c in expected[1:4]]
+    assert rows[1].score_major == "资质（10分）"
+    assert rows[0].evidence_materials == "1、ISO9001\n2、ISO27001"
+    assert rows[2].score_rule == rows[2].evidence_materials == expected[3][2]
+    assert len(rows) == 3
+
+
+def test_score_template_cached_by_mtime(app_ctx, tmp_path, monkeypatch):
+    path = tmp_path / "score.docx"
+    _score_docx(path)
+    calls = []
+    parse = score_template.iter_score_template_docx
+    monkeypatch.setattr(score_template, "iter_score_template_docx", lambda p: calls.append(p) or parse(p))
+
+    first = score_template.load_score_template_docx(str(path))
+    first.clear()
+    assert len(score_template.load_score_template_docx(str(path))) == 3
+    assert len(calls) == 1
+
+    _bump_mtime(path)
+    score_template.load_score_template_docx(str(path))
+    assert len(calls) == 2
+
+
+def test_requirements_xlsx_streams_rows(app_ctx, tmp_path, monkeypatch):
+    path = tmp_path / "req.xlsx"
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "Result"
+    ws.append(["Category", "Item", "Value", "Source"])
+    ws.append(["技术", "智能客服", "支持多轮对话", "line:120"])
+    ws.append([None, None, None, None])
+    ws.append(["商务", "售后服务", 7, None])
+    wb.save(str(path))
+
+    rows = iter(requirements.iter_requirements_xlsx(str(path)))
+    assert next(rows).item == "智能客服"
+    rows.close()
+
+    calls = []
+    parse = requirements.iter_requirements_xlsx
+    monkeypatch.setattr(requirements, "iter_requirements_xlsx", lambda p, s: calls.append(p) or parse(p, s))
+    loaded = requirements.load_requirements_xlsx(str(path))
+    assert [(r.category, r.item, r.value, r.source) for r in loaded] == [
+        ("技术", "智能客服", "支持多轮对话", "line:120"),
+        ("商务", "售后服务", "7", ""),
+    ]
+    assert requirements.load_requirements_xlsx(str(path)) == loaded
+    assert len(calls) == 1
+
+    _bump_mtime(path)
+    requirements.load_requirements_xlsx(str(path))
+    assert len(calls) == 2
+
+    with pytest.raises(FileNotFoundError):
+        requirements.load_requirements_xlsx(str(tmp_path / "missing.xlsx"))
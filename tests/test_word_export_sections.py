@@ -0,0 +1,166 @@
+import importlib.util
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+if not (_has_module("flask") and _has_module("docx")):
+    pytest.skip("flask and python-docx are required for word export tests", allow_module_level=True)
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import File, KbBlock  # noqa: E402
+from domain.exports import word  # noqa: E402
+from domain.kb.block_docx_cache import BlockDocxCache  # noqa: E402
+from domain.exports.word import _run_in_pool, pick_section_blocks, section_fragment_key  # noqa: E402
+from domain.kb.retriever import search_blocks  # noqa: E402
+
+TAGS = ["项目名称", "项目编号", "采购人", "截止时间"]
+
+
+@pytest.fixture()
+def app_ctx():
+    os.environ["FLASK_ENV"] = "testing"
+    app = create_app("testing")
+    app.config["TESTING"] = True
+    app.config["KB_SEARCH_CACHE_SIZE"] = 0
+
+    with app.app_context():
+        db.create_all()
+        files = []
+        for name in ["招标公告.docx", "采购文件.docx", "其他.docx"]:
+            file_id = str(uuid.uuid4())
+            files.append(file_id)
+            db.session.add(File(id=file_id, filename=name, ext="docx", size=1, storage_path="x"))
+
+        base = datetime(2024, 1, 1)
+        for i in range(30):
+            tag = (TAGS + ["无关"])[i % 5]
+            db.session.add(KbBlock(
+                id=str(uuid.uuid4()),
+                file_id=files[i % 3],
+                content_text=f"切片{i}",
+                content_len=3,
+                tag=tag,
+                # 部分切片入库时间相同，检验并列时的排序
+                created_at=base + timedelta(minutes=i // 4),
+            ))
+        db.session.commit()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _per_tag(tags, keywords, top_k):
+    merged = {}
+    for tag in tags:
+        res = search_blocks(
+            query=None, top_k=top_k, by_tag=tag, title_keywords=keywords, page=1, page_size=top_k or 20,
+        )
+        for item in res["items"]:
+            prev = merged.get(item["block_id"])
+            if prev is None or item["score"] > prev["score"]:
+                merged[item["block_id"]] = item
+    items = sorted(merged.values(), key=lambda x: x["score"], reverse=True)
+    return [(i["block_id"], i["score"]) for i in (items[:top_k] if top_k else items)]
+
+
+@pytest.mark.parametrize("top_k", [None, 1, 5, 100])
+@pytest.mark.parametrize("keywords", [None, ["招标"], ["采购", "公告"]])
+def test_single_query_matches_per_tag_search(app_ctx, top_k, keywords):
+    for tags in (TAGS, TAGS[:1], [None]):
+        picked = pick_section_blocks(tags, keywords, top_k)
+        assert [(b["block_id"], b["score"]) for b in picked] == _per_tag(tags, keywords, top_k)
+
+
+def test_one_statement_per_section(app_ctx):
+    statements = []
+
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _capture)
+    try:
+        pick_section_blocks(TAGS, ["项目", "采购"], 10)
+        pick_section_blocks(TAGS, None, None)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _capture)
+
+    assert len(statements) == 2
+
+
+def test_fragment_key_follows_block_order():
+    a = [{"block_id": "a"}, {"block_id": "b"}]
+    assert section_fragment_key(a) == section_fragment_key([dict(x) for x in a])
+    assert section_fragment_key(a) != section_fragment_key(list(reversed(a)))
+
+
+def _slow_square(i):
+    import time
+
+    # 先提交的任务后完成，结果仍按提交顺序返回
+    time.sleep(0.02 * (5 - i))
+    if i == 3 and os.getpid() != _PARENT_PID:
+        # 子进程里失败的任务会在主进程重试
+        raise OSError("worker failed")
+    return i * i
+
+
+# spawn 子进程会重新导入本模块，主进程 pid 经环境变量传过去
+_PARENT_PID = int(os.environ.setdefault("WORD_EXPORT_TEST_PARENT_PID", str(os.getpid())))
+
+
+def test_pool_results_follow_input_order():
+    args = [(i,) for i in range(5)]
+    assert _run_in_pool(_slow_square, args, workers=4) == [0, 1, 4, 9, 16]
+    pool = word._pool
+    assert pool is not None and pool._mp_context.get_start_method() == "spawn"
+    # 第二次导出复用同一个进程池
+    assert _run_in_pool(_slow_square, args, workers=4) == [0, 1, 4, 9, 16]
+    assert word._pool is pool
+    assert _run_in_pool(_slow_square, args, workers=1) == [0, 1, 4, 9, 16]
+
+
+def test_serial_by_default():
+    app = create_app("testing")
+    with app.app_context():
+        assert word._export_workers() == 1
+        assert word._pool_min_sections() == word.DEFAULT_POOL_MIN_SECTIONS
+
+
+
+def _fake_fragment(blocks, repo_root, fragment_path, block_cache=None):
+    # 不依赖 docxcompose：每个片段写 1000 字节
+    Path(fragment_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(fragment_path).write_bytes(b"x" * 1000)
+    return {"path": fragment_path, "block_cache": {}}
+
+
+def test_section_fragment_cache_is_bounded(app_ctx, tmp_path, monkeypatch):
+    sections = [[{"block_id": f"s{i}", "content_text": f"章节{i}"}] for i in range(3)]
+    # 上限只够放 2.5 个片段：按 mtime 淘汰最旧的，本次导出要用的片段保留
+    cache = BlockDocxCache(str(tmp_path / "sections"), max_bytes=2500)
+    monkeypatch.setattr(word, "get_section_fragment_cache", lambda: cache)
+    monkeypatch.setattr(word, "build_section_fragment", _fake_fragment)
+
+    first = word.assemble_section_fragments(sections[:2], REPO_ROOT, workers=1)
+    for i, path in enumerate(first):
+        st = path.stat()
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns - (100 - i) * 10 ** 9))
+
+    second = word.assemble_section_fragments(sections[1:], REPO_ROOT, workers=1)
+    assert sorted(p.name for p in (tmp_path / "sections").glob("*.docx")) == sorted(p.name for p in second)
+    assert cache.stats()["evictions"] == 1